@@ -0,0 +1,139 @@
+"""Run benchmarks.
+
+Standalone runner of the scenarios. Results are saved as JSON and compared
+with a baseline (a previous output). The stored baseline is
+benchmarks/baseline.json.
+
+    python benchmarks/run.py --baseline benchmarks/baseline.json
+    python benchmarks/run.py --output benchmarks/baseline.json
+
+Exits with 1 if a median time regressed over the threshold.
+"""
+
+import argparse
+import json
+import multiprocessing
+import platform
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+from scenarios import SCENARIOS
+
+import combu
+
+
+def measure(func: Callable[[], Any],
+            rounds: int,
+            warmup: int = 1) -> Dict[str, Any]:
+    """Measure a scenario.
+
+    Args:
+        func (Callable[[], Any]): Scenario.
+        rounds (int): Number of timed rounds.
+        warmup (int, optional): Number of rounds not timed.
+
+    Returns:
+        Dict[str, Any]: Seconds (min, median and mean) and rounds.
+    """
+    for _ in range(warmup):
+        func()
+    times = []
+    for _ in range(rounds):
+        t = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - t)
+    return {
+        'min': min(times),
+        'median': statistics.median(times),
+        'mean': statistics.mean(times),
+        'rounds': rounds,
+    }
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any],
+            threshold: float) -> List[str]:
+    """Compare medians with a baseline.
+
+    Args:
+        results (Dict[str, Any]): Results by scenario.
+        baseline (Dict[str, Any]): Baseline results by scenario.
+        threshold (float): Allowed slowdown ratio (0.2 for 20%).
+
+    Returns:
+        List[str]: Regressed scenarios.
+    """
+    regressed = []
+    for name, res in results.items():
+        if name not in baseline:
+            continue
+        ratio = res['median'] / baseline[name]['median']
+        mark = ''
+        if ratio > 1 + threshold:
+            regressed.append(name)
+            mark = ' REGRESSED'
+        print('{:<32} {:>10.6f} {:>10.6f} {:>7.2f}x{}'.format(
+            name, baseline[name]['median'], res['median'], ratio, mark))
+    return regressed
+
+
+def main(argv: List[str] = None) -> int:
+    """Run benchmarks.
+
+    Args:
+        argv (List[str], optional): Arguments.
+
+    Returns:
+        int: Exit code.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('-k',
+                        '--filter',
+                        default='',
+                        help='Run scenarios containing this string.')
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--output', help='Path of JSON output.')
+    parser.add_argument('--baseline', help='Path of baseline JSON.')
+    parser.add_argument('--threshold',
+                        type=float,
+                        default=0.2,
+                        help='Allowed slowdown of median (0.2 for 20%%).')
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name in sorted(SCENARIOS):
+        if args.filter not in name:
+            continue
+        results[name] = measure(SCENARIOS[name], args.rounds)
+        print('{:<32} {:>10.6f}'.format(name, results[name]['median']))
+
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump(
+                {
+                    'combu': combu.__version__,
+                    'python': platform.python_version(),
+                    'platform': platform.platform(),
+                    'cpu_count': multiprocessing.cpu_count(),
+                    'benchmarks': results,
+                },
+                f,
+                indent=2)
+
+    if args.baseline is None:
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)['benchmarks']
+    print()
+    print('{:<32} {:>10} {:>10} {:>8}'.format('scenario', 'baseline', 'median',
+                                              'ratio'))
+    regressed = compare(results, baseline, args.threshold)
+    if len(regressed) > 0:
+        print('Regressed: {}'.format(', '.join(regressed)))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,130 @@
+"""Benchmark scenarios.
+
+Each scenario is a function without arguments running one round. Inputs are
+built once, outside of the timed rounds.
+"""
+
+import os
+import subprocess
+import sys
+import time
+from typing import Any, Callable, Dict
+
+import combu
+from combu import Combu, Pack, Unset
+from combu.cost import CostModel
+from combu.parallel import ParallelExecutor
+import combu.util
+
+SCENARIOS: Dict[str, Callable[[], Any]] = {}
+
+# Grids of 4096 combinations.
+WIDE = {'v{}'.format(i): [0, 1] for i in range(12)}
+DEEP = {'v0': list(range(64)), 'v1': list(range(64))}
+PACK = {
+    Pack('v0', 'v1'): [{
+        'v0': list(range(8)),
+        'v1': list(range(8)),
+    }] * 8,
+    'v2': list(range(8)),
+}
+TUPLE = {
+    ('v0', 'v1'): [(i, i) for i in range(64)],
+    'v2': list(range(64)),
+}
+UNSET = {
+    'v0': [Unset() if i % 2 else i for i in range(16)],
+    'v1': [Unset() if i % 2 else i for i in range(16)],
+    'v2': [Unset() if i % 4 else i for i in range(16)],
+}
+HOOKED = {'v{}'.format(i): list(range(8)) for i in range(4)}
+
+N_CALLS = 2000
+N_PAYLOADS = 200
+PAYLOAD = b'x' * 2**20
+# Cheap calls, then a costly one at the end of the axis.
+TAIL = {'t': [0.005] * 8 + [0.04]}
+
+
+def _noop(**kwargs: Any) -> None:
+    pass
+
+
+def _size(data: bytes) -> int:
+    return len(data)
+
+
+def _payload(i: int) -> bytes:
+    return PAYLOAD
+
+
+def _sleep(t: float) -> None:
+    time.sleep(t)
+
+
+def _scenario(name: str) -> Callable:
+    """Register a scenario."""
+
+    def _register(func: Callable[[], Any]) -> Callable[[], Any]:
+        SCENARIOS[name] = func
+        return func
+
+    return _register
+
+
+for _name, _params in [('wide', WIDE), ('deep', DEEP), ('pack', PACK),
+                       ('tuple', TUPLE), ('unset', UNSET)]:
+    _scenario('create_values/{}'.format(_name))(
+        lambda p=_params: list(combu.create_values(p)))
+    _scenario('standardize/{}'.format(_name))(
+        lambda p=_params: combu.util.standardize(p))
+
+
+@_scenario('combu/no_hooks')
+def _combu_no_hooks() -> None:
+    list(Combu(_noop).execute(HOOKED))
+
+
+@_scenario('combu/hooks')
+def _combu_hooks() -> None:
+    comb = Combu(_noop)
+    for k in HOOKED:
+        comb.set_before(k, _noop)
+        comb.set_before_each(k, _noop)
+        comb.set_after_each(k, _noop)
+        comb.set_after(k, _noop)
+    list(comb.execute(HOOKED))
+
+
+for _n_jobs in [1, 2, 4]:
+    _scenario('execute/noop/n_jobs={}'.format(_n_jobs))(lambda n=_n_jobs: list(
+        combu.execute(_noop, {'i': range(N_CALLS)}, n_jobs=n)))
+
+
+@_scenario('execute/tail/in_order')
+def _tail_in_order() -> None:
+    list(combu.execute(_sleep, TAIL, n_jobs=2))
+
+
+@_scenario('execute/tail/costliest_first')
+def _tail_costliest_first() -> None:
+    list(combu.execute(_sleep, TAIL, n_jobs=2, cost=CostModel(lambda t: t)))
+
+
+@_scenario('parallel/payload_in')
+def _payload_in() -> None:
+    params = [{'data': PAYLOAD} for _ in range(N_PAYLOADS)]
+    list(ParallelExecutor(_size, n=2).execute(params))
+
+
+@_scenario('parallel/payload_out')
+def _payload_out() -> None:
+    params = [{'i': i} for i in range(N_PAYLOADS)]
+    list(ParallelExecutor(_payload, n=2).execute(params))
+
+
+@_scenario('import/combu')
+def _import_combu() -> None:
+    # Fresh interpreter, including its startup.
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    subprocess.run([sys.executable, '-c', 'import combu'], env=env, check=True)
@@ -0,0 +1,16 @@
+"""Benchmarks with pytest-benchmark.
+
+Save with --benchmark-autosave and compare with a saved run with
+--benchmark-compare --benchmark-compare-fail=median:20%.
+"""
+
+import pytest
+from scenarios import SCENARIOS
+
+pytest.importorskip('pytest_benchmark')
+
+
+@pytest.mark.parametrize('name', sorted(SCENARIOS))
+def test_benchmark(benchmark, name: str) -> None:
+    """Benchmark a scenario."""
+    benchmark.pedantic(SCENARIOS[name], rounds=5, warmup_rounds=1)
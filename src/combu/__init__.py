@@ -1,17 +1,27 @@
 """Combu."""
 
-from combu import _combu, definition, execution, generator, parallel
+from combu import (_combu, adaptive, block, definition, execution, generator,
+                   incremental, parallel, scheduler, sinks)
 
 __version__ = '1.2.1'
 
 Combu = _combu.Combu
 CombuParallel = _combu.CombuParallel
 ParallelExecutor = parallel.ParallelExecutor
+Constraint = definition.Constraint
+Failure = definition.Failure
 Pack = definition.Pack
+Range = definition.Range
 Unset = definition.Unset
+Tensor = sinks.Tensor
 
 execute = execution.execute
 create_values = generator.create_values
+create_blocks = block.create_blocks
+successive_halving = scheduler.successive_halving
+hyperband = scheduler.hyperband
+refine = adaptive.refine
+execute_incremental = incremental.execute_incremental
 
 exec = execute  # alias.  # noqa: A001
 values = create_values  # alias.
@@ -1,52 +1,67 @@
 """Combu."""
 
-import itertools
-from typing import Any, Callable, cast, Dict, Iterable, Iterator, List, Tuple
+import time
+from typing import (Any, Callable, cast, Dict, Iterable, Iterator, List,
+                    Optional, Tuple, TYPE_CHECKING, Union)
 
 import combu
-from combu.definition import TParams, TParamsKey, Unset
+from combu.cost import CostModel
+from combu.definition import Constraint, TParams, TParamsKey
+import combu.execution
+from combu.fixtures import inject, TFixtures
 import combu.generator
+from combu.ordering import (count_hook_calls, HOOK_KINDS, optimize_order,
+                            OrderPlan, THook)
+from combu.progress import Progress
+from combu.sinks import as_sinks, close_sinks, TSinks
+from combu.stats import ExecutionStats
+from combu.tracing import Tracer
 import combu.util
 
-
-def _create_comb_index(
-    params: Dict[TParamsKey, Iterable],
-    order: Iterable[TParamsKey] = None,
-) -> Iterable[Dict[TParamsKey, int]]:
-    """Create parameter index.
-
-    Args:
-        params (Dict[TParamsKey, Iterable]): Parameters.
-        order (Iterable[TParamsKey], optional): Loop order.
-
-    Raises:
-        KeyError: Used unknown key on 'order'.
-
-    Yields:
-        Iterator[Dict[TParamsKey, int]]: Index of parameter.
-    """
-    keys = combu.generator.get_order(params.keys(), order=order)
-    idx_list = []
-    for k in keys:
-        # raise KeyError
-        param = [v for v in params[k]]  # noqa: C416
-        idx_list.append([i for i in range(len(param))])  # noqa: C416
-
-    for comb in itertools.product(*idx_list):
-        yield {k: i for k, i in zip(keys, comb) if i >= 0}
-
-
-def _merge_dict(*d_li: dict) -> dict:
-    """Merge dict.
+if TYPE_CHECKING:
+    from combu.profiling import Profiler
+
+
+def _call_hook(hooks: Dict[str, Callable], kind: str, k: str,
+               param: Dict[str, Any], stats: Optional[ExecutionStats],
+               trace: Optional[Tracer]) -> None:
+    """Call a hook. Its time is added to stats and trace."""
+    if stats is None and trace is None:
+        hooks[k](**param)
+        return
+    start_time = time.time()
+    t = time.perf_counter()
+    hooks[k](**param)
+    t = time.perf_counter() - t
+    if stats is not None:
+        stats.add_hook(kind, k, t)
+    if trace is not None:
+        trace.span('{}:{}'.format(kind, k),
+                   start_time,
+                   t,
+                   cat='hook',
+                   args=param)
+
+
+def _diff_position(a: Optional[Tuple[int, ...]],
+                   b: Optional[Tuple[int, ...]]) -> int:
+    """Get the outermost position where two indexes differ.
 
     Returns:
-        dict: Merged dict.
+        int: Position. -1 if either is None (first or last combination).
     """
-    result: dict = {}
+    if a is None or b is None:
+        return -1
+    for i, (v1, v2) in enumerate(zip(a, b)):
+        if v1 != v2:
+            return i
+    return len(a)
+
 
-    for d in d_li:
-        result = {**result, **d}
-    return result
+def _differ_at(a: Optional[Tuple[int, ...]], b: Optional[Tuple[int, ...]],
+               position: int) -> bool:
+    """Get whether two indexes differ at a position (or either is None)."""
+    return a is None or b is None or a[position] != b[position]
 
 
 class Combu:
@@ -66,23 +81,31 @@ class Combu:
         after_each_a()
         after_b()
     after_a()
+
+    With sequence='gray', one value changes per step: each loop of an inner
+    key runs backward after an outer value changes, and before_each /
+    after_each hooks of a key are called only when its value changes.
     """
 
     def __init__(
         self,
         func: Callable,
-        order: Iterable = None,
+        order: Union[Iterable, str] = None,
         before: Dict[str, Callable] = None,
         after: Dict[str, Callable] = None,
         before_each: Dict[str, Callable] = None,
         after_each: Dict[str, Callable] = None,
         progress: bool = False,
+        batch_size: int = None,
+        sequence: str = 'product',
+        changes: str = None,
     ) -> None:
         """Initialize object.
 
         Args:
             func (Callable): Target function.
-            order (Iterable[TParamsKey], optional): Loop order.
+            order (Union[Iterable[TParamsKey], str], optional): Loop order.
+                'auto' to minimize the cost of hooks (see plan()).
             before (Dict[str, Callable], optional): Functions before loop.
             after (Dict[str, Callable], optional): Functions after loop.
             before_each (Dict[str, Callable], optional):
@@ -90,7 +113,24 @@ class Combu:
             after_each (Dict[str, Callable], optional):
                 Functions after each loops.
             progress (bool, optional): Show progress bar or not.
+            batch_size (int, optional): Call the function with blocks of
+                consecutive combinations (a list of values per key).
+                Blocks end where hooks are called. Hooks receive the
+                parameter of the first / last combination of the block.
+            sequence (str, optional): Enumeration order. 'product' or
+                'gray' (a single value changes per step).
+            changes (str, optional): Name of extra argument of the
+                function receiving the keys changed from the previous call
+                (every key on the first call). Not with batch_size.
+
+        Raises:
+            ValueError: Unknown sequence.
+            ValueError: changes with batch_size.
         """
+        if sequence not in ('product', 'gray'):
+            raise ValueError('Unknown sequence: {}'.format(sequence))
+        if changes is not None and batch_size is not None:
+            raise ValueError('changes is not supported with batch_size.')
         self.func = func
         self.order = [] if order is None else order
         self.before = {} if before is None else before
@@ -98,56 +138,156 @@ class Combu:
         self.before_each = {} if before_each is None else before_each
         self.after_each = {} if after_each is None else after_each
         self.progress = progress
-
-    def set_before(self, k: str, func: Callable) -> None:
+        self.batch_size = batch_size
+        self.sequence = sequence
+        self.changes = changes
+        # Declared cost of a call of each hook (kind, key).
+        self.hook_costs: Dict[THook, float] = {}
+        # Plan of the last execution with order='auto'.
+        self.last_plan: Optional[OrderPlan] = None
+
+    def set_before(self, k: str, func: Callable, cost: float = None) -> None:
         """Set before function.
 
         Args:
             k (str): Key.
             func (Callable): Function.
+            cost (float, optional): Cost of a call, for order='auto'.
         """
         self.before[k] = func
+        self._set_cost('before', k, cost)
 
-    def set_after(self, k: str, func: Callable) -> None:
+    def set_after(self, k: str, func: Callable, cost: float = None) -> None:
         """Set after function.
 
         Args:
             k (str): Key.
             func (Callable): Function.
+            cost (float, optional): Cost of a call, for order='auto'.
         """
         self.after[k] = func
+        self._set_cost('after', k, cost)
 
-    def set_before_each(self, k: str, func: Callable) -> None:
+    def set_before_each(self,
+                        k: str,
+                        func: Callable,
+                        cost: float = None) -> None:
         """Set before each function.
 
         Args:
             k (str): Key.
             func (Callable): Function.
+            cost (float, optional): Cost of a call, for order='auto'.
         """
         self.before_each[k] = func
+        self._set_cost('before_each', k, cost)
 
-    def set_after_each(self, k: str, func: Callable) -> None:
+    def set_after_each(self,
+                       k: str,
+                       func: Callable,
+                       cost: float = None) -> None:
         """Set after each function.
 
         Args:
             k (str): Key.
             func (Callable): Function.
+            cost (float, optional): Cost of a call, for order='auto'.
         """
         self.after_each[k] = func
+        self._set_cost('after_each', k, cost)
+
+    def _set_cost(self, kind: str, k: str, cost: Optional[float]) -> None:
+        if cost is None:
+            self.hook_costs.pop((kind, k), None)
+        else:
+            self.hook_costs[(kind, k)] = cost
+
+    def plan(self,
+             params: dict,
+             order: Union[Iterable[TParamsKey], str] = 'auto',
+             stats: ExecutionStats = None) -> OrderPlan:
+        """Plan the loop order and the hook calls, without calling.
+
+        The cost of a hook call is its declared cost (set_*(cost=...)),
+        else its mean time measured in stats (e.g. of a previous run),
+        else 1, so that the number of calls is minimized.
+
+        Args:
+            params (TParams): Parameters.
+            order (Union[Iterable[TParamsKey], str], optional): Loop order,
+                or 'auto' to minimize the total cost of hooks.
+            stats (ExecutionStats, optional): Statistics with hook times.
+
+        Raises:
+            KeyError: Unknown key of a hook.
+
+        Returns:
+            OrderPlan: Order, expected hook calls (without constraints)
+                and their total cost.
+        """
+        params = cast(TParams, params)
+        keys = cast(List[TParamsKey], list(params.keys()))
+        combs_list = combu.util.standardize(params, order=keys)
+        sizes = {k: len(combs) for k, combs in zip(keys, combs_list)}
+        hooks_list = [
+            self.before,
+            self.before_each,
+            self.after_each,
+            self.after,
+        ]
+        costs: Dict[THook, float] = {}
+        for kind, hooks in zip(HOOK_KINDS, hooks_list):
+            for k in hooks:
+                measured = None if stats is None else stats.hooks.get(
+                    (kind, k))
+                cost = self.hook_costs.get((kind, k))
+                if cost is None and measured is not None:
+                    cost = measured.mean
+                costs[(kind, k)] = 1.0 if cost is None else cost
+        if order == 'auto':
+            order = optimize_order(keys, sizes, costs, self.sequence)
+        else:
+            order = combu.generator.get_order(keys,
+                                              order=cast(Iterable, order))
+        calls = count_hook_calls(order, sizes, list(costs), self.sequence)
+        return OrderPlan(order, calls, costs)
 
     def execute(
         self,
         params: dict,
-        order: Iterable[TParamsKey] = None,
+        order: Union[Iterable[TParamsKey], str] = None,
+        constraints: Iterable[Constraint] = None,
+        sink: TSinks = None,
+        stats: ExecutionStats = None,
+        trace: Tracer = None,
+        profile: 'Profiler' = None,
+        fixtures: TFixtures = None,
     ) -> Iterator[Tuple[Any, Dict[str, Any]]]:
         """Execute the function.
 
         Args:
             params (TParams): Parameters.
-            order (Iterable[TParamsKey], optional): Loop order.
+            order (Union[Iterable[TParamsKey], str], optional): Loop order.
+                'auto' to minimize the cost of hooks, with the hook times
+                measured so far in stats. The plan is kept in last_plan
+                before the first call.
+            constraints (Iterable[Constraint], optional): Constraints.
+                Failed subtrees are skipped, hooks included.
+            sink (TSinks, optional): Sink or sinks written with each result
+                and its combination index. Closed at the end, even on error.
+            stats (ExecutionStats, optional): Statistics updated while
+                executing, hooks included.
+            trace (Tracer, optional): Tracer of calls and hooks.
+            profile (Profiler, optional): Profiler of sampled calls, per
+                value of each key. Not with batch_size.
+            fixtures (TFixtures, optional): Name of extra argument of the
+                function -> Fixture (or its factory), computed at most once
+                per distinct values of its keys. Not with batch_size.
 
         Raises:
             KeyError: Unknown key.
+            ValueError: Wrong batch_size or number of results.
+            ValueError: profile or fixtures with batch_size.
 
         Yields:
             Iterator[Tuple[Any, Dict[str, Any]]]: Result.
@@ -156,55 +296,178 @@ class Combu:
 
         if order is None:
             order = self.order
+        if order == 'auto':
+            self.last_plan = self.plan(params, stats=stats)
+            order = self.last_plan.order
 
         params_keys = cast(List[TParamsKey], params.keys())
         order = combu.generator.get_order(params_keys, order=order)
+        if constraints is not None:
+            constraints = list(constraints)
 
         combs_list = combu.util.standardize(params, order=order)
-        combs = {k: comb for k, comb in zip(order, combs_list)}
-
-        before_idx = {k: -1 for k in order}
-        last_param_idx = {k: len(combs[k]) - 1 for k in order}
+        position = {k: i for i, k in enumerate(order)}
 
-        comb_idx_iter = _create_comb_index(combs)  # type: ignore
+        comb_idx_iter = combu.generator.create_comb_index(
+            combs_list, sequence=self.sequence, constraints=constraints)
+        gray = self.sequence == 'gray'
 
+        bar = None
         if self.progress:
-            from tqdm.auto import tqdm
-            total = combu.util.count(combs)
-            comb_idx_iter = tqdm(comb_idx_iter, total=total)
-
-        for comb_idx in comb_idx_iter:
-            comb = [combs[k][i] for k, i in comb_idx.items()]
-            param = _merge_dict(*comb)
-            param = {
-                k: v for k, v in param.items() if not isinstance(v, Unset)
-            }
-
-            # Before loop
-            for k in self.before.keys():
-                if comb_idx[k] == 0 and before_idx[k] != 0:
-                    self.before[k](**param)
-
-            # Before each loop
-            for k in self.before_each.keys():
-                if comb_idx[k] != before_idx[k]:
-                    self.before_each[k](**param)
-
-            yield self.func(**param), param
-
-            # After each loop
-            for k in reversed(list(self.after_each.keys())):
-                keys = order[order.index(k) + 1:]
-                if all(comb_idx[k] == last_param_idx[k] for k in keys):
-                    self.after_each[k](**param)
-
-            # After loop
-            for k in reversed(list(self.after.keys())):
-                keys = order[order.index(k):]
-                if all(comb_idx[k] == last_param_idx[k] for k in keys):
-                    self.after[k](**param)
-
-            before_idx = comb_idx
+            total = combu.generator.count_comb_index(combs_list,
+                                                     constraints=constraints)
+            bar = Progress(total,
+                           order, [len(c) for c in combs_list],
+                           ordered=not gray)
+
+        # Transitions at this position or outer call hooks.
+        # Blocks of batch_size never span them.
+        each_keys = [*self.before_each, *self.after_each]
+        loop_keys = [*self.before, *self.after]
+        hook_position = max([
+            -1,
+            *[position[k] for k in each_keys],
+            *[position[k] - 1 for k in loop_keys],
+        ])
+        table = None
+        if self.batch_size is not None:
+            if self.batch_size < 1:
+                raise ValueError('batch_size must be at least 1.')
+            if profile is not None:
+                raise ValueError('profile is not supported with batch_size.')
+            if fixtures is not None:
+                raise ValueError('fixtures is not supported with batch_size.')
+            table = combu.generator.create_column_table(combs_list)
+        sampler = None if profile is None else profile.sampler()
+        target = inject(self.func, fixtures)
+
+        # Hook keys in call order.
+        before_keys = list(self.before)
+        before_each_keys = list(self.before_each)
+        after_each_keys = list(self.after_each)[::-1]
+        after_keys = list(self.after)[::-1]
+        has_before = len(before_keys) + len(before_each_keys) > 0
+        has_after = len(after_keys) + len(after_each_keys) > 0
+
+        sinks = as_sinks(sink)
+        if stats is not None:
+            stats.start()
+        try:
+            for s in sinks:
+                s.open(order, combs_list)
+            before_idx = None
+            changed = -1
+            block: List[Tuple[int, ...]] = []
+            comb_idx = next(comb_idx_iter, None)
+            while comb_idx is not None:
+                next_idx = next(comb_idx_iter, None)
+                param = combu.generator.create_param(combs_list, comb_idx)
+
+                if len(block) == 0 and has_before:
+                    # Before loop
+                    changed = _diff_position(before_idx, comb_idx)
+                    for k in before_keys:
+                        if position[k] > changed:
+                            _call_hook(self.before, 'before', k, param, stats,
+                                       trace)
+
+                    # Before each loop
+                    for k in before_each_keys:
+                        if gray and not _differ_at(before_idx, comb_idx,
+                                                   position[k]):
+                            continue
+                        if position[k] >= changed:
+                            _call_hook(self.before_each, 'before_each', k,
+                                       param, stats, trace)
+
+                block.append(comb_idx)
+                if table is not None or has_after:
+                    changed = _diff_position(comb_idx, next_idx)
+                in_block = table is not None and len(block) < cast(
+                    int, self.batch_size)
+                if in_block and changed > hook_position:
+                    before_idx = comb_idx
+                    comb_idx = next_idx
+                    continue
+
+                timed = stats is not None or trace is not None
+                if timed:
+                    start_time = time.time()
+                    wall, cpu = time.perf_counter(), time.process_time()
+                if table is None:
+                    call_param = param
+                    func = target
+                    if sampler is not None and sampler.sampled():
+                        func = sampler.profiled(target)
+                    if self.changes is None:
+                        res = func(**param)
+                    else:
+                        changes = combu.generator.get_changes(
+                            combs_list, before_idx, comb_idx)
+                        res = func(**param, **{self.changes: changes})
+                    results = [(res, param, comb_idx)]
+                    sample = None if sampler is None else sampler.take()
+                    if sample is not None:
+                        cast('Profiler', profile).add(param, sample)
+                else:
+                    columns = combu.generator.create_columns(table, block)
+                    call_param = columns
+                    block_params = [
+                        combu.generator.create_param(combs_list, idx)
+                        for idx in block
+                    ]
+                    split = combu.execution.split_results(
+                        self.func(**columns), block_params)
+                    results = [
+                        (r, p, idx) for (r, p), idx in zip(split, block)
+                    ]
+                if timed:
+                    wall = time.perf_counter() - wall
+                    cpu = time.process_time() - cpu
+                    if stats is not None:
+                        stats.add_call(wall, cpu)
+                    if trace is not None:
+                        trace.span(getattr(self.func, '__name__', 'call'),
+                                   start_time,
+                                   wall,
+                                   args=call_param)
+                block = []
+                for res, res_param, res_idx in results:
+                    for s in sinks:
+                        s.write(res, res_param, res_idx)
+                    if bar is not None:
+                        bar.update(res_idx)
+                    if stats is None:
+                        yield res, res_param
+                        continue
+                    t = time.monotonic()
+                    yield res, res_param
+                    stats.consumer_time += time.monotonic() - t
+
+                # After each loop
+                for k in after_each_keys:
+                    if gray and not _differ_at(comb_idx, next_idx,
+                                               position[k]):
+                        continue
+                    if position[k] >= changed:
+                        _call_hook(self.after_each, 'after_each', k, param,
+                                   stats, trace)
+
+                # After loop
+                for k in after_keys:
+                    if position[k] > changed:
+                        _call_hook(self.after, 'after', k, param, stats, trace)
+
+                before_idx = comb_idx
+                comb_idx = next_idx
+        finally:
+            if bar is not None:
+                bar.close()
+            try:
+                close_sinks(sinks)
+            finally:
+                if stats is not None:
+                    stats.stop()
 
 
 class CombuParallel:
@@ -216,6 +479,12 @@ class CombuParallel:
         order: Iterable = None,
         n_jobs: int = -1,
         progress: bool = False,
+        batch_size: int = None,
+        errors: str = 'raise',
+        retries: int = 3,
+        affinity: Iterable[str] = None,
+        timeout: float = None,
+        speculative: float = None,
     ) -> None:
         """Initialize object.
 
@@ -225,22 +494,62 @@ class CombuParallel:
             n_jobs (int, optional): Number of processes.
                                     Default to -1 (all processes).
             progress (bool, optional): Show progress bar or not.
+            batch_size (int, optional): Call the function with blocks of
+                consecutive combinations (a list of values per key).
+            errors (str, optional): Policy on a failed call.
+                'raise', 'collect' or 'retry'.
+            retries (int, optional): Number of retries with 'retry'.
+            affinity (Iterable[str], optional): Keys whose combinations
+                with the same values run on the same worker if possible.
+            timeout (float, optional): Seconds a call may take. The worker
+                of a longer call is replaced and the call fails with
+                TimeoutError.
+            speculative (float, optional): Once every combination is sent,
+                calls running longer than this multiple of the median call
+                time are also sent to idle workers.
         """
         self.func = func
         self.order = [] if order is None else order
         self.n_jobs = n_jobs
         self.progress = progress
+        self.batch_size = batch_size
+        self.errors = errors
+        self.retries = retries
+        self.affinity = affinity
+        self.timeout = timeout
+        self.speculative = speculative
 
     def execute(
         self,
         params: dict,
         order: Iterable[TParamsKey] = None,
+        constraints: Iterable[Constraint] = None,
+        sink: TSinks = None,
+        stats: ExecutionStats = None,
+        trace: Tracer = None,
+        profile: 'Profiler' = None,
+        cost: CostModel = None,
+        fixtures: TFixtures = None,
     ) -> Iterator[Tuple[Any, Dict[str, Any]]]:
         """Execute the function.
 
         Args:
             params (TParams): Parameters.
             order (Iterable[TParamsKey], optional): Loop order.
+            constraints (Iterable[Constraint], optional): Constraints.
+            sink (TSinks, optional): Sink or sinks written with each result.
+            stats (ExecutionStats, optional): Statistics updated while
+                executing.
+            trace (Tracer, optional): Tracer of calls, dispatch and
+                collect.
+            profile (Profiler, optional): Profiler of sampled calls, per
+                value of each key, across worker processes.
+            cost (CostModel, optional): Cost model. The costliest
+                combinations (within the window of the model) are
+                dispatched first.
+            fixtures (TFixtures, optional): Name of extra argument of the
+                function -> Fixture (or its factory), computed at most once
+                per distinct values of its keys in each worker.
 
         Raises:
             KeyError: Unknown key.
@@ -254,5 +563,18 @@ class CombuParallel:
                                         params,
                                         order=order,
                                         n_jobs=self.n_jobs,
-                                        progress=self.progress):
+                                        progress=self.progress,
+                                        constraints=constraints,
+                                        batch_size=self.batch_size,
+                                        sink=sink,
+                                        errors=self.errors,
+                                        retries=self.retries,
+                                        stats=stats,
+                                        trace=trace,
+                                        profile=profile,
+                                        cost=cost,
+                                        affinity=self.affinity,
+                                        fixtures=fixtures,
+                                        timeout=self.timeout,
+                                        speculative=self.speculative):
             yield res, param
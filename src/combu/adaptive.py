@@ -0,0 +1,186 @@
+"""Adaptive.
+
+Coarse-to-fine grid refinement around the best results.
+"""
+
+import itertools
+from typing import (Any, Callable, cast, Dict, Hashable, Iterable, Iterator,
+                    List, Optional, Set, Tuple)
+
+from combu.definition import Range, TParams
+from combu.execution import execute_values
+from combu.generator import create_values
+from combu.parallel import ParallelExecutor
+from combu.scheduler import _executor
+
+
+def _point_key(param: Dict[str, Any], ranges: Dict[str, Range]) -> Hashable:
+    """Identify a point. Range values are rounded against float error."""
+    return tuple(
+        (k, round(ranges[k].to_scale(v), 9) if k in ranges else repr(v))
+        for k, v in sorted(param.items()))
+
+
+def _finer(r: Range, width: float) -> float:
+    """Get the step of the finer grid.
+
+    'num' values span at most one cell width on both sides and the step is
+    at most half of the width.
+    """
+    return min(width / 2, 2 * width / (r.num - 1))
+
+
+def _neighborhood(param: Dict[str, Any], ranges: Dict[str, Range],
+                  width: Dict[str, float]) -> List[Dict[str, Any]]:
+    """Create the finer grid around a point."""
+    axes = []
+    for k, r in ranges.items():
+        center = r.to_scale(param[k])
+        step = _finer(r, width[k])
+        low, high = r.to_scale(r.low), r.to_scale(r.high)
+        axis = []
+        for i in range(r.num):
+            v = center + (i - (r.num - 1) / 2) * step
+            if low - 1e-12 <= v <= high + 1e-12:
+                axis.append(r.from_scale(min(max(v, low), high)))
+        axes.append(axis)
+
+    keys = list(ranges.keys())
+    return [{
+        **param,
+        **dict(zip(keys, vals)),
+    } for vals in itertools.product(*axes)]
+
+
+def _rounds(
+    func: Callable,
+    ranges: Dict[str, Range],
+    candidates: List[Tuple[Dict[str, Any], Dict[str, float]]],
+    score: Callable[[Any], float],
+    depth: int,
+    top_k: int,
+    budget: Optional[int],
+    resolution: Optional[float],
+    parallel: Optional[ParallelExecutor],
+    progress: bool,
+) -> Iterator[Tuple[Any, Dict[str, Any]]]:
+    """Evaluate the candidates and refine around the best, round by round."""
+    # Point key -> [score, param, cell width on scale]
+    cells: Dict[Hashable, list] = {}
+    refined: Set[Hashable] = set()
+    n_evaluated = 0
+
+    for round_ in range(depth + 1):
+        values: List[Dict[str, Any]] = []
+        keys = {}
+        for value, w in candidates:
+            key = _point_key(value, ranges)
+            if key in cells:
+                # Evaluated on a coarser grid. Its cell shrinks.
+                cell_width = cells[key][2]
+                cells[key][2] = {k: min(w[k], cell_width[k]) for k in w}
+                continue
+            if budget is not None and n_evaluated + len(values) >= budget:
+                break
+            cells[key] = [None, value, w]
+            values.append(value)
+            keys[id(value)] = key
+
+        if parallel is None:
+            results = execute_values(func,
+                                     values,
+                                     progress=progress,
+                                     total=len(values))
+        else:
+            results = parallel.execute(values, total=len(values))
+        for res, param in results:
+            cells[keys[id(param)]][0] = score(res)
+            yield res, param
+        n_evaluated += len(values)
+
+        if round_ == depth:
+            break
+        if budget is not None and n_evaluated >= budget:
+            break
+
+        candidates = []
+        n_refined = 0
+        ranking = sorted(cells.items(), key=lambda item: -item[1][0])
+        for key, (_, param, w) in ranking:
+            if n_refined == top_k:
+                break
+            refined_key = (key, tuple(sorted(w.items())))
+            if refined_key in refined:
+                continue
+            refined.add(refined_key)
+            n_refined += 1
+            finer = {k: _finer(r, w[k]) for k, r in ranges.items()}
+            span = {
+                k: r.to_scale(r.high) - r.to_scale(r.low)
+                for k, r in ranges.items()
+            }
+            if resolution is not None and all(
+                    finer[k] < resolution * span[k] for k in ranges):
+                continue
+            candidates += [(v, finer) for v in _neighborhood(param, ranges, w)]
+
+        if len(candidates) == 0:
+            break
+
+
+def refine(
+    func: Callable,
+    params: dict,
+    score: Callable[[Any], float],
+    depth: int = 3,
+    top_k: int = 1,
+    budget: int = None,
+    resolution: float = None,
+    order: Iterable = None,
+    n_jobs: int = 1,
+    progress: bool = False,
+) -> Iterator[Tuple[Any, Dict[str, Any]]]:
+    """Execute the function on a coarse grid and refine around the best.
+
+    Range parameters are evaluated on a coarse grid first. Then the
+    neighborhoods of the 'top_k' best points (by score) are evaluated on a
+    finer grid, round after round. Points already evaluated are skipped.
+
+    Args:
+        func (Callable): Target function.
+        params (TParams): Parameters. Refined keys are given as Range.
+        score (Callable[[Any], float]): Score from result.
+            Higher is better.
+        depth (int, optional): Number of refinement rounds.
+        top_k (int, optional): Number of points refined on each round.
+        budget (int, optional): Maximum number of evaluations.
+        resolution (float, optional): Stop refining once the step is smaller
+            than this fraction of each range span.
+        order (Iterable[TParamsKey], optional): Loop order.
+        n_jobs (int, optional): Number of processes. Default to 1.
+        progress (bool, optional): Show progress bar or not.
+
+    Raises:
+        ValueError: No Range parameter.
+
+    Yields:
+        Iterator[Tuple[Any, Dict[str, Any]]]: Result and parameter.
+    """
+    params = cast(TParams, params)
+    ranges: Dict[str, Range] = {
+        cast(str, k): cast(Range, v)
+        for k, v in params.items()
+        if isinstance(v, Range)
+    }
+    if len(ranges) == 0:
+        raise ValueError('No Range on params.')
+
+    width = {k: r.step for k, r in ranges.items()}
+    candidates = [(v, width) for v in create_values(params, order=order)]
+    parallel = _executor(func, n_jobs, progress)
+    try:
+        yield from _rounds(func, ranges, candidates, score, depth, top_k,
+                           budget, resolution, parallel, progress)
+    finally:
+        if parallel is not None:
+            parallel.close()
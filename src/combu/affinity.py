@@ -0,0 +1,139 @@
+"""Affinity.
+
+Routing of parameters sharing the values of some keys to the same worker,
+so that state cached in the worker (e.g. a loaded dataset) is reused.
+"""
+
+import collections
+from typing import (Any, Deque, Dict, Hashable, Iterable, Iterator, List,
+                    Optional, Sequence, Set, Tuple)
+
+from combu.definition import Constraint
+import combu.generator
+from combu.util import group_value
+
+# Number of parameters taken ahead of dispatch to find a worker's group.
+WINDOW = 1024
+
+
+def create_interleaved_index(
+    combs_list: List[List[Dict[str, Any]]],
+    keys: Iterable[str],
+    constraints: Iterable[Constraint] = None,
+) -> Iterator[Tuple[int, ...]]:
+    """Create combination index in product order, affinity axes innermost.
+
+    Consecutive combinations then alternate between groups, so that every
+    group is soon in the window of the router.
+
+    Args:
+        combs_list (List[List[Dict[str, Any]]]): Standardized parameters.
+        keys (Iterable[str]): Affinity keys.
+        constraints (Iterable[Constraint], optional): Constraints.
+
+    Raises:
+        KeyError: Unknown key.
+
+    Returns:
+        Iterator[Tuple[int, ...]]: Combination index (original axes).
+    """
+    axes: List[int] = []
+    for k in keys:
+        found = [
+            d for d, combs in enumerate(combs_list)
+            if any(k in c for c in combs)
+        ]
+        if len(found) == 0:
+            raise KeyError(k)
+        axes += [d for d in found if d not in axes]
+    perm = [d for d in range(len(combs_list)) if d not in axes] + axes
+    # Position of each original axis in the permuted index.
+    inverse = [perm.index(d) for d in range(len(combs_list))]
+    index_iter = combu.generator.create_comb_index(
+        [combs_list[d] for d in perm], constraints=constraints)
+    return (tuple(index[j] for j in inverse) for index in index_iter)
+
+
+class _Router:
+    """Parameters taken ahead of dispatch, queued per group.
+
+    An idle worker takes from its group (reading ahead up to the window),
+    else claims a group no other worker has, else steals from the longest
+    queue and joins its group.
+    """
+
+    def __init__(self,
+                 keys: Sequence[str],
+                 params: Iterator[Dict[str, Any]],
+                 window: int = WINDOW) -> None:
+        self.keys = list(keys)
+        self.window = window
+        self._params = params
+        self._exhausted = False
+        self._queues: Dict[Hashable, Deque[Dict[str, Any]]] = {}
+        self._size = 0
+        # Number of parameters taken from the group of the worker, and
+        # stolen from another group.
+        self.hits = 0
+        self.steals = 0
+
+    def group(self, param: Dict[str, Any]) -> Hashable:
+        """Get the group of a parameter."""
+        return tuple(group_value(param.get(k)) for k in self.keys)
+
+    def _take(self, w: Any, group: Hashable) -> Dict[str, Any]:
+        if w.group == group:
+            self.hits += 1
+        w.group = group
+        queue = self._queues[group]
+        param = queue.popleft()
+        if len(queue) == 0:
+            del self._queues[group]
+        self._size -= 1
+        return param
+
+    def pop(self, w: Any, workers: Iterable[Any]) -> Optional[Dict[str, Any]]:
+        """Get a parameter for an idle worker.
+
+        Args:
+            w (Any): Worker, with its 'group' (None at first).
+            workers (Iterable[Any]): All workers.
+
+        Returns:
+            Optional[Dict[str, Any]]: Parameter. None if none is left.
+        """
+        if w.group in self._queues:
+            return self._take(w, w.group)
+        owned: Set[Hashable] = {o.group for o in workers if o is not w}
+        if w.group is None:
+            claimed = self._claim(w, owned)
+            if claimed is not None:
+                return claimed
+        while not self._exhausted and self._size < self.window:
+            param = next(self._params, None)
+            if param is None:
+                self._exhausted = True
+                break
+            group = self.group(param)
+            queue = self._queues.get(group)
+            if queue is None:
+                queue = self._queues[group] = collections.deque()
+            queue.append(param)
+            self._size += 1
+            if group == w.group or (w.group is None and group not in owned):
+                return self._take(w, group)
+        claimed = self._claim(w, owned)
+        if claimed is not None:
+            return claimed
+        if self._size == 0:
+            return None
+        self.steals += 1
+        group = max(self._queues, key=lambda g: len(self._queues[g]))
+        return self._take(w, group)
+
+    def _claim(self, w: Any, owned: Set[Hashable]) -> Optional[Dict[str, Any]]:
+        """Take from the first group taken ahead of no other worker."""
+        for group in self._queues:
+            if group not in owned:
+                return self._take(w, group)
+        return None
@@ -0,0 +1,121 @@
+"""Block.
+
+Vectorized combination index blocks. Requires numpy.
+"""
+
+from typing import Any, cast, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+from combu.definition import TParams
+import combu.generator
+import combu.util
+
+
+def create_index_blocks(sizes: Sequence[int],
+                        block_size: int,
+                        start: int = 0,
+                        stop: int = None) -> Iterator[Any]:
+    """Create blocks of combination indexes in nested loop order.
+
+    Indexes are computed from the position with mixed-radix arithmetic,
+    as runs of repeated values per axis.
+
+    Args:
+        sizes (Sequence[int]): Number of values on each axis.
+        block_size (int): Number of combinations in a block.
+        start (int, optional): Position of the first combination.
+        stop (int, optional): Position after the last combination.
+            Default to the number of combinations.
+
+    Raises:
+        ValueError: block_size less than 1.
+
+    Yields:
+        Iterator[np.ndarray]: Indexes. Shape is (block, axis).
+    """
+    import numpy as np
+
+    if block_size < 1:
+        raise ValueError('block_size must be at least 1.')
+    total = 1
+    for n in sizes:
+        total *= n
+    stop = total if stop is None else min(stop, total)
+
+    strides: List[int] = []
+    stride = 1
+    for n in reversed(sizes):
+        strides.insert(0, stride)
+        stride *= n
+
+    for s in range(start, stop, block_size):
+        e = min(s + block_size, stop)
+        # Column-major, so that each axis is written contiguously.
+        indexes = np.empty((e - s, len(sizes)), dtype=np.int64, order='F')
+        for axis, (n, stride) in enumerate(zip(sizes, strides)):
+            # Run-length encoding: the index changes every 'stride'.
+            first, last = s // stride, (e - 1) // stride
+            vals = np.arange(first, last + 1, dtype=np.int64)
+            vals %= n
+            if stride == 1:
+                indexes[:, axis] = vals
+                continue
+            repeats = np.full(len(vals), stride, dtype=np.int64)
+            repeats[0] = min(stride - s % stride, e - s)
+            if len(vals) > 1:
+                repeats[-1] = (e - 1) % stride + 1
+            indexes[:, axis] = np.repeat(vals, repeats)
+        yield indexes
+
+
+def create_blocks(
+    params: dict,
+    block_size: int = 65536,
+    order: Iterable = None,
+    values: Iterable[str] = None,
+    start: int = 0,
+    stop: int = None,
+) -> Iterator[Tuple[Any, Dict[str, Any]]]:
+    """Create blocks of combinations without building parameters.
+
+    Args:
+        params (TParams): Parameters.
+        block_size (int, optional): Number of combinations in a block.
+        order (Iterable[TParamsKey], optional): Loop order.
+        values (Iterable[str], optional): Keys of numeric values to gather.
+        start (int, optional): Position of the first combination.
+        stop (int, optional): Position after the last combination.
+
+    Raises:
+        KeyError: Unknown key on 'values'.
+        TypeError: Not numeric values.
+        ValueError: block_size less than 1.
+
+    Yields:
+        Iterator[Tuple[np.ndarray, Dict[str, np.ndarray]]]:
+            Indexes (shape is (block, axis) in loop order) and values of each
+            key.
+    """
+    import numpy as np
+
+    params = cast(TParams, params)
+    combs_list = combu.util.standardize(params, order=order)
+    sizes = [len(combs) for combs in combs_list]
+
+    table = combu.generator.create_column_table(combs_list)
+    arrays = {}
+    for k in [] if values is None else values:
+        axis = [i for i, t in enumerate(table) if k in t]
+        if len(axis) == 0:
+            raise KeyError(k)
+        array = np.asarray(table[axis[-1]][k])
+        if array.dtype.kind not in 'biuf':
+            raise TypeError('Not numeric values: {}'.format(k))
+        arrays[k] = (axis[-1], array)
+
+    for indexes in create_index_blocks(sizes,
+                                       block_size,
+                                       start=start,
+                                       stop=stop):
+        yield indexes, {
+            k: array[indexes[:, axis]] for k, (axis, array) in arrays.items()
+        }
@@ -0,0 +1,162 @@
+"""Cost.
+
+Expected seconds of calls, to dispatch the costliest parameters first.
+"""
+
+import heapq
+import os
+from typing import (Any, Callable, Dict, Hashable, Iterator, List, Optional,
+                    Tuple)
+
+from combu.reducers import Mean
+from combu.util import group_value
+
+
+class CostModel:
+    """Expected seconds of a call per parameter.
+
+    Without estimator, the model is learned from call timings: the mean of
+    all calls, times the relative mean of the calls with each value of each
+    key (keys are assumed independent). Unobserved values have factor 1.
+
+    With 'path', timings of a previous run are loaded on initialization and
+    saved by save().
+
+    Parameters are ordered within a lookahead window only: the costliest of
+    the next 'window' parameters is dispatched first, and a costly parameter
+    further in the grid waits until it enters the window. Set the window to
+    the number of combinations (memory grows with it) for a full ranking.
+    """
+
+    def __init__(self,
+                 estimator: Callable[..., float] = None,
+                 path: str = None,
+                 window: int = 1024) -> None:
+        """Initialize object.
+
+        Args:
+            estimator (Callable[..., float], optional): Function of the
+                parameter (as keyword arguments) returning the expected cost
+                (any unit). Timings are still recorded.
+            path (str, optional): Path of pickle file of timings.
+            window (int, optional): Number of parameters taken ahead of
+                dispatch and ordered by cost. Parameters beyond it are not
+                ranked yet.
+
+        Raises:
+            ValueError: window under 1.
+        """
+        if window < 1:
+            raise ValueError('window must be at least 1.')
+        self.estimator = estimator
+        self.path = path
+        self.window = window
+        self.calls = Mean()
+        self.values: Dict[Tuple[str, Hashable], Mean] = {}
+        if path is not None and os.path.exists(path):
+            import pickle
+            with open(path, 'rb') as f:
+                data = pickle.load(f)
+            self.calls = data['calls']
+            self.values = data['values']
+
+    @property
+    def count(self) -> int:
+        """Get the number of timed calls."""
+        return self.calls.count
+
+    def add(self, param: Dict[str, Any], seconds: float) -> None:
+        """Add the timing of a call.
+
+        Args:
+            param (Dict[str, Any]): Parameter.
+            seconds (float): Wall time.
+        """
+        self.calls.update(seconds)
+        for k, v in param.items():
+            group = (k, group_value(v))
+            mean = self.values.get(group)
+            if mean is None:
+                mean = self.values[group] = Mean()
+            mean.update(seconds)
+
+    def estimate(self, param: Dict[str, Any]) -> float:
+        """Get the expected cost of a call.
+
+        Args:
+            param (Dict[str, Any]): Parameter.
+
+        Returns:
+            float: Cost. 0 before any timing (learned model).
+        """
+        if self.estimator is not None:
+            return float(self.estimator(**param))
+        mean = self.calls.mean
+        if mean <= 0:
+            return 0.0
+        cost = mean
+        for k, v in param.items():
+            value_mean = self.values.get((k, group_value(v)))
+            if value_mean is not None:
+                cost *= value_mean.mean / mean
+        return cost
+
+    def save(self, path: str = None) -> None:
+        """Save the timings.
+
+        Args:
+            path (str, optional): Path of pickle file. Default to 'path'.
+
+        Raises:
+            ValueError: No path.
+        """
+        path = self.path if path is None else path
+        if path is None:
+            raise ValueError('No path to save the timings.')
+        import pickle
+        with open(path, 'wb') as f:
+            pickle.dump({'calls': self.calls, 'values': self.values}, f)
+
+
+class _Pending:
+    """Parameters taken ahead of dispatch, costliest first.
+
+    Ties keep the order of the parameters. A learned model re-estimates
+    the pending parameters each time its timings grow by a quarter.
+    """
+
+    def __init__(self, model: CostModel, params: Iterator[dict]) -> None:
+        self.model = model
+        self._params = params
+        self._exhausted = False
+        # Heap of (-cost, sequence number, parameter).
+        self._heap: List[Tuple[float, int, Dict[str, Any]]] = []
+        self._next_id = 0
+        self._rebuild_count = self._next_rebuild()
+
+    def _next_rebuild(self) -> int:
+        return self.model.count + max(1, self.model.count // 4)
+
+    def _fill(self) -> None:
+        while not self._exhausted and len(self._heap) < self.model.window:
+            param = next(self._params, None)
+            if param is None:
+                self._exhausted = True
+                break
+            heapq.heappush(self._heap,
+                           (-self.model.estimate(param), self._next_id, param))
+            self._next_id += 1
+
+    def pop(self) -> Optional[Dict[str, Any]]:
+        """Get the costliest parameter. None if none is left."""
+        learned = self.model.estimator is None
+        if learned and self.model.count >= self._rebuild_count:
+            self._heap = [
+                (-self.model.estimate(p), i, p) for _, i, p in self._heap
+            ]
+            heapq.heapify(self._heap)
+            self._rebuild_count = self._next_rebuild()
+        self._fill()
+        if len(self._heap) == 0:
+            return None
+        return heapq.heappop(self._heap)[2]
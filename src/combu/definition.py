@@ -1,6 +1,7 @@
 """Definition."""
 
-from typing import Any, Dict, Iterable, Tuple, Union
+import math
+from typing import Any, Callable, Dict, Iterable, Iterator, Tuple, Union
 
 
 class Unset:
@@ -17,6 +18,143 @@ class Pack:
         self.keys = [k for k in keys]  # noqa: C416
 
 
+class Range:
+    """Numeric range parameter.
+
+    Iterates 'num' evenly spaced values from 'low' to 'high', so it can be
+    used as parameter values. Adaptive execution refines it.
+    """
+
+    def __init__(self,
+                 low: float,
+                 high: float,
+                 num: int = 5,
+                 log: bool = False) -> None:
+        """Initialize object.
+
+        Args:
+            low (float): Lower bound.
+            high (float): Upper bound.
+            num (int, optional): Number of values.
+            log (bool, optional): Evenly spaced on log scale or not.
+
+        Raises:
+            ValueError: Wrong bounds or number of values.
+        """
+        if not low < high:
+            raise ValueError('low must be less than high.')
+        if num < 2:
+            raise ValueError('num must be at least 2.')
+        if log and low <= 0:
+            raise ValueError('low must be positive on log scale.')
+        self.low = low
+        self.high = high
+        self.num = num
+        self.log = log
+
+    def to_scale(self, v: float) -> float:
+        """Convert a value to the (log) scale.
+
+        Args:
+            v (float): Value.
+
+        Returns:
+            float: Value on the scale.
+        """
+        return math.log(v) if self.log else v
+
+    def from_scale(self, v: float) -> float:
+        """Convert a value on the (log) scale back.
+
+        Args:
+            v (float): Value on the scale.
+
+        Returns:
+            float: Value.
+        """
+        return math.exp(v) if self.log else v
+
+    @property
+    def step(self) -> float:
+        """Step between values on the scale."""
+        low, high = self.to_scale(self.low), self.to_scale(self.high)
+        return (high - low) / (self.num - 1)
+
+    def __iter__(self) -> Iterator[float]:
+        """Iterate values."""
+        low = self.to_scale(self.low)
+        for i in range(self.num - 1):
+            yield self.from_scale(low + self.step * i)
+        yield self.high
+
+    def __len__(self) -> int:
+        """Get number of values."""
+        return self.num
+
+
+class Constraint:
+    """Constraint over parameters.
+
+    Evaluated as soon as all of its keys are bound in the loop order.
+    A combination is skipped when the function returns False.
+    """
+
+    def __init__(self, func: Callable[..., bool], *keys: str) -> None:
+        """Initialize object.
+
+        Args:
+            func (Callable[..., bool]): Predicate.
+                Called with the keys as keyword arguments.
+            keys (str): Keys read by the predicate.
+        """
+        self.func = func
+        self.keys = [k for k in keys]  # noqa: C416
+
+    def __call__(self, param: Dict[str, Any]) -> bool:
+        """Evaluate the constraint.
+
+        Args:
+            param (Dict[str, Any]): (Partial) parameter. Unset values are
+                not passed to the predicate.
+
+        Returns:
+            bool: Valid or not.
+        """
+        kwargs = {
+            k: param[k]
+            for k in self.keys
+            if k in param and not isinstance(param[k], Unset)
+        }
+        return bool(self.func(**kwargs))
+
+
 TParamsKey = Union[str, Tuple[str, ...]]
 TParamsValue = Union[Iterable[Any], Iterable[Tuple[Any, ...]], Pack]
 TParams = Dict[TParamsKey, Iterable[TParamsValue]]
+
+
+class Failure:
+    """Failed call.
+
+    Yielded instead of the result with errors='collect' or 'retry'.
+    """
+
+    def __init__(self,
+                 error: BaseException,
+                 attempts: int = 1,
+                 traceback: str = '') -> None:
+        """Initialize object.
+
+        Args:
+            error (BaseException): Exception of the last attempt.
+            attempts (int, optional): Number of attempts.
+            traceback (str, optional): Formatted traceback of the last
+                attempt.
+        """
+        self.error = error
+        self.attempts = attempts
+        self.traceback = traceback
+
+    def __repr__(self) -> str:
+        """Get representation."""
+        return 'Failure({!r}, attempts={})'.format(self.error, self.attempts)
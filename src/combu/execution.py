@@ -1,12 +1,27 @@
 """Execute combination parameter."""
 
-from typing import Any, Callable, cast, Dict, Iterable, Iterator, Tuple
+import functools
+import time
+import traceback
+from typing import (Any, Callable, cast, Dict, Iterable, Iterator, List,
+                    Optional, Sequence, Tuple, TYPE_CHECKING)
 
-from combu.definition import TParams
-from combu.generator import create_values
-from combu.parallel import ParallelExecutor
+from combu.affinity import create_interleaved_index
+from combu.cost import CostModel
+from combu.definition import Constraint, Failure, TParams
+from combu.fixtures import inject, TFixtures
+import combu.generator
+from combu.generator import create_batches, create_comb_index, create_param
+from combu.parallel import BACKOFF, ERRORS, ParallelExecutor, retry_delay
+from combu.progress import Progress
+from combu.sinks import as_sinks, close_sinks, TSinks
+from combu.stats import ExecutionStats
+from combu.tracing import Tracer
 import combu.util
 
+if TYPE_CHECKING:
+    from combu.profiling import Profiler
+
 
 def execute(
     func: Callable,
@@ -14,6 +29,21 @@ def execute(
     order: Iterable = None,
     n_jobs: int = 1,
     progress: bool = False,
+    sequence: str = 'product',
+    constraints: Iterable[Constraint] = None,
+    batch_size: int = None,
+    sink: TSinks = None,
+    errors: str = 'raise',
+    retries: int = 3,
+    stats: ExecutionStats = None,
+    trace: Tracer = None,
+    profile: 'Profiler' = None,
+    cost: CostModel = None,
+    affinity: Iterable[str] = None,
+    fixtures: TFixtures = None,
+    changes: str = None,
+    timeout: float = None,
+    speculative: float = None,
 ) -> Iterator[Tuple[Any, Dict[str, Any]]]:
     """Execute the function with parameter combination.
 
@@ -23,9 +53,63 @@ def execute(
         order (Iterable[TParamsKey], optional): Loop order.
         n_jobs (int, optional): Number of processes. Default to 1.
         progress (bool, optional): Show progress bar or not.
+        sequence (str, optional): Enumeration order.
+            'product', 'gray', 'halton', 'sobol' or 'lhs'.
+        constraints (Iterable[Constraint], optional): Constraints.
+            Failed combinations are skipped (not executed).
+        batch_size (int, optional): Call the function with blocks of
+            consecutive combinations. The function receives a list of values
+            per key (Unset values are kept as Unset) and returns a sequence of
+            results, one per combination.
+        sink (TSinks, optional): Sink or sinks written with each result
+            and its combination index. Closed at the end, even on error.
+            Failures are not written.
+        errors (str, optional): Policy on a failed call. 'raise' (default)
+            stops the execution, 'collect' yields Failure instead of the
+            result and 'retry' retries with exponential backoff before
+            yielding Failure. With batch_size, a failed call fails every
+            combination of its block.
+        retries (int, optional): Number of retries with errors='retry'.
+        stats (ExecutionStats, optional): Statistics updated while
+            executing.
+        trace (Tracer, optional): Tracer of calls (with their parameter
+            and process), and dispatch and collect of workers.
+        profile (Profiler, optional): Profiler of sampled calls, per value
+            of each key. Not with batch_size.
+        cost (CostModel, optional): Cost model. With n_jobs > 1, the
+            costliest combinations (within the window of the model) are
+            dispatched first, so results come out of order. Timings are
+            added to it. Not with batch_size.
+        affinity (Iterable[str], optional): Keys whose values group
+            combinations. With n_jobs > 1, a worker keeps running the
+            combinations of its group (e.g. to reuse a dataset cached in
+            the worker) and steals from other groups when it runs dry.
+            On 'product', these keys vary fastest in the dispatch order.
+            Not with batch_size or cost.
+        fixtures (TFixtures, optional): Name of extra argument of func ->
+            Fixture (or its factory). The value is computed from some keys
+            at most once per distinct values in each process, and kept in
+            a bounded cache. Not with batch_size.
+        changes (str, optional): Name of extra argument of func receiving
+            the keys changed from the previous call (every key on the first
+            call), e.g. with sequence='gray'. Only with n_jobs=1, not with
+            batch_size.
+        timeout (float, optional): Seconds a call may take with n_jobs > 1.
+            The worker of a longer call is replaced and the call fails with
+            TimeoutError (handled by 'errors').
+        speculative (float, optional): With n_jobs > 1, once every
+            combination is sent, calls running longer than this multiple of
+            the median call time are also sent to idle workers. The first
+            result is used.
 
     Raises:
-        KeyError: Used unknown key on 'order'.
+        KeyError: Used unknown key on 'order' or a constraint.
+        ValueError: Unknown sequence or errors.
+        ValueError: Wrong batch_size or number of results.
+        ValueError: profile, cost, affinity, fixtures or changes with
+            batch_size.
+        ValueError: changes with n_jobs other than 1.
+        ValueError: Both cost and affinity.
         TypeError: Missing argument.
         TypeError: Unexpected argument.
 
@@ -33,21 +117,353 @@ def execute(
         Iterator[Tuple[Any, Dict[str, Any]]]: Result and parameter.
     """
     params = cast(TParams, params)
+    if profile is not None and batch_size is not None:
+        raise ValueError('profile is not supported with batch_size.')
+    if cost is not None and batch_size is not None:
+        raise ValueError('cost is not supported with batch_size.')
+    if affinity is not None and batch_size is not None:
+        raise ValueError('affinity is not supported with batch_size.')
+    if fixtures is not None and batch_size is not None:
+        raise ValueError('fixtures is not supported with batch_size.')
+    if changes is not None and batch_size is not None:
+        raise ValueError('changes is not supported with batch_size.')
+    if changes is not None and n_jobs != 1:
+        raise ValueError('changes is only supported with n_jobs=1.')
+
+    if constraints is not None:
+        constraints = list(constraints)
+    if affinity is not None:
+        affinity = list(affinity)
+
+    keys = combu.generator.get_order(params.keys(), order=order)
+    sinks = as_sinks(sink)
+    interleaved = affinity is not None and n_jobs != 1
+    interleaved = interleaved and sequence == 'product'
+    combs_list: List[List[Dict[str, Any]]] = []
+    bar = None
+    results: Iterator[Tuple[Any, Dict[str, Any], Any]]
+    indexed = len(sinks) > 0 or progress or batch_size is not None
+    indexed = indexed or changes is not None
+    if not indexed and not interleaved:
+        # No consumer of combination indexes.
+        values = combu.generator.create_values(params,
+                                               order=keys,
+                                               sequence=sequence,
+                                               constraints=constraints)
+        results = ((res, param, None)
+                   for res, param in execute_values(func,
+                                                    values,
+                                                    n_jobs=n_jobs,
+                                                    errors=errors,
+                                                    retries=retries,
+                                                    stats=stats,
+                                                    trace=trace,
+                                                    profile=profile,
+                                                    cost=cost,
+                                                    affinity=affinity,
+                                                    fixtures=fixtures,
+                                                    timeout=timeout,
+                                                    speculative=speculative))
+    else:
+        combs_list = combu.util.standardize(params, order=keys)
+        if progress:
+            total = combu.util.count(params,
+                                     order=order,
+                                     constraints=constraints)
+            # Results complete in product order unless reordered.
+            ordered = cost is None and affinity is None
+            bar = Progress(total,
+                           keys, [len(combs) for combs in combs_list],
+                           ordered=ordered and sequence == 'product')
+        if interleaved and affinity is not None:
+            index_iter = create_interleaved_index(combs_list,
+                                                  affinity,
+                                                  constraints=constraints)
+        else:
+            index_iter = create_comb_index(combs_list,
+                                           sequence=sequence,
+                                           constraints=constraints)
+        if changes is not None:
+            index_iter, func = _pass_changes(func, changes, combs_list,
+                                             index_iter)
+        results = _execute_index(func, combs_list, index_iter, n_jobs, bar,
+                                 batch_size, errors, retries, stats, trace,
+                                 profile, cost, affinity, fixtures, timeout,
+                                 speculative)
+
+    if stats is not None:
+        stats.start()
+    try:
+        for s in sinks:
+            s.open(keys, combs_list)
+        for res, param, index in results:
+            if not isinstance(res, Failure):
+                for s in sinks:
+                    s.write(res, param, index)
+            if stats is None:
+                yield res, param
+                continue
+            t = time.monotonic()
+            yield res, param
+            stats.consumer_time += time.monotonic() - t
+    finally:
+        if bar is not None:
+            bar.close()
+        try:
+            close_sinks(sinks)
+        finally:
+            if stats is not None:
+                stats.stop()
+
+
+def _pass_changes(
+    func: Callable,
+    name: str,
+    combs_list: List[List[Dict[str, Any]]],
+    index_iter: Iterable[Tuple[int, ...]],
+) -> Tuple[Iterator[Tuple[int, ...]], Callable]:
+    """Get the index iterator and the target receiving changed keys.
+
+    Serial only: the target gets the keys of the last index taken.
+    """
+    changed: List[str] = []
+
+    def _index_iter() -> Iterator[Tuple[int, ...]]:
+        prev = None
+        for index in index_iter:
+            changed[:] = combu.generator.get_changes(combs_list, prev, index)
+            prev = index
+            yield index
+
+    @functools.wraps(func)
+    def target(**param: Any) -> Any:
+        return func(**param, **{name: list(changed)})
+
+    return _index_iter(), target
+
+
+def _execute_index(
+    func: Callable,
+    combs_list: List[List[Dict[str, Any]]],
+    index_iter: Iterable[Tuple[int, ...]],
+    n_jobs: int,
+    progress: Optional[Progress],
+    batch_size: Optional[int],
+    errors: str = 'raise',
+    retries: int = 3,
+    stats: ExecutionStats = None,
+    trace: Tracer = None,
+    profile: 'Profiler' = None,
+    cost: CostModel = None,
+    affinity: Iterable[str] = None,
+    fixtures: TFixtures = None,
+    timeout: float = None,
+    speculative: float = None,
+) -> Iterator[Tuple[Any, Dict[str, Any], Tuple[int, ...]]]:
+    """Execute the function and yield results with combination index.
+
+    The progress is updated with the index of each result.
+    """
+    # Executors yield the given parameter objects, possibly out of order.
+    indexes: Dict[int, Any] = {}
+
+    if batch_size is None:
+
+        def _values_iter() -> Iterator[Dict[str, Any]]:
+            for index in index_iter:
+                param = create_param(combs_list, index)
+                indexes[id(param)] = index
+                yield param
+
+        for res, param in execute_values(func,
+                                         _values_iter(),
+                                         n_jobs=n_jobs,
+                                         errors=errors,
+                                         retries=retries,
+                                         stats=stats,
+                                         trace=trace,
+                                         profile=profile,
+                                         cost=cost,
+                                         affinity=affinity,
+                                         fixtures=fixtures,
+                                         timeout=timeout,
+                                         speculative=speculative):
+            index = indexes.pop(id(param))
+            if progress is not None:
+                progress.update(index)
+            yield res, param, index
+        return
+
+    batches = create_batches(combs_list, index_iter, batch_size)
+
+    def _columns_iter() -> Iterator[Dict[str, List[Any]]]:
+        for columns, block in batches:
+            indexes[id(columns)] = block
+            yield columns
+
+    for res, columns in execute_values(func,
+                                       _columns_iter(),
+                                       n_jobs=n_jobs,
+                                       errors=errors,
+                                       retries=retries,
+                                       stats=stats,
+                                       trace=trace,
+                                       timeout=timeout,
+                                       speculative=speculative):
+        block = indexes.pop(id(columns))
+        params = [create_param(combs_list, index) for index in block]
+        if progress is not None:
+            progress.update(block[-1], n=len(block))
+        if isinstance(res, Failure):
+            for param, index in zip(params, block):
+                yield res, param, index
+            continue
+        for (r, param), index in zip(split_results(res, params), block):
+            yield r, param, index
+
+
+def execute_values(
+    func: Callable,
+    values: Iterable[Dict[str, Any]],
+    n_jobs: int = 1,
+    progress: bool = False,
+    total: int = None,
+    errors: str = 'raise',
+    retries: int = 3,
+    stats: ExecutionStats = None,
+    trace: Tracer = None,
+    profile: 'Profiler' = None,
+    cost: CostModel = None,
+    affinity: Iterable[str] = None,
+    fixtures: TFixtures = None,
+    timeout: float = None,
+    speculative: float = None,
+) -> Iterator[Tuple[Any, Dict[str, Any]]]:
+    """Execute the function with each parameter.
+
+    Args:
+        func (Callable): Target function.
+        values (Iterable[Dict[str, Any]]): Parameters.
+        n_jobs (int, optional): Number of processes. Default to 1.
+        progress (bool, optional): Show progress bar or not.
+        total (int, optional): Number of parameters for progress bar.
+        errors (str, optional): 'raise', 'collect' or 'retry'.
+        retries (int, optional): Number of retries with errors='retry'.
+        stats (ExecutionStats, optional): Statistics added with each call.
+        trace (Tracer, optional): Tracer of calls.
+        profile (Profiler, optional): Profiler of calls.
+        cost (CostModel, optional): Cost model, learning timings. Costliest
+            first with n_jobs > 1.
+        affinity (Iterable[str], optional): Keys routing parameters with
+            the same values to the same worker with n_jobs > 1.
+        fixtures (TFixtures, optional): Extra arguments of func, computed
+            once per distinct values in each process.
+        timeout (float, optional): Seconds a call may take with n_jobs > 1.
+        speculative (float, optional): Median multiple over which a tail
+            call is also sent to an idle worker with n_jobs > 1.
 
-    val_iter = create_values(params, order=order)
+    Raises:
+        TypeError: Missing argument.
+        TypeError: Unexpected argument.
+        ValueError: Unknown errors.
+
+    Yields:
+        Iterator[Tuple[Any, Dict[str, Any]]]: Result and parameter.
+    """
+    if errors not in ERRORS:
+        raise ValueError('Unknown errors: {}'.format(errors))
+    # Wrapped here, so that each worker process gets its own caches.
+    func = inject(func, fixtures)
 
     if n_jobs == 1:
         if progress:
-            from tqdm.auto import tqdm
-            total = combu.util.count(params)
-            val_iter = tqdm(val_iter, total=total)
+            values = Progress(total).iterate(values)
 
         # raise KeyError
-        for comb in val_iter:
-            # raise TypeError
-            yield func(**comb), comb
+        timed = stats is not None or trace is not None or cost is not None
+        sampler = None if profile is None else profile.sampler()
+        for comb in values:
+            target = func
+            if sampler is not None and sampler.sampled():
+                target = sampler.profiled(func)
+            if timed:
+                start_time = time.time()
+                wall, cpu = time.perf_counter(), time.process_time()
+            if errors == 'raise':
+                # raise TypeError
+                res = target(**comb)
+            else:
+                res = _call(target, comb, errors, retries)
+            if sampler is not None:
+                sample = sampler.take()
+                if sample is not None:
+                    cast('Profiler', profile).add(comb, sample)
+            if timed:
+                wall = time.perf_counter() - wall
+                cpu = time.process_time() - cpu
+                if stats is not None:
+                    stats.add_call(wall, cpu)
+                if cost is not None and not isinstance(res, Failure):
+                    cost.add(comb, wall)
+                if trace is not None:
+                    trace.span(getattr(func, '__name__', 'call'),
+                               start_time,
+                               wall,
+                               args=comb)
+            yield res, comb
     else:
         n = None if n_jobs < 0 else n_jobs
-        parallel = ParallelExecutor(func, n=n, progress=progress)
-        for res, param in parallel.execute(val_iter):
+        parallel = ParallelExecutor(func,
+                                    n=n,
+                                    progress=progress,
+                                    timeout=timeout,
+                                    speculative=speculative,
+                                    errors=errors,
+                                    retries=retries,
+                                    stats=stats,
+                                    trace=trace,
+                                    profile=profile,
+                                    cost=cost,
+                                    affinity=affinity)
+        for res, param in parallel.execute(values, total=total):
             yield res, param
+
+
+def _call(func: Callable, comb: Dict[str, Any], errors: str,
+          retries: int) -> Any:
+    """Call the function with the error policy. Failure on failed call."""
+    attempts = 0
+    while True:
+        attempts += 1
+        try:
+            return func(**comb)
+        except Exception as e:  # noqa: B902
+            if errors == 'retry' and attempts <= retries:
+                time.sleep(retry_delay(BACKOFF, attempts))
+                continue
+            return Failure(e,
+                           attempts=attempts,
+                           traceback=traceback.format_exc())
+
+
+def split_results(
+    results: Iterable[Any],
+    params: Sequence[Dict[str, Any]],
+) -> Iterator[Tuple[Any, Dict[str, Any]]]:
+    """Split results of a block into each combination.
+
+    Args:
+        results (Iterable[Any]): Results of a block (sequence or ndarray).
+        params (Sequence[Dict[str, Any]]): Parameters of the block.
+
+    Raises:
+        ValueError: Number of results does not match the block.
+
+    Returns:
+        Iterator[Tuple[Any, Dict[str, Any]]]: Result and parameter.
+    """
+    results = list(results)
+    if len(results) != len(params):
+        raise ValueError('Got {} results for a block of {}.'.format(
+            len(results), len(params)))
+    return zip(results, params)
@@ -0,0 +1,116 @@
+"""Fixtures.
+
+Values computed from some parameter keys, at most once per distinct values
+in each process, and passed to the target as extra arguments.
+"""
+
+import collections
+from typing import Any, Callable, Dict, Hashable, Iterable, Mapping, Union
+
+
+class Fixture:
+    """Factory of a value from some parameter keys."""
+
+    def __init__(self,
+                 factory: Callable,
+                 keys: Iterable[str] = None,
+                 maxsize: int = 8,
+                 key: Callable[..., Hashable] = None) -> None:
+        """Initialize object.
+
+        Args:
+            factory (Callable): Function of the keys (as keyword arguments).
+            keys (Iterable[str], optional): Parameter keys of the value.
+                Default to the arguments of factory.
+            maxsize (int, optional): Number of values kept per process.
+                The least recently used is evicted.
+            key (Callable[..., Hashable], optional): Function of the keys
+                (as keyword arguments) returning the cache key. Default to
+                the tuple of their values, which must be hashable.
+
+        Raises:
+            ValueError: maxsize under 1.
+        """
+        if maxsize < 1:
+            raise ValueError('maxsize must be at least 1.')
+        if keys is None:
+            import inspect
+            keys = inspect.signature(factory).parameters
+        self.factory = factory
+        self.keys = list(keys)
+        self.maxsize = maxsize
+        self.key = key
+
+
+TFixtures = Mapping[str, Union[Fixture, Callable]]
+
+
+class _Injector:
+    """Target called with the values of fixtures.
+
+    Pickled into each worker process with empty caches, so each process
+    keeps its own.
+    """
+
+    def __init__(self, func: Callable, fixtures: TFixtures) -> None:
+        self.func = func
+        self.__name__ = getattr(func, '__name__', 'call')
+        self.fixtures = {
+            name: f if isinstance(f, Fixture) else Fixture(f)
+            for name, f in fixtures.items()
+        }
+        self.caches: Dict[str, 'collections.OrderedDict[Hashable, Any]'] = {
+            name: collections.OrderedDict() for name in self.fixtures
+        }
+        # Number of values computed and reused in this process.
+        self.misses = 0
+        self.hits = 0
+
+    def value(self, name: str, param: Dict[str, Any]) -> Any:
+        """Get the value of a fixture for the parameter.
+
+        Raises:
+            TypeError: Unhashable values without the key of the fixture.
+        """
+        fixture = self.fixtures[name]
+        cache = self.caches[name]
+        args = {k: param[k] for k in fixture.keys if k in param}
+        if fixture.key is None:
+            key: Hashable = tuple(args.get(k) for k in fixture.keys)
+        else:
+            key = fixture.key(**args)
+        try:
+            hit = key in cache
+        except TypeError as e:
+            raise TypeError('Unhashable values of fixture {}, set its '
+                            'key: {}'.format(name, e)) from e
+        if hit:
+            self.hits += 1
+            cache.move_to_end(key)
+            return cache[key]
+        self.misses += 1
+        value = fixture.factory(**args)
+        cache[key] = value
+        if len(cache) > fixture.maxsize:
+            cache.popitem(last=False)
+        return value
+
+    def __call__(self, **param: Any) -> Any:
+        values = {name: self.value(name, param) for name in self.fixtures}
+        return self.func(**param, **values)
+
+
+def inject(func: Callable, fixtures: TFixtures = None) -> Callable:
+    """Get the target called with fixtures.
+
+    Args:
+        func (Callable): Target function.
+        fixtures (TFixtures, optional): Name of the extra argument ->
+            Fixture or factory.
+
+    Returns:
+        Callable: Target. func without fixtures.
+    """
+    if fixtures is None or len(fixtures) == 0:
+        return func
+    return _Injector(func, fixtures)
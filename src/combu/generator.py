@@ -1,11 +1,17 @@
 """Generator."""
 
 import itertools
-from typing import Any, cast, Dict, Iterable, Iterator, List
+from typing import (Any, cast, Dict, Iterable, Iterator, List, Optional,
+                    Sequence, Tuple)
 
-from combu.definition import TParams, TParamsKey, Unset
+from combu.definition import Constraint, TParams, TParamsKey, Unset
+import combu.sequence
 import combu.util
 
+# Value of a key missing on a combination of an axis. An Unset, so that a key
+# missing on every axis stays unset.
+MISSING = Unset()
+
 
 def get_order(keys: Iterable[TParamsKey],
               order: Iterable[TParamsKey] = None) -> List[TParamsKey]:
@@ -23,19 +29,240 @@ def get_order(keys: Iterable[TParamsKey],
     return order
 
 
-def create_values(params: dict,
-                  order: Iterable = None) -> Iterator[Dict[str, Any]]:
+def create_param(combs_list: List[List[Dict[str, Any]]],
+                 index: Sequence[int]) -> Dict[str, Any]:
+    """Create parameter from combination index.
+
+    Args:
+        combs_list (List[List[Dict[str, Any]]]): Standardized parameters.
+        index (Sequence[int]): Combination index.
+
+    Returns:
+        Dict[str, Any]: Parameter.
+    """
+    param: Dict[str, Any] = {}
+    for combs, i in zip(combs_list, index):
+        param.update(combs[i])
+    return {k: v for k, v in param.items() if not isinstance(v, Unset)}
+
+
+def _group_constraints(
+        combs_list: List[List[Dict[str, Any]]],
+        constraints: Iterable[Constraint]) -> List[List[Constraint]]:
+    """Group constraints by the axis that binds their last key.
+
+    Raises:
+        KeyError: Used unknown key on a constraint.
+    """
+    axis_keys = [set(itertools.chain(*combs)) for combs in combs_list]
+    checks: List[List[Constraint]] = [[] for _ in combs_list]
+    for constraint in constraints:
+        depth = 0
+        for k in constraint.keys:
+            found = [i for i, keys in enumerate(axis_keys) if k in keys]
+            if len(found) == 0:
+                raise KeyError(k)
+            depth = max(depth, found[0])
+        checks[depth].append(constraint)
+    return checks
+
+
+def _iter_prefix(combs_list: List[List[Dict[str, Any]]],
+                 checks: List[List[Constraint]],
+                 depth: int) -> Iterator[Tuple[int, ...]]:
+    """Iterate index prefixes depth-first, skipping failed subtrees."""
+    if depth == 0:
+        yield ()
+        return
+    index = [-1] * depth
+    partials: List[Dict[str, Any]] = [{}] * (depth + 1)
+    d = 0
+    while d >= 0:
+        index[d] += 1
+        if index[d] == len(combs_list[d]):
+            index[d] = -1
+            d -= 1
+            continue
+        param = {**partials[d], **combs_list[d][index[d]]}
+        if not all(check(param) for check in checks[d]):
+            continue
+        if d == depth - 1:
+            yield tuple(index)
+        else:
+            partials[d + 1] = param
+            d += 1
+
+
+def create_comb_index(
+    combs_list: List[List[Dict[str, Any]]],
+    sequence: str = 'product',
+    constraints: Iterable[Constraint] = None,
+) -> Iterator[Tuple[int, ...]]:
+    """Create combination index.
+
+    Args:
+        combs_list (List[List[Dict[str, Any]]]): Standardized parameters.
+        sequence (str, optional): Enumeration order.
+        constraints (Iterable[Constraint], optional): Constraints.
+            On 'product', a failed constraint skips the whole inner subtree.
+
+    Raises:
+        KeyError: Used unknown key on a constraint.
+        ValueError: Unknown sequence.
+
+    Returns:
+        Iterator[Tuple[int, ...]]: Combination index.
+    """
+    sizes = [len(combs) for combs in combs_list]
+    constraints = [] if constraints is None else list(constraints)
+    if len(constraints) == 0:
+        return combu.sequence.create_index(sizes, sequence=sequence)
+
+    checks = _group_constraints(combs_list, constraints)
+    if sequence == 'product':
+        return _iter_prefix(combs_list, checks, len(combs_list))
+
+    index_iter = combu.sequence.create_index(sizes, sequence=sequence)
+    return (index for index in index_iter if all(
+        check(create_param(combs_list, index)) for check in constraints))
+
+
+def count_comb_index(combs_list: List[List[Dict[str, Any]]],
+                     constraints: Iterable[Constraint] = None) -> int:
+    """Count combinations.
+
+    Only the axes up to the last constrained one are enumerated.
+
+    Args:
+        combs_list (List[List[Dict[str, Any]]]): Standardized parameters.
+        constraints (Iterable[Constraint], optional): Constraints.
+
+    Raises:
+        KeyError: Used unknown key on a constraint.
+
+    Returns:
+        int: Number of combinations.
+    """
+    constraints = [] if constraints is None else list(constraints)
+    checks = _group_constraints(combs_list, constraints)
+    depth = max([d + 1 for d, c in enumerate(checks) if len(c) > 0] + [0])
+    result = 1
+    for combs in combs_list[depth:]:
+        result *= len(combs)
+    if depth == 0:
+        return result
+    return result * sum(1 for _ in _iter_prefix(combs_list, checks, depth))
+
+
+def create_column_table(
+        combs_list: List[List[Dict[str, Any]]]) -> List[Dict[str, List[Any]]]:
+    """Create per-axis value lists of each key.
+
+    Args:
+        combs_list (List[List[Dict[str, Any]]]): Standardized parameters.
+
+    Returns:
+        List[Dict[str, List[Any]]]: Values of each key on each axis.
+            Missing values are MISSING, which keep the value of an earlier
+            axis as in create_param().
+    """
+    table = []
+    for combs in combs_list:
+        keys: Dict[str, None] = {}
+        for comb in combs:
+            keys.update(dict.fromkeys(comb))
+        table.append({k: [c.get(k, MISSING) for c in combs] for k in keys})
+    return table
+
+
+def create_columns(table: List[Dict[str, List[Any]]],
+                   indexes: Sequence[Tuple[int, ...]]) -> Dict[str, List[Any]]:
+    """Create columns (values of each key) of combinations.
+
+    Args:
+        table (List[Dict[str, List[Any]]]): Result of create_column_table().
+        indexes (Sequence[Tuple[int, ...]]): Combination indexes.
+
+    Returns:
+        Dict[str, List[Any]]: Values of each key. Unset values are kept as
+            Unset.
+    """
+    columns: Dict[str, List[Any]] = {}
+    for axis, col in zip(table, zip(*indexes)):
+        for k, values in axis.items():
+            column = list(map(values.__getitem__, col))
+            if k in columns:
+                column = [
+                    prev if v is MISSING else v
+                    for prev, v in zip(columns[k], column)
+                ]
+            columns[k] = column
+    return columns
+
+
+def create_batches(
+    combs_list: List[List[Dict[str, Any]]],
+    index_iter: Iterable[Tuple[int, ...]],
+    batch_size: int,
+) -> Iterator[Tuple[Dict[str, List[Any]], List[Tuple[int, ...]]]]:
+    """Create blocks of consecutive combinations as columns.
+
+    Args:
+        combs_list (List[List[Dict[str, Any]]]): Standardized parameters.
+        index_iter (Iterable[Tuple[int, ...]]): Combination indexes.
+        batch_size (int): Number of combinations in a block.
+
+    Raises:
+        ValueError: batch_size less than 1.
+
+    Yields:
+        Iterator[Tuple[Dict[str, List[Any]], List[Tuple[int, ...]]]]:
+            Columns and combination indexes.
+    """
+    if batch_size < 1:
+        raise ValueError('batch_size must be at least 1.')
+    table = create_column_table(combs_list)
+    index_iter = iter(index_iter)
+    while True:
+        indexes = list(itertools.islice(index_iter, batch_size))
+        if len(indexes) == 0:
+            return
+        yield create_columns(table, indexes), indexes
+
+
+def create_values(
+    params: dict,
+    order: Iterable = None,
+    sequence: str = 'product',
+    constraints: Iterable[Constraint] = None,
+) -> Iterator[Dict[str, Any]]:
     """Create values.
 
     Args:
         params (TParams): Parameters.
         order (Iterable[ParamsKey], optional): Key order.
+        sequence (str, optional): Enumeration order.
+            'product' (nested loop), 'gray', 'halton', 'sobol' or 'lhs'.
+            'gray' changes one axis per step (see create_changes()).
+            Quasi-random orders spread any prefix over every axis.
+        constraints (Iterable[Constraint], optional): Constraints.
+
+    Raises:
+        KeyError: Used unknown key on a constraint.
+        ValueError: Unknown sequence.
 
     Yields:
         Iterator[Dict[str, Any]]: Parameter.
     """
     params = cast(TParams, params)
     combs_list = combu.util.standardize(params, order=order)
+    if sequence != 'product' or constraints is not None:
+        for index in create_comb_index(combs_list,
+                                       sequence=sequence,
+                                       constraints=constraints):
+            yield create_param(combs_list, index)
+        return
+
     for combs in itertools.product(*combs_list):
         param: Dict[str, Any] = {}
         for comb in combs:
@@ -43,6 +270,77 @@ def create_values(params: dict,
         yield {k: v for k, v in param.items() if not isinstance(v, Unset)}
 
 
+def create_changes(
+    params: dict,
+    order: Iterable = None,
+    sequence: str = 'gray',
+    constraints: Iterable[Constraint] = None,
+) -> Iterator[Tuple[Dict[str, Any], List[str]]]:
+    """Create values with the keys changed from the previous one.
+
+    With 'gray', a single axis changes per step (without constraints), so
+    that state kept by the caller can be updated incrementally.
+
+    Args:
+        params (TParams): Parameters.
+        order (Iterable[ParamsKey], optional): Key order.
+        sequence (str, optional): Enumeration order. Default to 'gray'.
+        constraints (Iterable[Constraint], optional): Constraints.
+
+    Raises:
+        KeyError: Used unknown key on a constraint.
+        ValueError: Unknown sequence.
+
+    Yields:
+        Iterator[Tuple[Dict[str, Any], List[str]]]: Parameter and its keys
+            on the changed axes (every key first).
+    """
+    params = cast(TParams, params)
+    combs_list = combu.util.standardize(params, order=order)
+    prev = None
+    for index in create_comb_index(combs_list,
+                                   sequence=sequence,
+                                   constraints=constraints):
+        param = create_param(combs_list, index)
+        yield param, get_changes(combs_list, prev, index)
+        prev = index
+
+
+def get_changes(combs_list: List[List[Dict[str, Any]]],
+                prev: Optional[Sequence[int]],
+                index: Sequence[int]) -> List[str]:
+    """Get the keys changed between two combination indexes.
+
+    Args:
+        combs_list (List[List[Dict[str, Any]]]): Standardized parameters.
+        prev (Optional[Sequence[int]]): Previous combination index. None
+            for the first combination.
+        index (Sequence[int]): Combination index.
+
+    Returns:
+        List[str]: Keys set before or after the change, on the changed
+            axes. Every key of the parameter without previous index.
+    """
+    if prev is None:
+        return list(create_param(combs_list, index))
+    changed: List[str] = []
+    for combs, i, j in zip(combs_list, prev, index):
+        if i == j:
+            continue
+        for k, v in itertools.chain(combs[i].items(), combs[j].items()):
+            if not isinstance(v, Unset) and k not in changed:
+                changed.append(k)
+    return changed
+
+
 __all__ = [
     'get_order',
+    'create_param',
+    'create_comb_index',
+    'count_comb_index',
+    'create_column_table',
+    'create_columns',
+    'create_batches',
+    'create_changes',
+    'get_changes',
 ]
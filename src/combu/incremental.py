@@ -0,0 +1,209 @@
+"""Incremental.
+
+Re-execution of a grid extended with new values.
+"""
+
+import itertools
+import os
+from typing import (Any, Callable, cast, Dict, Iterable, Iterator, List,
+                    Optional, Tuple)
+
+from combu.definition import TParams, TParamsKey
+from combu.execution import _execute_index
+from combu.generator import create_param, get_order
+from combu.progress import Progress
+from combu.sinks import Sink
+import combu.util
+
+
+class Record(Sink):
+    """Record of a run: axes and completed results.
+
+    With 'path', a previous record is loaded on initialization and the
+    record is saved on close.
+    """
+
+    def __init__(self, path: str = None) -> None:
+        """Initialize object.
+
+        Args:
+            path (str, optional): Path of pickle file.
+        """
+        self.path = path
+        self.order: List[TParamsKey] = []
+        self.labels: List[List[Dict[str, Any]]] = []
+        self.results: Dict[Tuple[int, ...], Any] = {}
+        if path is not None and os.path.exists(path):
+            import pickle
+            with open(path, 'rb') as f:
+                data = pickle.load(f)
+            self.order = data['order']
+            self.labels = data['labels']
+            self.results = data['results']
+
+    def open(  # noqa: A003
+            self, order: List[TParamsKey],
+            combs_list: List[List[Dict[str, Any]]]) -> None:
+        """Start a new record.
+
+        Args:
+            order (List[TParamsKey]): Loop order (keys of axes).
+            combs_list (List[List[Dict[str, Any]]]): Standardized
+                parameters (values of axes).
+        """
+        self.order = list(order)
+        self.labels = combs_list
+        self.results = {}
+
+    def write(self, res: Any, param: Dict[str, Any],
+              index: Tuple[int, ...]) -> None:
+        """Record a result.
+
+        Args:
+            res (Any): Result.
+            param (Dict[str, Any]): Parameter.
+            index (Tuple[int, ...]): Combination index.
+        """
+        self.results[index] = res
+
+    def close(self) -> None:
+        """Save the record."""
+        if self.path is None:
+            return
+        import pickle
+        with open(self.path, 'wb') as f:
+            pickle.dump(
+                {
+                    'order': self.order,
+                    'labels': self.labels,
+                    'results': self.results,
+                }, f)
+
+    def match(
+        self,
+        order: List[TParamsKey],
+        combs_list: List[List[Dict[str, Any]]],
+    ) -> Tuple[List[List[int]], Dict[Tuple[int, ...], Any]]:
+        """Match a grid against the record.
+
+        Args:
+            order (List[TParamsKey]): Loop order (keys of axes).
+            combs_list (List[List[Dict[str, Any]]]): Standardized
+                parameters (values of axes).
+
+        Raises:
+            ValueError: Keys differ from the record.
+
+        Returns:
+            Tuple[List[List[int]], Dict[Tuple[int, ...], Any]]:
+                Positions of recorded values on each axis and recorded
+                results by combination index of the grid.
+        """
+        if len(self.order) == 0:
+            return [[] for _ in order], {}
+        if sorted(map(repr, self.order)) != sorted(map(repr, order)):
+            raise ValueError('Keys differ from the record: {} != {}'.format(
+                self.order, order))
+
+        # New position on each recorded axis (None if removed).
+        moved: List[List[Optional[int]]] = []
+        for k, labels in zip(self.order, self.labels):
+            combs = combs_list[list(order).index(k)]
+            moved.append(
+                [combs.index(c) if c in combs else None for c in labels])
+
+        positions = [
+            sorted(p
+                   for p in moved[self.order.index(k)]
+                   if p is not None)
+            for k in order
+        ]
+        axis = [self.order.index(k) for k in order]
+        results = {}
+        for index, res in self.results.items():
+            new = tuple(moved[a][index[a]] for a in axis)
+            if None not in new:
+                results[cast(Tuple[int, ...], new)] = res
+        return positions, results
+
+
+def _create_index(
+    sizes: List[int],
+    positions: List[List[int]],
+    done: Dict[Tuple[int, ...], Any],
+) -> Iterator[Tuple[int, ...]]:
+    """Create combination indexes without results.
+
+    Recorded values first, then new values axis by axis: recorded values
+    on outer axes, new values on the axis and all values on inner axes.
+    """
+    for index in itertools.product(*positions):
+        if index not in done:
+            yield index
+
+    for i, n in enumerate(sizes):
+        recorded = set(positions[i])
+        new = [p for p in range(n) if p not in recorded]
+        if len(new) == 0:
+            continue
+        yield from itertools.product(*positions[:i], new,
+                                     *[range(m) for m in sizes[i + 1:]])
+
+
+def execute_incremental(
+    func: Callable,
+    params: dict,
+    record: Record,
+    order: Iterable = None,
+    n_jobs: int = 1,
+    progress: bool = False,
+    merge: bool = True,
+) -> Iterator[Tuple[Any, Dict[str, Any]]]:
+    """Execute the function only with combinations not in the record.
+
+    The record is updated to the new grid: recorded results of values
+    still on the grid and new results.
+
+    Args:
+        func (Callable): Target function.
+        params (TParams): Parameters.
+        record (Record): Record of the previous run.
+        order (Iterable[TParamsKey], optional): Loop order.
+        n_jobs (int, optional): Number of processes. Default to 1.
+        progress (bool, optional): Show progress bar or not.
+        merge (bool, optional): Yield recorded results first, so that the
+            whole grid is yielded.
+
+    Raises:
+        ValueError: Keys differ from the record.
+
+    Yields:
+        Iterator[Tuple[Any, Dict[str, Any]]]: Result and parameter.
+    """
+    params = cast(TParams, params)
+    keys = get_order(params.keys(), order=order)
+    combs_list = combu.util.standardize(params, order=keys)
+    positions, done = record.match(keys, combs_list)
+    sizes = [len(combs) for combs in combs_list]
+
+    bar = None
+    if progress:
+        total = combu.util.count(params) - len(done)
+        # Completed combinations are skipped anywhere in the order.
+        bar = Progress(total, keys, sizes, ordered=len(done) == 0)
+
+    record.open(keys, combs_list)
+    record.results.update(done)
+    try:
+        if merge:
+            for index, res in sorted(done.items()):
+                yield res, create_param(combs_list, index)
+        index_iter = _create_index(sizes, positions, done)
+        for res, param, index in _execute_index(func, combs_list, index_iter,
+                                                n_jobs, bar, None):
+            record.write(res, param, index)
+            yield res, param
+    finally:
+        if bar is not None:
+            bar.close()
+        record.close()
@@ -0,0 +1,120 @@
+"""Ordering.
+
+Loop order minimizing the cost of Combu hooks.
+
+A hook of a key at loop position p is called once per prefix of the
+index: before / after per values of the outer axes (prod of sizes before
+p), before_each / after_each per values up to p (times the size at p).
+The total cost is a sum over keys of w_k times the product of the sizes
+before k, with w_k = loop cost + each cost * size. Swapping two adjacent
+keys only changes their own terms, so sorting by w_k / (size - 1)
+descending is optimal. Keys without hooks go last.
+
+With sequence='gray', each hooks are called when the value changes: once
+per outer values times (size - 1), plus the first call, so size - 1
+replaces size in w_k.
+"""
+
+from typing import Dict, List, Mapping, Sequence, Tuple
+
+from combu.definition import TParamsKey
+
+THook = Tuple[str, TParamsKey]
+HOOK_KINDS = ('before', 'before_each', 'after_each', 'after')
+
+
+def count_hook_calls(order: Sequence[TParamsKey],
+                     sizes: Mapping[TParamsKey, int],
+                     hooks: Sequence[THook],
+                     sequence: str = 'product') -> Dict[THook, int]:
+    """Count the calls of each hook (without constraints).
+
+    Args:
+        order (Sequence[TParamsKey]): Loop order.
+        sizes (Mapping[TParamsKey, int]): Number of values of each key.
+        hooks (Sequence[THook]): Kind and key of hooks.
+        sequence (str, optional): 'product' or 'gray'.
+
+    Raises:
+        KeyError: Unknown key of a hook.
+
+    Returns:
+        Dict[THook, int]: Number of calls of each hook.
+    """
+    outer: Dict[TParamsKey, int] = {}
+    n = 1
+    for k in order:
+        outer[k] = n
+        n *= sizes[k]
+    calls = {}
+    for kind, k in hooks:
+        if kind in ('before', 'after'):
+            calls[(kind, k)] = outer[k]
+        elif sequence == 'gray' and n > 0:
+            calls[(kind, k)] = outer[k] * (sizes[k] - 1) + 1
+        else:
+            calls[(kind, k)] = outer[k] * sizes[k]
+    return calls
+
+
+def optimize_order(keys: Sequence[TParamsKey],
+                   sizes: Mapping[TParamsKey, int],
+                   costs: Mapping[THook, float],
+                   sequence: str = 'product') -> List[TParamsKey]:
+    """Get the loop order minimizing the total cost of hooks.
+
+    Args:
+        keys (Sequence[TParamsKey]): Keys. Ties keep this order.
+        sizes (Mapping[TParamsKey, int]): Number of values of each key.
+        costs (Mapping[THook, float]): Cost of a call of each hook.
+        sequence (str, optional): 'product' or 'gray'.
+
+    Raises:
+        KeyError: Unknown key of a hook.
+
+    Returns:
+        List[TParamsKey]: Order.
+    """
+    weights: Dict[TParamsKey, float] = dict.fromkeys(keys, 0.0)
+    for (kind, k), cost in costs.items():
+        if k not in weights:
+            raise KeyError(k)
+        if kind in ('before', 'after'):
+            weights[k] += cost
+        elif sequence == 'gray':
+            weights[k] += cost * (sizes[k] - 1)
+        else:
+            weights[k] += cost * sizes[k]
+
+    def _rank(k: TParamsKey) -> float:
+        if weights[k] <= 0:
+            return 0.0
+        if sizes[k] <= 1:
+            return float('inf')
+        return weights[k] / (sizes[k] - 1)
+
+    return sorted(keys, key=_rank, reverse=True)
+
+
+class OrderPlan:
+    """Loop order with its expected hook calls."""
+
+    def __init__(self, order: List[TParamsKey], calls: Dict[THook, int],
+                 costs: Mapping[THook, float]) -> None:
+        """Initialize object.
+
+        Args:
+            order (List[TParamsKey]): Loop order.
+            calls (Dict[THook, int]): Expected calls of each hook.
+            costs (Mapping[THook, float]): Cost of a call of each hook.
+        """
+        self.order = order
+        self.calls = calls
+        self.cost = sum(costs[h] * n for h, n in calls.items())
+
+    def __str__(self) -> str:
+        """Get the report of the plan."""
+        calls = ', '.join('{}:{} {}'.format(kind, k, n)
+                          for (kind, k), n in self.calls.items())
+        return 'order: {} | hook calls: {} | cost: {:g}'.format(
+            ', '.join(map(str, self.order)), calls, self.cost)
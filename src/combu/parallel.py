@@ -1,9 +1,123 @@
-"""Parallel."""
+"""Parallel.
 
-from multiprocessing import Pool
-from typing import Any, Callable, Iterable, Iterator, Tuple
+multiprocessing and statistics are imported on first use, so that
+importing combu stays fast.
+"""
 
-from tqdm.auto import tqdm
+import collections
+import heapq
+import time
+import traceback
+from typing import (Any, Callable, Deque, Dict, Iterable, Iterator, List,
+                    Optional, Set, Tuple, TYPE_CHECKING)
+
+from combu.affinity import _Router
+from combu.cost import _Pending, CostModel
+from combu.definition import Failure
+from combu.fixtures import inject, TFixtures
+from combu.progress import Progress
+from combu.stats import ExecutionStats
+from combu.tracing import Tracer
+
+if TYPE_CHECKING:
+    from combu.profiling import _Sampler, Profiler
+
+ERRORS = ('raise', 'collect', 'retry')
+BACKOFF = 0.1
+MAX_BACKOFF = 60.0
+# Number of recent call durations for the median (speculative).
+_DURATIONS = 1024
+
+
+def retry_delay(backoff: float, attempts: int) -> float:
+    """Get seconds to wait before a retry.
+
+    Args:
+        backoff (float): Seconds after the first attempt. Doubled on each
+            attempt, up to MAX_BACKOFF.
+        attempts (int): Number of failed attempts.
+
+    Returns:
+        float: Seconds.
+    """
+    return min(backoff * 2**(attempts - 1), MAX_BACKOFF)
+
+
+def _work(target: Callable, conn: Any, sampler: '_Sampler' = None) -> None:
+    """Execute tasks received from the connection until None.
+
+    Each result is sent with the start time, wall time and CPU time, and
+    the profile sample (None if not sampled).
+    """
+    while True:
+        task = conn.recv()
+        if task is None:
+            return
+        task_id, param = task
+        func = target
+        if sampler is not None and sampler.sampled():
+            func = sampler.profiled(target)
+        start_time = time.time()
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            res = (True, func(**param))
+        except Exception as e:  # noqa: B902
+            res = (False, (e, traceback.format_exc()))
+        timing = (start_time, time.perf_counter() - wall,
+                  time.process_time() - cpu)
+        sample = None if sampler is None else sampler.take()
+        try:
+            conn.send((task_id,) + res + (timing, sample))
+        except Exception as e:  # noqa: B902
+            # Not picklable result or exception.
+            error = (RuntimeError(repr(e)), '')
+            conn.send((task_id, False, error, timing, None))
+
+
+class _Worker:
+    """Worker process and its connection."""
+
+    def __init__(self,
+                 ctx: Any,
+                 target: Callable,
+                 sampler: '_Sampler' = None) -> None:
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_work,
+                                   args=(target, child_conn, sampler),
+                                   daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.task_id: Any = None
+        self.param: Dict[str, Any] = {}
+        # Affinity group of the parameters sent.
+        self.group: Any = None
+        self.start_time = 0.0
+        self.send_time = 0.0
+        self.sent_bytes = 0
+
+    def send(self, task_id: int, param: Dict[str, Any]) -> None:
+        self.task_id = task_id
+        self.param = param
+        self.start_time = time.monotonic()
+        self.send_time = time.time()
+        from multiprocessing.reduction import ForkingPickler
+        data = ForkingPickler.dumps((task_id, param))
+        self.sent_bytes = len(data)
+        self.conn.send_bytes(data)
+
+    def stop(self, terminate: bool = False) -> None:
+        if not terminate:
+            try:
+                self.conn.send(None)
+            except OSError:
+                terminate = True
+        if terminate:
+            self.process.terminate()
+        self.process.join(timeout=None if terminate else 1)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
 
 
 class ParallelExecutor:
@@ -12,42 +126,379 @@ class ParallelExecutor:
     def __init__(self,
                  target: Callable,
                  n: int = None,
-                 progress: bool = False) -> None:
+                 progress: bool = False,
+                 timeout: float = None,
+                 speculative: float = None,
+                 errors: str = 'raise',
+                 retries: int = 3,
+                 backoff: float = BACKOFF,
+                 stats: ExecutionStats = None,
+                 trace: Tracer = None,
+                 profile: 'Profiler' = None,
+                 cost: CostModel = None,
+                 affinity: Iterable[str] = None,
+                 fixtures: TFixtures = None) -> None:
         """Initialize object.
 
         Args:
             target (Callable): Target function.
             n (int, optional): Number of processes. Default to all cores.
             progress (bool, optional): Show progress bar or not.
+            timeout (float, optional): Seconds a call may take. The worker
+                of a longer call is terminated and replaced, and the call
+                raises TimeoutError.
+            speculative (float, optional): Once every parameter is sent,
+                calls running longer than this multiple of the median call
+                time are also sent to idle workers. The first result is
+                used and the other worker is replaced.
+            errors (str, optional): Policy on a failed call (exception,
+                timeout or crashed worker). 'raise' stops the execution,
+                'collect' yields Failure instead of the result and 'retry'
+                retries up to 'retries' times before yielding Failure.
+                Crashed workers are replaced.
+            retries (int, optional): Number of retries with 'retry'.
+            backoff (float, optional): Seconds before the first retry,
+                doubled on each retry.
+            stats (ExecutionStats, optional): Statistics added with each
+                call.
+            trace (Tracer, optional): Tracer of calls (per worker process),
+                dispatch and collect.
+            profile (Profiler, optional): Profiler of calls. Each worker
+                samples its own calls.
+            cost (CostModel, optional): Cost model. Parameters are taken
+                ahead (up to its window) and the costliest is sent first.
+                Timings of successful calls are added to it.
+            affinity (Iterable[str], optional): Keys whose values group
+                parameters. A worker keeps taking parameters of its group
+                (taken ahead up to affinity.WINDOW), claims a group of no
+                other worker when its group is empty, and else steals from
+                the group with the most parameters taken ahead.
+            fixtures (TFixtures, optional): Name of extra argument ->
+                Fixture or factory, computed once per distinct values in
+                each worker.
 
         Raises:
             ValueError: n over CPU count.
+            ValueError: Unknown errors.
+            ValueError: Both cost and affinity.
         """
-        self._target = target
+        if errors not in ERRORS:
+            raise ValueError('Unknown errors: {}'.format(errors))
+        if cost is not None and affinity is not None:
+            raise ValueError('cost and affinity are exclusive.')
+        self._target = inject(target, fixtures)
         self.n = n
         self.progress = progress
+        self.timeout = timeout
+        self.speculative = speculative
+        self.errors = errors
+        self.retries = retries
+        self.backoff = backoff
+        self.stats = stats
+        self.trace = trace
+        self.profile = profile
+        self.cost = cost
+        self.affinity = None if affinity is None else list(affinity)
+        # Workers kept across execute() calls (start() to close()).
+        self._workers: Optional[List[_Worker]] = None
+
+    def start(self) -> None:
+        """Keep the worker processes alive across execute() until close().
+
+        Workers are started by the first execute() and reused by the next
+        ones, with their fixture caches.
+        """
+        if self._workers is None:
+            self._workers = []
 
-    def _f(self, p) -> Any:
-        return self._target(**p)
+    def close(self) -> None:
+        """Stop the worker processes kept by start()."""
+        if self._workers is not None:
+            for w in self._workers:
+                w.stop()
+            self._workers = None
 
-    def execute(self, params: Iterable[dict]) -> Iterator[Tuple[Any, dict]]:
+    def execute(self,
+                params: Iterable[dict],
+                total: int = None) -> Iterator[Tuple[Any, dict]]:
         """Execute.
 
+        Parameters are sent to workers one at a time as they become free,
+        so the iterable is consumed lazily (ahead by the window of 'cost'
+        or 'affinity').
+
         Args:
             params (Iterable[dict]): Parameters.
+            total (int, optional): Number of parameters for progress bar.
+                Default to len(params) if available.
+
+        Raises:
+            TimeoutError: A call took longer than timeout (errors='raise').
+            RuntimeError: A worker process exited unexpectedly
+                (errors='raise').
 
         Yields:
-            Iterator[Tuple[Any, dict]]: Result and parameter.
+            Iterator[Tuple[Any, dict]]: Result (or Failure) and parameter.
         """
-        params = [param for param in params]  # noqa: C416
-
-        with Pool(self.n) as p:
-            jobs = [p.apply_async(self._f, args=[param]) for param in params]
-            with tqdm(total=len(jobs), disable=not self.progress) as progress:
-                while len(jobs) > 0:
-                    for job, param in zip(jobs, params):
-                        if job.ready():
-                            yield job.get(), param
-                            progress.update()
-                            jobs.remove(job)
-                            params.remove(param)
+        if total is None and hasattr(params, '__len__'):
+            total = len(params)  # type: ignore
+        import multiprocessing
+        from multiprocessing.connection import wait
+        n = multiprocessing.cpu_count() if self.n is None else self.n
+        ctx = multiprocessing.get_context()
+        param_iter = iter(params)
+        pending = None
+        if self.cost is not None:
+            pending = _Pending(self.cost, param_iter)
+        router = None
+        if self.affinity is not None:
+            router = _Router(self.affinity, param_iter)
+
+        workers: List[_Worker] = []
+        # Task ID -> parameter, not finished yet.
+        running: Dict[int, Dict[str, Any]] = {}
+        attempts: Dict[int, int] = {}
+        # Heap of (time to retry, task ID).
+        delayed: List[Tuple[float, int]] = []
+        # Task IDs already sent again.
+        speculated: Set[int] = set()
+        durations: Deque[float] = collections.deque(maxlen=_DURATIONS)
+        next_id = 0
+        exhausted = False
+
+        # Measure here unless started by the caller.
+        own_stats = False
+        if self.stats is not None:
+            own_stats = self.stats.start_time is None
+            if own_stats:
+                self.stats.start(n)
+            self.stats.n_workers = n
+
+        progress = Progress(total) if self.progress else None
+        try:
+            if self._workers is not None:
+                workers = self._workers
+            for w in workers:
+                w.group = None
+            while len(workers) < n:
+                workers.append(self._worker(ctx))
+            while True:
+                # Feed idle workers: retries, new parameters, stragglers.
+                for w in workers:
+                    if w.task_id is not None:
+                        continue
+                    if len(delayed) > 0 and delayed[0][0] <= time.monotonic():
+                        _, task_id = heapq.heappop(delayed)
+                        self._send(w, task_id, running[task_id])
+                        continue
+                    if exhausted:
+                        param = None
+                    elif pending is not None:
+                        param = pending.pop()
+                    elif router is not None:
+                        param = router.pop(w, workers)
+                    else:
+                        param = next(param_iter, None)
+                    if param is not None:
+                        running[next_id] = param
+                        attempts[next_id] = 0
+                        self._send(w, next_id, param)
+                        next_id += 1
+                        continue
+                    exhausted = True
+                    if len(delayed) > 0:
+                        continue
+                    straggler = self._straggler(speculated, workers, durations)
+                    if straggler is not None:
+                        speculated.add(straggler)
+                        self._send(w, straggler, running[straggler])
+
+                if exhausted and len(running) == 0:
+                    break
+
+                busy = [w for w in workers if w.task_id is not None]
+                objects = [w.conn for w in busy]
+                objects += [w.process.sentinel for w in busy]
+                timeout = self._wait_time(workers, speculated, durations,
+                                          exhausted)
+                if len(delayed) > 0:
+                    retry_time = max(0.0, delayed[0][0] - time.monotonic())
+                    timeout = min(retry_time, timeout or retry_time)
+                ready = wait(objects, timeout=timeout)
+
+                now = time.monotonic()
+                for i, w in enumerate(workers):
+                    task_id = w.task_id
+                    if task_id is None:
+                        continue
+                    elapsed = now - w.start_time
+                    if w.conn in ready or w.process.sentinel in ready:
+                        msg = self._recv(w)
+                        if msg is None:
+                            # Crashed (e.g. killed). Replace the worker.
+                            w.stop(terminate=True)
+                            workers[i] = self._worker(ctx)
+                            error = RuntimeError(
+                                'Worker process exited unexpectedly '
+                                '(exitcode {}).'.format(w.process.exitcode))
+                            msg = (task_id, False, (error, ''))
+                        _, ok, res = msg
+                        w.task_id = None
+                        if task_id not in running:
+                            # The other copy finished first.
+                            continue
+                    elif self.timeout is not None and elapsed > self.timeout:
+                        w.stop(terminate=True)
+                        workers[i] = self._worker(ctx)
+                        timeout_error = TimeoutError(
+                            'Timeout ({}s) with {}'.format(
+                                self.timeout, running[task_id]))
+                        ok, res = False, (timeout_error, '')
+                    else:
+                        continue
+
+                    if not ok and any(o.task_id == task_id for o in workers):
+                        # Another copy is still running.
+                        continue
+                    attempts[task_id] += 1
+                    if not ok:
+                        res = self._failure(task_id, attempts[task_id], *res)
+                        if res is None:
+                            delay = retry_delay(self.backoff,
+                                                attempts[task_id])
+                            heapq.heappush(delayed, (now + delay, task_id))
+                            continue
+                    else:
+                        durations.append(now - w.start_time)
+                    self._cancel_copies(task_id, workers, ctx)
+                    param = running.pop(task_id)
+                    del attempts[task_id]
+                    yield res, param
+                    if progress is not None:
+                        progress.update()
+        finally:
+            if progress is not None:
+                progress.close()
+            kept = workers is self._workers
+            for w in workers:
+                if not kept or w.task_id is not None:
+                    w.stop(terminate=w.task_id is not None)
+            if kept:
+                # Busy workers were stopped. Replaced by the next execute().
+                workers[:] = [w for w in workers if w.task_id is None]
+            if own_stats and self.stats is not None:
+                self.stats.stop()
+
+    def _worker(self, ctx: Any) -> _Worker:
+        """Start a worker."""
+        sampler = None if self.profile is None else self.profile.sampler()
+        return _Worker(ctx, self._target, sampler)
+
+    def _failure(self, task_id: int, attempts: int, error: BaseException,
+                 tb: str) -> Optional[Failure]:
+        """Handle a failed call with the error policy.
+
+        Returns:
+            Optional[Failure]: Failure to yield. None to retry.
+        """
+        if self.errors == 'raise':
+            raise error
+        if self.errors == 'retry' and attempts <= self.retries:
+            return None
+        return Failure(error, attempts=attempts, traceback=tb)
+
+    def _send(self, w: _Worker, task_id: int, param: Dict[str, Any]) -> None:
+        """Send a task to a worker."""
+        if self.trace is None:
+            w.send(task_id, param)
+            return
+        t = time.time()
+        w.send(task_id, param)
+        self.trace.span('dispatch',
+                        t,
+                        time.time() - t,
+                        cat='ipc',
+                        args={'task': task_id})
+
+    def _recv(self, w: _Worker) -> Optional[Tuple[int, bool, Any]]:
+        """Receive a result. None if the worker exited."""
+        t = time.time()
+        try:
+            if not w.conn.poll():
+                return None
+            data = w.conn.recv_bytes()
+        except (EOFError, OSError):
+            return None
+        from multiprocessing.reduction import ForkingPickler
+        task_id, ok, res, timing, sample = ForkingPickler.loads(data)
+        start_time, wall, cpu = timing
+        if ok and self.cost is not None:
+            self.cost.add(w.param, wall)
+        if sample is not None and self.profile is not None:
+            self.profile.add(w.param, sample)
+        if self.trace is not None:
+            self.trace.span('collect',
+                            t,
+                            time.time() - t,
+                            cat='ipc',
+                            args={'task': task_id})
+            self.trace.span(getattr(self._target, '__name__', 'call'),
+                            start_time,
+                            wall,
+                            pid=w.process.pid,
+                            args=w.param)
+        if self.stats is not None:
+            self.stats.add_call(wall,
+                                cpu,
+                                queue_wait=max(0.0, start_time - w.send_time),
+                                sent=w.sent_bytes,
+                                received=len(data))
+        return task_id, ok, res
+
+    def _straggler(self, speculated: Set[int], workers: List[_Worker],
+                   durations: Deque[float]) -> Optional[int]:
+        """Get the longest running task to send again, or None."""
+        if self.speculative is None or len(durations) == 0:
+            return None
+        import statistics
+        limit = self.speculative * statistics.median(durations)
+        now = time.monotonic()
+        candidates = []
+        for w in workers:
+            if w.task_id is None or w.task_id in speculated:
+                continue
+            if now - w.start_time > limit:
+                candidates.append((w.start_time, w.task_id))
+        if len(candidates) == 0:
+            return None
+        return min(candidates)[1]
+
+    def _wait_time(self, workers: List[_Worker], speculated: Set[int],
+                   durations: Deque[float],
+                   exhausted: bool) -> Optional[float]:
+        """Get seconds until the next timeout or speculation."""
+        deadlines = []
+        busy = [w for w in workers if w.task_id is not None]
+        if self.timeout is not None:
+            deadlines += [w.start_time + self.timeout for w in busy]
+        idle = len(busy) < len(workers)
+        speculating = exhausted and idle and len(durations) > 0
+        if self.speculative is not None and speculating:
+            import statistics
+            limit = self.speculative * statistics.median(durations)
+            deadlines += [
+                w.start_time + limit
+                for w in busy
+                if w.task_id not in speculated
+            ]
+        if len(deadlines) == 0:
+            return None
+        return max(0.0, min(deadlines) - time.monotonic()) + 0.01
+
+    def _cancel_copies(self, task_id: int, workers: List[_Worker],
+                       ctx: Any) -> None:
+        """Replace workers still running another copy of a finished task."""
+        for i, w in enumerate(workers):
+            if w.task_id == task_id:
+                w.stop(terminate=True)
+                workers[i] = self._worker(ctx)
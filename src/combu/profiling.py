@@ -0,0 +1,283 @@
+"""Profiling.
+
+Sampled calls under cProfile and tracemalloc, aggregated per value of each
+parameter key.
+"""
+
+import cProfile
+import csv
+import pstats
+import random
+import time
+import tracemalloc
+from typing import Any, Callable, cast, Dict, Hashable, List, Optional, Tuple
+
+from combu.reducers import Max, Mean
+from combu.util import group_value
+
+# Wall time, CPU time, peak allocation (bytes) and cProfile stats.
+TSample = Tuple[float, float, int, Optional[Dict[Any, Any]]]
+
+
+class _StatsData:
+    """Raw cProfile stats loadable by pstats.Stats."""
+
+    def __init__(self, stats: Dict[Any, Any]) -> None:
+        self.stats = stats
+
+    def create_stats(self) -> None:
+        pass
+
+
+class _Sampler:
+    """Sampling and profiling of calls, in the process calling."""
+
+    def __init__(self, every: int, rate: Optional[float], cprofile: bool,
+                 memory: bool) -> None:
+        self.every = every
+        self.rate = rate
+        self.cprofile = cprofile
+        self.memory = memory
+        self.count = 0
+        self.sample: Optional[TSample] = None
+        self._random = random.Random()
+
+    def sampled(self) -> bool:
+        """Count a call and get whether it is sampled."""
+        self.count += 1
+        if self.rate is not None:
+            return self._random.random() < self.rate
+        return (self.count - 1) % self.every == 0
+
+    def profiled(self, func: Callable) -> Callable:
+        """Wrap the function to profile its calls.
+
+        The sample of the last call is kept in 'sample'.
+        """
+
+        def _run(**param: Any) -> Any:
+            self.sample = None
+            started = False
+            base = 0
+            if self.memory:
+                started = not tracemalloc.is_tracing()
+                if started:
+                    tracemalloc.start()
+                elif hasattr(tracemalloc, 'reset_peak'):
+                    tracemalloc.reset_peak()
+                base = tracemalloc.get_traced_memory()[0]
+            prof = cProfile.Profile() if self.cprofile else None
+            wall, cpu = time.perf_counter(), time.process_time()
+            if prof is not None:
+                prof.enable()
+            try:
+                res = func(**param)
+            finally:
+                if prof is not None:
+                    prof.disable()
+                wall = time.perf_counter() - wall
+                cpu = time.process_time() - cpu
+                peak = 0
+                if self.memory:
+                    peak = max(0, tracemalloc.get_traced_memory()[1] - base)
+                    if started:
+                        tracemalloc.stop()
+            stats = None
+            if prof is not None:
+                prof.create_stats()
+                stats = prof.stats  # type: ignore
+            self.sample = (wall, cpu, peak, stats)
+            return res
+
+        return _run
+
+    def take(self) -> Optional[TSample]:
+        """Get the sample of the last profiled call and clear it."""
+        sample, self.sample = self.sample, None
+        return sample
+
+
+class _Cost:
+    """Costs of samples."""
+
+    def __init__(self) -> None:
+        self.wall = Mean()
+        self.cpu = Mean()
+        self.peak = Mean()
+        self.peak_max = Max()
+
+    def update(self, sample: TSample) -> None:
+        wall, cpu, peak, _ = sample
+        self.wall.update(wall)
+        self.cpu.update(cpu)
+        self.peak.update(peak)
+        self.peak_max.update(peak)
+
+
+class Profiler:
+    """Profiler of target calls.
+
+    Sampled calls run under cProfile and tracemalloc in the process calling
+    them (each worker process counts its own calls) and samples are
+    aggregated in the main process. Times of sampled calls include the
+    profiling overhead. Hooks are not profiled.
+    """
+
+    def __init__(self,
+                 every: int = 1,
+                 rate: float = None,
+                 cprofile: bool = True,
+                 memory: bool = True) -> None:
+        """Initialize object.
+
+        Args:
+            every (int, optional): Sample every n-th call.
+            rate (float, optional): Sample calls with this probability
+                instead.
+            cprofile (bool, optional): Run sampled calls under cProfile.
+            memory (bool, optional): Measure peak allocation of sampled
+                calls with tracemalloc.
+
+        Raises:
+            ValueError: every under 1 or rate out of (0, 1].
+        """
+        if every < 1:
+            raise ValueError('every must be at least 1.')
+        if rate is not None and not 0 < rate <= 1:
+            raise ValueError('rate must be in (0, 1].')
+        self.every = every
+        self.rate = rate
+        self.cprofile = cprofile
+        self.memory = memory
+        # (key, value) -> cost. None -> all samples.
+        self.costs: Dict[Optional[Tuple[str, Hashable]], _Cost] = {}
+        self._stats: Dict[Optional[Tuple[str, Hashable]], pstats.Stats] = {}
+
+    def sampler(self) -> _Sampler:
+        """Create a sampler for a process.
+
+        Returns:
+            _Sampler: Sampler.
+        """
+        return _Sampler(self.every, self.rate, self.cprofile, self.memory)
+
+    @property
+    def samples(self) -> int:
+        """Get the number of samples."""
+        cost = self.costs.get(None)
+        return 0 if cost is None else cost.wall.count
+
+    def add(self, param: Dict[str, Any], sample: TSample) -> None:
+        """Add a sample.
+
+        Args:
+            param (Dict[str, Any]): Parameter of the call.
+            sample (TSample): Wall time, CPU time, peak allocation and
+                cProfile stats (or None).
+        """
+        groups: List[Optional[Tuple[str, Hashable]]] = [None]
+        groups += [(k, group_value(v)) for k, v in param.items()]
+        stats = sample[3]
+        for group in groups:
+            cost = self.costs.get(group)
+            if cost is None:
+                cost = self.costs[group] = _Cost()
+            cost.update(sample)
+            if stats is None:
+                continue
+            data = cast(Any, _StatsData(dict(stats)))
+            if group in self._stats:
+                self._stats[group].add(data)
+            else:
+                self._stats[group] = pstats.Stats(data)
+
+    def table(self, key: str = None) -> List[Dict[str, Any]]:
+        """Get the cost table per axis.
+
+        Args:
+            key (str, optional): Parameter key. Default to all keys.
+
+        Returns:
+            List[Dict[str, Any]]: Rows of key, value, samples, wall_mean,
+                cpu_mean, peak_mean, peak_max and relative (wall_mean over
+                the cheapest value of the key), by key and descending
+                wall_mean.
+        """
+        rows: List[Dict[str, Any]] = []
+        by_key: Dict[str, List[Tuple[Hashable, _Cost]]] = {}
+        for group, cost in self.costs.items():
+            if group is not None and key in (None, group[0]):
+                by_key.setdefault(group[0], []).append((group[1], cost))
+        for k, costs in by_key.items():
+            cheapest = min(c.wall.mean for _, c in costs)
+            costs.sort(key=lambda x: x[1].wall.mean, reverse=True)
+            for v, c in costs:
+                relative = float('inf')
+                if cheapest > 0:
+                    relative = c.wall.mean / cheapest
+                rows.append({
+                    'key': k,
+                    'value': v,
+                    'samples': c.wall.count,
+                    'wall_mean': c.wall.mean,
+                    'cpu_mean': c.cpu.mean,
+                    'peak_mean': c.peak.mean,
+                    'peak_max': c.peak_max.result(),
+                    'relative': relative,
+                })
+        return rows
+
+    def save_table(self, path: str, key: str = None) -> None:
+        """Save the cost table as CSV.
+
+        Args:
+            path (str): Path of CSV file.
+            key (str, optional): Parameter key. Default to all keys.
+        """
+        rows = self.table(key)
+        with open(path, 'w', newline='') as f:
+            fieldnames = [
+                'key',
+                'value',
+                'samples',
+                'wall_mean',
+                'cpu_mean',
+                'peak_mean',
+                'peak_max',
+                'relative',
+            ]
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(rows)
+
+    def stats(self, key: str = None, value: Any = None) -> pstats.Stats:
+        """Get cProfile stats of the sampled calls.
+
+        Args:
+            key (str, optional): Parameter key. Default to all calls.
+            value (Any, optional): Value of the key.
+
+        Raises:
+            KeyError: No stats of the value.
+
+        Returns:
+            pstats.Stats: Stats.
+        """
+        group = None if key is None else (key, group_value(value))
+        return self._stats[group]
+
+    def dump_stats(self,
+                   path: str,
+                   key: str = None,
+                   value: Any = None) -> None:
+        """Save cProfile stats as a pstats file (e.g. for snakeviz).
+
+        Args:
+            path (str): Path of pstats file.
+            key (str, optional): Parameter key. Default to all calls.
+            value (Any, optional): Value of the key.
+
+        Raises:
+            KeyError: No stats of the value.
+        """
+        self.stats(key, value).dump_stats(path)
@@ -0,0 +1,234 @@
+"""Progress.
+
+Throttled progress of a grid: per-axis position and an ETA from the
+observed cost of each value.
+"""
+
+import sys
+import time
+from typing import (Any, Iterable, Iterator, List, Optional, Sequence, TextIO,
+                    Tuple)
+
+from combu.definition import Pack, TParamsKey
+
+# Seconds between time checks, where costs are attributed.
+_CHECK_INTERVAL = 0.02
+
+
+def _key_name(k: TParamsKey) -> str:
+    """Get the display name of a key."""
+    if isinstance(k, Pack):
+        return ','.join(map(str, k.keys))
+    if isinstance(k, tuple):
+        return ','.join(map(str, k))
+    return str(k)
+
+
+def _format_time(seconds: float) -> str:
+    """Format seconds as [H:]MM:SS."""
+    m, s = divmod(int(seconds), 60)
+    h, m = divmod(m, 60)
+    if h > 0:
+        return '{}:{:02d}:{:02d}'.format(h, m, s)
+    return '{:02d}:{:02d}'.format(m, s)
+
+
+class Progress:
+    """Progress of an execution.
+
+    update() only counts, and the clock is read every few items (adapted
+    to the rate), so the cost per item is about a counter increment. On
+    each time check, the time since the previous check is attributed to
+    the current value of each axis. The ETA weights the remaining
+    combinations by these per-value costs (assumed independent across
+    axes). Written to stderr every 'interval' seconds.
+    """
+
+    def __init__(self,
+                 total: int = None,
+                 order: Sequence[TParamsKey] = None,
+                 sizes: Sequence[int] = None,
+                 ordered: bool = True,
+                 interval: float = 0.5,
+                 file: TextIO = None) -> None:
+        """Initialize object.
+
+        Args:
+            total (int, optional): Number of items.
+            order (Sequence[TParamsKey], optional): Keys of axes.
+            sizes (Sequence[int], optional): Number of values on each axis.
+            ordered (bool, optional): Items complete in product order, so
+                the remaining combinations follow the last index.
+            interval (float, optional): Seconds between writes.
+            file (TextIO, optional): Output. Default to stderr.
+        """
+        self.total = total
+        self.order = [] if order is None else list(order)
+        self.sizes = [] if sizes is None else list(sizes)
+        self.ordered = ordered
+        self.interval = interval
+        self.file = file
+        self.n = 0
+        self.index: Optional[Tuple[int, ...]] = None
+        # Per axis and value: attributed seconds and number of items.
+        self.costs = [[0.0] * n for n in self.sizes]
+        self.counts = [[0] * n for n in self.sizes]
+        self.start_time = time.monotonic()
+        self._check_time = self.start_time
+        self._check_n = 0
+        self._write_time = self.start_time
+        self._next = 1
+        self._width = 0
+
+    def update(self,
+               index: Optional[Tuple[int, ...]] = None,
+               n: int = 1) -> None:
+        """Count completed items.
+
+        Args:
+            index (Optional[Tuple[int, ...]], optional): Combination index
+                of the last item.
+            n (int, optional): Number of items.
+        """
+        self.n += n
+        if index is not None:
+            self.index = index
+        if self.n >= self._next:
+            self._check()
+
+    def iterate(self, iterable: Iterable[Any]) -> Iterator[Any]:
+        """Count each item when the next one is taken. Close at the end.
+
+        Args:
+            iterable (Iterable[Any]): Items.
+
+        Yields:
+            Iterator[Any]: Items.
+        """
+        try:
+            for item in iterable:
+                yield item
+                self.update()
+        finally:
+            self.close()
+
+    def _check(self) -> None:
+        """Attribute the time since the last check and write if due."""
+        now = time.monotonic()
+        dt = now - self._check_time
+        dn = self.n - self._check_n
+        if self.index is not None and len(self.index) == len(self.sizes):
+            for a, v in enumerate(self.index):
+                self.costs[a][v] += dt
+                self.counts[a][v] += dn
+        self._check_time = now
+        self._check_n = self.n
+        # Next check after about _CHECK_INTERVAL at the current rate.
+        rate = dn / dt if dt > 0 else 0.0
+        self._next = self.n + max(1, min(int(rate * _CHECK_INTERVAL), 1 << 16))
+        if now - self._write_time >= self.interval:
+            self._write_time = now
+            self._write(self.render())
+
+    @property
+    def elapsed(self) -> float:
+        """Get the elapsed seconds."""
+        return time.monotonic() - self.start_time
+
+    def _weights(self) -> List[List[float]]:
+        """Get the relative cost of each value. 1 if not observed."""
+        weights = []
+        for costs, counts in zip(self.costs, self.counts):
+            seconds, items = sum(costs), sum(counts)
+            mean = seconds / items if items > 0 and seconds > 0 else 0.0
+            weights.append([(c / k) / mean if k > 0 and mean > 0 else 1.0
+                            for c, k in zip(costs, counts)])
+        return weights
+
+    def _remaining_weight(self) -> float:
+        """Get the mean weight of remaining over completed combinations."""
+        if not self.ordered:
+            return 1.0
+        if self.index is None or len(self.index) != len(self.sizes):
+            return 1.0
+        weights = self._weights()
+        inner_weight = [1.0]
+        inner_count = [1]
+        for w in reversed(weights):
+            inner_weight.insert(0, inner_weight[0] * sum(w))
+            inner_count.insert(0, inner_count[0] * len(w))
+        # Combinations sharing the prefix before axis d and a greater value
+        # on axis d, with any values on inner axes.
+        rest_weight, rest_count = 0.0, 0
+        prefix = 1.0
+        for d, (w, i) in enumerate(zip(weights, self.index)):
+            rest_weight += prefix * sum(w[i + 1:]) * inner_weight[d + 1]
+            rest_count += (len(w) - i - 1) * inner_count[d + 1]
+            prefix *= w[i]
+        done_weight = inner_weight[0] - rest_weight
+        done_count = inner_count[0] - rest_count
+        if rest_count == 0 or done_count == 0 or done_weight <= 0:
+            return 1.0
+        return (rest_weight / rest_count) / (done_weight / done_count)
+
+    def eta(self) -> Optional[float]:
+        """Get the estimated seconds to complete.
+
+        Returns:
+            Optional[float]: Seconds. None without total or items.
+        """
+        if self.total is None or self.n == 0:
+            return None
+        per_item = self.elapsed / self.n
+        remaining = max(0, self.total - self.n)
+        return per_item * remaining * self._remaining_weight()
+
+    def position(self) -> str:
+        """Get the position on each axis (e.g. 'dataset 3/5, model 12/40').
+
+        Returns:
+            str: Position.
+        """
+        if self.index is None or len(self.index) != len(self.sizes):
+            return ''
+        return ', '.join(
+            '{} {}/{}'.format(_key_name(k), i + 1, n)
+            for k, i, n in zip(self.order, self.index, self.sizes))
+
+    def render(self) -> str:
+        """Get the progress line.
+
+        Returns:
+            str: Line.
+        """
+        elapsed = self.elapsed
+        if self.total is None:
+            parts = ['{}'.format(self.n)]
+        else:
+            percent = 100 * self.n / self.total if self.total > 0 else 100
+            parts = ['{}/{} {:3.0f}%'.format(self.n, self.total, percent)]
+        position = self.position()
+        if position != '':
+            parts.append(position)
+        rate = self.n / elapsed if elapsed > 0 else 0.0
+        parts.append('{:.1f}/s'.format(rate))
+        eta = self.eta()
+        times = _format_time(elapsed)
+        if eta is not None:
+            times += ' < ETA ' + _format_time(eta)
+        parts.append(times)
+        return ' | '.join(parts)
+
+    def _write(self, line: str) -> None:
+        """Overwrite the line on the output."""
+        file = sys.stderr if self.file is None else self.file
+        file.write('\r' + line.ljust(self._width))
+        file.flush()
+        self._width = len(line)
+
+    def close(self) -> None:
+        """Write the final line."""
+        self._write(self.render())
+        file = sys.stderr if self.file is None else self.file
+        file.write('\n')
+        file.flush()
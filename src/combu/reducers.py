@@ -0,0 +1,511 @@
+"""Reducers.
+
+Online aggregates of results, updated in O(1) (TopK and Histogram in
+O(log)) per result. Reducers are sinks and mergeable across shards.
+"""
+
+import abc
+import bisect
+import copy
+import heapq
+import math
+from typing import (Any, Callable, Dict, Hashable, Iterable, List, Optional,
+                    Sequence, Tuple, Union)
+
+from combu.sinks import Sink
+from combu.util import group_value
+
+TValue = Union[str, Callable[[Any], Any], None]
+
+
+class Reducer(Sink):
+    """Online reducer.
+
+    Written with results while executing. Not reset on open, so a reducer
+    accumulates over runs. Subclasses implement update(), merge() and
+    result().
+    """
+
+    # Arguments of the constructor, for empty().
+    _args: Tuple[tuple, dict]
+
+    def __new__(cls, *args: Any, **kwargs: Any) -> 'Reducer':
+        """Create object, keeping the arguments."""
+        self = super().__new__(cls)
+        self._args = (args, kwargs)
+        return self
+
+    def __init__(self, value: TValue = None) -> None:
+        """Initialize object.
+
+        Args:
+            value (TValue, optional): Value reduced. Key of a dict result
+                or function from result. Default to the result itself.
+        """
+        self.value = value
+
+    def get_value(self, res: Any) -> Any:
+        """Get the value from a result.
+
+        Args:
+            res (Any): Result.
+
+        Returns:
+            Any: Value.
+        """
+        if self.value is None:
+            return res
+        if callable(self.value):
+            return self.value(res)
+        return res[self.value]
+
+    def empty(self) -> 'Reducer':
+        """Get a new reducer with the same arguments and no value.
+
+        Returns:
+            Reducer: Reducer of the same type.
+        """
+        args, kwargs = copy.deepcopy(self._args)
+        return type(self)(*args, **kwargs)
+
+    def write(self, res: Any, param: Dict[str, Any],
+              index: Tuple[int, ...]) -> None:
+        """Update with a result.
+
+        Args:
+            res (Any): Result.
+            param (Dict[str, Any]): Parameter.
+            index (Tuple[int, ...]): Combination index.
+        """
+        self.update(self.get_value(res), param)
+
+    @abc.abstractmethod
+    def update(self, v: Any, param: Dict[str, Any] = None) -> None:
+        """Update with a value.
+
+        Args:
+            v (Any): Value.
+            param (Dict[str, Any], optional): Parameter of the value.
+        """
+        ...
+
+    @abc.abstractmethod
+    def merge(self, other: 'Reducer') -> None:
+        """Merge another reducer of the same type.
+
+        Args:
+            other (Reducer): Reducer.
+        """
+        ...
+
+    @abc.abstractmethod
+    def result(self) -> Any:
+        """Get the aggregate.
+
+        Returns:
+            Any: Aggregate.
+        """
+        ...
+
+
+class Count(Reducer):
+    """Number of results."""
+
+    def __init__(self, value: TValue = None) -> None:
+        """Initialize object.
+
+        Args:
+            value (TValue, optional): Value reduced.
+        """
+        super().__init__(value)
+        self.count = 0
+
+    def update(self, v: Any, param: Dict[str, Any] = None) -> None:
+        """Update with a value.
+
+        Args:
+            v (Any): Value.
+            param (Dict[str, Any], optional): Parameter of the value.
+        """
+        self.count += 1
+
+    def merge(self, other: 'Reducer') -> None:
+        """Merge another reducer.
+
+        Args:
+            other (Reducer): Reducer.
+        """
+        assert isinstance(other, Count)
+        self.count += other.count
+
+    def result(self) -> int:
+        """Get the number of results.
+
+        Returns:
+            int: Count.
+        """
+        return self.count
+
+
+class Sum(Reducer):
+    """Sum of values."""
+
+    def __init__(self, value: TValue = None) -> None:
+        """Initialize object.
+
+        Args:
+            value (TValue, optional): Value reduced.
+        """
+        super().__init__(value)
+        self.sum: Any = 0
+
+    def update(self, v: Any, param: Dict[str, Any] = None) -> None:
+        """Update with a value.
+
+        Args:
+            v (Any): Value.
+            param (Dict[str, Any], optional): Parameter of the value.
+        """
+        self.sum += v
+
+    def merge(self, other: 'Reducer') -> None:
+        """Merge another reducer.
+
+        Args:
+            other (Reducer): Reducer.
+        """
+        assert isinstance(other, Sum)
+        self.sum += other.sum
+
+    def result(self) -> Any:
+        """Get the sum.
+
+        Returns:
+            Any: Sum.
+        """
+        return self.sum
+
+
+class Mean(Reducer):
+    """Mean and variance of values (Welford's algorithm)."""
+
+    def __init__(self, value: TValue = None) -> None:
+        """Initialize object.
+
+        Args:
+            value (TValue, optional): Value reduced.
+        """
+        super().__init__(value)
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, v: Any, param: Dict[str, Any] = None) -> None:
+        """Update with a value.
+
+        Args:
+            v (Any): Value.
+            param (Dict[str, Any], optional): Parameter of the value.
+        """
+        self.count += 1
+        delta = v - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (v - self.mean)
+
+    def merge(self, other: 'Reducer') -> None:
+        """Merge another reducer (Chan's parallel algorithm).
+
+        Args:
+            other (Reducer): Reducer.
+        """
+        assert isinstance(other, Mean)
+        count = self.count + other.count
+        if count == 0:
+            return
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta**2 * self.count * other.count / count
+        self.count = count
+
+    @property
+    def variance(self) -> float:
+        """Get the sample variance. NaN with less than 2 values."""
+        if self.count < 2:
+            return math.nan
+        return self.m2 / (self.count - 1)
+
+    @property
+    def std(self) -> float:
+        """Get the sample standard deviation."""
+        return math.sqrt(self.variance)
+
+    def result(self) -> float:
+        """Get the mean.
+
+        Returns:
+            float: Mean. NaN without values.
+        """
+        return self.mean if self.count > 0 else math.nan
+
+
+class Max(Reducer):
+    """Maximum value and its parameter."""
+
+    _sign = 1
+
+    def __init__(self, value: TValue = None) -> None:
+        """Initialize object.
+
+        Args:
+            value (TValue, optional): Value reduced.
+        """
+        super().__init__(value)
+        self.best: Any = None
+        self.param: Optional[Dict[str, Any]] = None
+
+    def _better(self, v: Any) -> bool:
+        """Whether a value is better than the current one."""
+        if self.best is None:
+            return True
+        return v > self.best if self._sign > 0 else v < self.best
+
+    def update(self, v: Any, param: Dict[str, Any] = None) -> None:
+        """Update with a value.
+
+        Args:
+            v (Any): Value.
+            param (Dict[str, Any], optional): Parameter of the value.
+        """
+        if self._better(v):
+            self.best = v
+            self.param = param
+
+    def merge(self, other: 'Reducer') -> None:
+        """Merge another reducer.
+
+        Args:
+            other (Reducer): Reducer.
+        """
+        assert isinstance(other, type(self))
+        if other.best is not None:
+            self.update(other.best, other.param)
+
+    def result(self) -> Any:
+        """Get the best value.
+
+        Returns:
+            Any: Value. None without values.
+        """
+        return self.best
+
+
+class Min(Max):
+    """Minimum value and its parameter."""
+
+    _sign = -1
+
+
+class ArgMax(Max):
+    """Parameter of the maximum value."""
+
+    def result(self) -> Optional[Dict[str, Any]]:
+        """Get the parameter of the maximum.
+
+        Returns:
+            Optional[Dict[str, Any]]: Parameter. None without values.
+        """
+        return self.param
+
+
+class ArgMin(Min):
+    """Parameter of the minimum value."""
+
+    def result(self) -> Optional[Dict[str, Any]]:
+        """Get the parameter of the minimum.
+
+        Returns:
+            Optional[Dict[str, Any]]: Parameter. None without values.
+        """
+        return self.param
+
+
+class TopK(Reducer):
+    """Top k values and their parameters (heap)."""
+
+    def __init__(self,
+                 k: int,
+                 value: TValue = None,
+                 largest: bool = True) -> None:
+        """Initialize object.
+
+        Args:
+            k (int): Number of values kept.
+            value (TValue, optional): Value reduced.
+            largest (bool, optional): Keep the largest or the smallest.
+        """
+        super().__init__(value)
+        self.k = k
+        self.largest = largest
+        # Min-heap of (key, tie breaker, value, param). Root is the worst.
+        self.heap: List[Tuple[Any, int, Any, Any]] = []
+        self._n = 0
+
+    def update(self, v: Any, param: Dict[str, Any] = None) -> None:
+        """Update with a value.
+
+        Args:
+            v (Any): Value.
+            param (Dict[str, Any], optional): Parameter of the value.
+        """
+        # Earlier values win ties.
+        self._n += 1
+        item = (v if self.largest else -v, -self._n, v, param)
+        if len(self.heap) < self.k:
+            heapq.heappush(self.heap, item)
+        elif item[:2] > self.heap[0][:2]:
+            heapq.heapreplace(self.heap, item)
+
+    def merge(self, other: 'Reducer') -> None:
+        """Merge another reducer.
+
+        Args:
+            other (Reducer): Reducer.
+        """
+        assert isinstance(other, TopK)
+        for _, _, v, param in sorted(other.heap, reverse=True):
+            self.update(v, param)
+
+    def result(self) -> List[Tuple[Any, Optional[Dict[str, Any]]]]:
+        """Get the top k, best first.
+
+        Returns:
+            List[Tuple[Any, Optional[Dict[str, Any]]]]: Value and parameter.
+        """
+        return [(v, param) for _, _, v, param in sorted(
+            self.heap, key=lambda x: x[:2], reverse=True)]
+
+
+class Histogram(Reducer):
+    """Histogram of values."""
+
+    def __init__(self, bins: Sequence[float], value: TValue = None) -> None:
+        """Initialize object.
+
+        Args:
+            bins (Sequence[float]): Increasing bin edges. Values are counted
+                in [edge[i], edge[i + 1]), the last bin includes its right
+                edge.
+            value (TValue, optional): Value reduced.
+
+        Raises:
+            ValueError: Less than 2 edges or not increasing.
+        """
+        super().__init__(value)
+        self.bins = list(bins)
+        if len(self.bins) < 2:
+            raise ValueError('bins needs at least 2 edges.')
+        if any(a >= b for a, b in zip(self.bins, self.bins[1:])):
+            raise ValueError('bins must be increasing.')
+        self.counts = [0] * (len(self.bins) - 1)
+        self.underflow = 0
+        self.overflow = 0
+
+    def update(self, v: Any, param: Dict[str, Any] = None) -> None:
+        """Update with a value.
+
+        Args:
+            v (Any): Value.
+            param (Dict[str, Any], optional): Parameter of the value.
+        """
+        if v < self.bins[0]:
+            self.underflow += 1
+        elif v > self.bins[-1]:
+            self.overflow += 1
+        else:
+            i = bisect.bisect_right(self.bins, v) - 1
+            self.counts[min(i, len(self.counts) - 1)] += 1
+
+    def merge(self, other: 'Reducer') -> None:
+        """Merge another reducer with the same bins.
+
+        Args:
+            other (Reducer): Reducer.
+
+        Raises:
+            ValueError: Different bins.
+        """
+        assert isinstance(other, Histogram)
+        if self.bins != other.bins:
+            raise ValueError('Different bins.')
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.underflow += other.underflow
+        self.overflow += other.overflow
+
+    def result(self) -> List[int]:
+        """Get the counts of bins.
+
+        Returns:
+            List[int]: Counts. Out of range values are not included.
+        """
+        return list(self.counts)
+
+
+class GroupBy(Sink):
+    """Reducers per group of parameter values."""
+
+    def __init__(self, keys: Union[str, Iterable[str]],
+                 reducer: Reducer) -> None:
+        """Initialize object.
+
+        Args:
+            keys (Union[str, Iterable[str]]): Parameter key or keys of
+                groups.
+            reducer (Reducer): Prototype. Each group gets an empty copy
+                (see Reducer.empty()), even if the prototype has values.
+        """
+        self.single = isinstance(keys, str)
+        self.keys = [keys] if isinstance(keys, str) else list(keys)
+        self.reducer = reducer
+        self.groups: Dict[Hashable, Reducer] = {}
+
+    def _group(self, param: Dict[str, Any]) -> Reducer:
+        """Get the reducer of the group of a parameter."""
+        vals = tuple(group_value(param.get(k)) for k in self.keys)
+        group = vals[0] if self.single else vals
+        reducer = self.groups.get(group)
+        if reducer is None:
+            reducer = self.reducer.empty()
+            self.groups[group] = reducer
+        return reducer
+
+    def write(self, res: Any, param: Dict[str, Any],
+              index: Tuple[int, ...]) -> None:
+        """Update the reducer of the group.
+
+        Args:
+            res (Any): Result.
+            param (Dict[str, Any]): Parameter. Missing keys group as None.
+            index (Tuple[int, ...]): Combination index.
+        """
+        self._group(param).write(res, param, index)
+
+    def merge(self, other: 'GroupBy') -> None:
+        """Merge another GroupBy.
+
+        Args:
+            other (GroupBy): GroupBy with the same keys.
+        """
+        for group, reducer in other.groups.items():
+            if group in self.groups:
+                self.groups[group].merge(reducer)
+            else:
+                self.groups[group] = copy.deepcopy(reducer)
+
+    def result(self) -> Dict[Hashable, Any]:
+        """Get the aggregate of each group.
+
+        Returns:
+            Dict[Hashable, Any]: Aggregate by group value (tuple of values
+                for multiple keys).
+        """
+        return {group: r.result() for group, r in self.groups.items()}
@@ -0,0 +1,188 @@
+"""Scheduler.
+
+Early-stopping schedulers over the combination grid.
+One key is treated as the resource (epochs, sample size, ...) and its values
+are the budgets of the rungs.
+"""
+
+import itertools
+import math
+from typing import (Any, Callable, cast, Dict, Iterable, Iterator, List,
+                    Optional, Tuple)
+
+from combu.definition import TParams
+from combu.execution import execute_values
+from combu.generator import create_values
+from combu.parallel import ParallelExecutor
+from combu.sequence import MAX_AXES
+
+
+def _split_resource(params: TParams, resource: str) -> Tuple[TParams, list]:
+    if resource not in params:
+        raise KeyError(resource)
+    budgets = [v for v in params[resource]]  # noqa: C416
+    if len(budgets) == 0:
+        raise ValueError('No budget on resource: {}'.format(resource))
+    grid = {k: v for k, v in params.items() if k != resource}
+    return grid, budgets
+
+
+def _executor(func: Callable, n_jobs: int,
+              progress: bool) -> Optional[ParallelExecutor]:
+    """Get a started executor shared by the rungs. None with n_jobs=1."""
+    if n_jobs == 1:
+        return None
+    n = None if n_jobs < 0 else n_jobs
+    parallel = ParallelExecutor(func, n=n, progress=progress)
+    parallel.start()
+    return parallel
+
+
+def _halving(
+    func: Callable,
+    configs: List[Dict[str, Any]],
+    resource: str,
+    budgets: list,
+    score: Callable[[Any], float],
+    eta: int,
+    parallel: Optional[ParallelExecutor],
+    progress: bool,
+) -> Iterator[Tuple[Any, Dict[str, Any]]]:
+    """Run configurations through the rungs and keep the top 1/eta."""
+    for rung, budget in enumerate(budgets):
+        values = [{**config, resource: budget} for config in configs]
+        scores: Dict[int, float] = {}
+        # Executors yield the given parameter objects, possibly out of order.
+        position = {id(v): i for i, v in enumerate(values)}
+        if parallel is None:
+            results = execute_values(func,
+                                     values,
+                                     progress=progress,
+                                     total=len(values))
+        else:
+            results = parallel.execute(values, total=len(values))
+        for res, param in results:
+            scores[position[id(param)]] = score(res)
+            yield res, param
+
+        if rung == len(budgets) - 1:
+            break
+        n_keep = max(len(configs) // eta, 1)
+        # Stable sort keeps ties in grid order.
+        ranking = sorted(range(len(configs)), key=lambda i: -scores[i])
+        configs = [configs[i] for i in sorted(ranking[:n_keep])]
+
+
+def successive_halving(
+    func: Callable,
+    params: dict,
+    resource: str,
+    score: Callable[[Any], float],
+    eta: int = 3,
+    order: Iterable = None,
+    n_jobs: int = 1,
+    progress: bool = False,
+) -> Iterator[Tuple[Any, Dict[str, Any]]]:
+    """Execute the function with successive halving.
+
+    Every combination runs with the smallest budget, the top 1/eta by score
+    is promoted to the next budget, and so on until the largest budget.
+
+    Args:
+        func (Callable): Target function.
+        params (TParams): Parameters.
+        resource (str): Resource key. Its values are the budgets
+            (ascending).
+        score (Callable[[Any], float]): Score from result.
+            Higher is better.
+        eta (int, optional): Reduction factor.
+        order (Iterable[TParamsKey], optional): Loop order.
+        n_jobs (int, optional): Number of processes, kept across rungs.
+            Default to 1.
+        progress (bool, optional): Show progress bar or not.
+
+    Raises:
+        KeyError: Unknown resource key.
+        ValueError: No budget or eta less than 2.
+
+    Yields:
+        Iterator[Tuple[Any, Dict[str, Any]]]: Result and parameter
+            (with the resource) of every rung.
+    """
+    if eta < 2:
+        raise ValueError('eta must be at least 2.')
+    grid, budgets = _split_resource(cast(TParams, params), resource)
+    configs = list(create_values(grid, order=order))
+    parallel = _executor(func, n_jobs, progress)
+    try:
+        yield from _halving(func, configs, resource, budgets, score, eta,
+                            parallel, progress)
+    finally:
+        if parallel is not None:
+            parallel.close()
+
+
+def hyperband(
+    func: Callable,
+    params: dict,
+    resource: str,
+    score: Callable[[Any], float],
+    eta: int = 3,
+    order: Iterable = None,
+    n_jobs: int = 1,
+    progress: bool = False,
+    sequence: str = None,
+) -> Iterator[Tuple[Any, Dict[str, Any]]]:
+    """Execute the function with Hyperband.
+
+    Runs successive halving brackets that start at each rung. Every bracket
+    takes the next combinations of the grid in 'sequence' order, so small
+    brackets still spread over every axis.
+
+    Args:
+        func (Callable): Target function.
+        params (TParams): Parameters.
+        resource (str): Resource key. Its values are the budgets
+            (ascending).
+        score (Callable[[Any], float]): Score from result.
+            Higher is better.
+        eta (int, optional): Reduction factor.
+        order (Iterable[TParamsKey], optional): Loop order.
+        n_jobs (int, optional): Number of processes, kept across rungs.
+            Default to 1.
+        progress (bool, optional): Show progress bar or not.
+        sequence (str, optional): Enumeration order of the grid. Default to
+            'sobol', or 'lhs' for grids with more axes than Sobol supports.
+
+    Raises:
+        KeyError: Unknown resource key.
+        ValueError: No budget, eta less than 2 or unknown sequence.
+
+    Yields:
+        Iterator[Tuple[Any, Dict[str, Any]]]: Result and parameter
+            (with the resource) of every rung.
+    """
+    if eta < 2:
+        raise ValueError('eta must be at least 2.')
+    grid, budgets = _split_resource(cast(TParams, params), resource)
+    if sequence is None:
+        sequence = 'sobol'
+        if len(grid) > MAX_AXES['sobol']:
+            sequence = 'lhs'
+    configs = list(create_values(grid, order=order, sequence=sequence))
+    if len(configs) == 0:
+        return
+
+    s_max = len(budgets) - 1
+    stream = itertools.cycle(configs)
+    parallel = _executor(func, n_jobs, progress)
+    try:
+        for s in range(s_max, -1, -1):
+            n = math.ceil((s_max + 1) / (s + 1) * eta**s)
+            n = min(n, len(configs))
+            bracket = list(itertools.islice(stream, n))
+            yield from _halving(func, bracket, resource, budgets[s_max - s:],
+                                score, eta, parallel, progress)
+    finally:
+        if parallel is not None:
+            parallel.close()
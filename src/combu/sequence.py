@@ -0,0 +1,286 @@
+"""Sequence.
+
+Enumeration orders over the combination index grid.
+"""
+
+import itertools
+import math
+import random
+from typing import Callable, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+TIndex = Tuple[int, ...]
+
+# Number of quasi-random points drawn per combination before the remaining
+# cells are swept with a stride.
+_OVERSAMPLE = 2
+
+# Fraction of the number of cells stepped by the sweep of remaining cells.
+_GOLDEN = (5**0.5 - 1) / 2
+
+_PRIMES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43, 47, 53, 59, 61,
+           67, 71, 73, 79, 83, 89, 97)
+
+# Sobol direction numbers (Joe and Kuo, new-joe-kuo-6.21201).
+# (s, a, m_1, ..., m_s) for the 2nd dimension onwards.
+_SOBOL_DIRECTIONS = (
+    (1, 0, (1,)),
+    (2, 1, (1, 3)),
+    (3, 1, (1, 3, 1)),
+    (3, 2, (1, 1, 1)),
+    (4, 1, (1, 1, 3, 3)),
+    (4, 4, (1, 3, 5, 13)),
+    (5, 2, (1, 1, 5, 5, 17)),
+    (5, 4, (1, 1, 5, 5, 5)),
+    (5, 7, (1, 1, 7, 11, 19)),
+    (5, 11, (1, 1, 5, 1, 1)),
+    (5, 13, (1, 1, 1, 3, 11)),
+    (5, 14, (1, 3, 5, 5, 31)),
+    (6, 1, (1, 3, 3, 9, 7, 49)),
+    (6, 13, (1, 1, 1, 15, 21, 21)),
+    (6, 16, (1, 3, 1, 13, 27, 49)),
+    (6, 19, (1, 1, 1, 15, 7, 5)),
+    (6, 22, (1, 3, 1, 15, 13, 25)),
+    (6, 25, (1, 1, 5, 5, 19, 61)),
+    (7, 1, (1, 3, 7, 11, 23, 15, 103)),
+    (7, 4, (1, 3, 7, 13, 13, 15, 69)),
+)
+
+_SOBOL_BITS = 32
+
+# Maximum number of axes of the quasi-random sequences.
+MAX_AXES = {'halton': len(_PRIMES), 'sobol': len(_SOBOL_DIRECTIONS) + 1}
+
+
+def product(sizes: Sequence[int]) -> Iterator[TIndex]:
+    """Enumerate indexes in nested loop order.
+
+    Args:
+        sizes (Sequence[int]): Number of values on each axis.
+
+    Returns:
+        Iterator[TIndex]: Index.
+    """
+    return itertools.product(*[range(n) for n in sizes])
+
+
+def gray(sizes: Sequence[int]) -> Iterator[TIndex]:
+    """Enumerate indexes in reflected mixed-radix Gray code order.
+
+    Consecutive indexes differ on exactly one axis, by one. As in product
+    order, the last axis moves fastest, but each axis sweeps back instead
+    of restarting when an outer axis moves.
+
+    Args:
+        sizes (Sequence[int]): Number of values on each axis.
+
+    Returns:
+        Iterator[TIndex]: Index.
+    """
+    if 0 in sizes:
+        return iter([])
+    return _gray(list(sizes))
+
+
+def _gray(sizes: List[int]) -> Iterator[TIndex]:
+    index = [0] * len(sizes)
+    step = [1] * len(sizes)
+    yield tuple(index)
+    while True:
+        # Move the innermost axis not at the end of its sweep; reverse the
+        # sweeps of the axes inside it.
+        axis = len(sizes) - 1
+        while axis >= 0:
+            i = index[axis] + step[axis]
+            if 0 <= i < sizes[axis]:
+                index[axis] = i
+                break
+            step[axis] = -step[axis]
+            axis -= 1
+        if axis < 0:
+            return
+        yield tuple(index)
+
+
+def _radical_inverse(k: int, base: int) -> float:
+    result = 0.0
+    f = 1.0 / base
+    while k > 0:
+        k, r = divmod(k, base)
+        result += r * f
+        f /= base
+    return result
+
+
+def _halton_points(dim: int) -> Iterator[List[float]]:
+    if dim > MAX_AXES['halton']:
+        raise ValueError('Halton supports up to {} axes.'.format(
+            MAX_AXES['halton']))
+    bases = _PRIMES[:dim]
+    for k in itertools.count():
+        yield [_radical_inverse(k, b) for b in bases]
+
+
+def _sobol_directions(dim: int) -> List[List[int]]:
+    if dim > MAX_AXES['sobol']:
+        raise ValueError('Sobol supports up to {} axes.'.format(
+            MAX_AXES['sobol']))
+    bits = _SOBOL_BITS
+    result = [[1 << (bits - k) for k in range(1, bits + 1)]]
+    for s, a, m in _SOBOL_DIRECTIONS[:dim - 1]:
+        v = [m_k << (bits - k) for k, m_k in enumerate(m, 1)]
+        for k in range(s, bits):
+            x = v[k - s] ^ (v[k - s] >> s)
+            for j in range(1, s):
+                if (a >> (s - 1 - j)) & 1:
+                    x ^= v[k - j]
+            v.append(x)
+        result.append(v)
+    return result
+
+
+def _sobol_points(dim: int) -> Iterator[List[float]]:
+    directions = _sobol_directions(dim)
+    scale = 1.0 / (1 << _SOBOL_BITS)
+    x = [0] * dim
+    for n in range(1 << _SOBOL_BITS):
+        yield [v * scale for v in x]
+        # Index of the rightmost zero bit.
+        c = 0
+        while (n >> c) & 1:
+            c += 1
+        x = [v ^ d[c] for v, d in zip(x, directions)]
+
+
+def _latin_hypercube_points(sizes: Sequence[int],
+                            seed: int = 0) -> Iterator[List[float]]:
+    rand = random.Random(seed)
+    m = max(sizes)
+    while True:
+        columns = []
+        for n in sizes:
+            # Each value of the axis appears floor or ceil of m / n times.
+            col = [(j * n // m + 0.5) / n for j in range(m)]
+            rand.shuffle(col)
+            columns.append(col)
+        for point in zip(*columns):
+            yield list(point)
+
+
+def _from_points(sizes: Sequence[int],
+                 points: Iterable[List[float]]) -> Iterator[TIndex]:
+    """Map points on the unit cube to unique indexes.
+
+    Every index is yielded exactly once. Points falling on a visited cell are
+    skipped, and the cells not reached after oversampling are swept with a
+    stride coprime with the number of cells (about its golden ratio), so that
+    the tail also spreads over the grid.
+    """
+    total = 1
+    for n in sizes:
+        total *= n
+    if total == 0:
+        return
+
+    strides: List[int] = []
+    stride = 1
+    for n in reversed(sizes):
+        strides.insert(0, stride)
+        stride *= n
+
+    visited = bytearray((total + 7) // 8)
+    n_visited = 0
+    for point in itertools.islice(points, total * _OVERSAMPLE):
+        idx = tuple(min(int(u * n), n - 1) for u, n in zip(point, sizes))
+        pos = sum(i * s for i, s in zip(idx, strides))
+        if visited[pos >> 3] & (1 << (pos & 7)):
+            continue
+        visited[pos >> 3] |= 1 << (pos & 7)
+        n_visited += 1
+        yield idx
+        if n_visited == total:
+            return
+
+    step = max(round(total * _GOLDEN), 1)
+    while math.gcd(step, total) != 1:
+        step += 1
+    pos = 0
+    for _ in range(total):
+        if not visited[pos >> 3] & (1 << (pos & 7)):
+            yield tuple(pos // s % n for s, n in zip(strides, sizes))
+        pos = (pos + step) % total
+
+
+def halton(sizes: Sequence[int]) -> Iterator[TIndex]:
+    """Enumerate indexes along the Halton sequence.
+
+    Args:
+        sizes (Sequence[int]): Number of values on each axis.
+
+    Raises:
+        ValueError: Too many axes.
+
+    Yields:
+        Iterator[TIndex]: Index.
+    """
+    return _from_points(sizes, _halton_points(len(sizes)))
+
+
+def sobol(sizes: Sequence[int]) -> Iterator[TIndex]:
+    """Enumerate indexes along the Sobol sequence.
+
+    Args:
+        sizes (Sequence[int]): Number of values on each axis.
+
+    Raises:
+        ValueError: Too many axes.
+
+    Yields:
+        Iterator[TIndex]: Index.
+    """
+    return _from_points(sizes, _sobol_points(len(sizes)))
+
+
+def latin_hypercube(sizes: Sequence[int], seed: int = 0) -> Iterator[TIndex]:
+    """Enumerate indexes by repeated Latin hypercube designs.
+
+    Args:
+        sizes (Sequence[int]): Number of values on each axis.
+        seed (int, optional): Seed value.
+
+    Yields:
+        Iterator[TIndex]: Index.
+    """
+    if 0 in sizes:
+        return iter([])
+    if len(sizes) == 0:
+        return iter([()])
+    return _from_points(sizes, _latin_hypercube_points(sizes, seed=seed))
+
+
+SEQUENCES: Dict[str, Callable[[Sequence[int]], Iterator[TIndex]]] = {
+    'product': product,
+    'gray': gray,
+    'halton': halton,
+    'sobol': sobol,
+    'lhs': latin_hypercube,
+}
+
+
+def create_index(sizes: Sequence[int],
+                 sequence: str = 'product') -> Iterator[TIndex]:
+    """Create combination index.
+
+    Args:
+        sizes (Sequence[int]): Number of values on each axis.
+        sequence (str, optional): Enumeration order.
+            'product', 'gray', 'halton', 'sobol' or 'lhs'.
+
+    Raises:
+        ValueError: Unknown sequence.
+
+    Returns:
+        Iterator[TIndex]: Index.
+    """
+    if sequence not in SEQUENCES:
+        raise ValueError('Unknown sequence: {}'.format(sequence))
+    return SEQUENCES[sequence](sizes)
@@ -0,0 +1,386 @@
+"""Sinks.
+
+Consumers of (result, parameter) written while executing.
+"""
+
+import abc
+from typing import (Any, Dict, Iterable, List, Optional, Sequence, Tuple,
+                    Union)
+
+from combu.definition import TParamsKey
+
+
+class Sink(abc.ABC):
+    """Result sink.
+
+    Opened with the axes before the first result, written with each result
+    (possibly out of order) and closed at the end, even on error.
+    Subclasses implement write().
+    """
+
+    def open(  # noqa: A003, B027
+            self, order: List[TParamsKey],
+            combs_list: List[List[Dict[str, Any]]]) -> None:
+        """Open the sink.
+
+        Args:
+            order (List[TParamsKey]): Loop order (keys of axes).
+            combs_list (List[List[Dict[str, Any]]]): Standardized
+                parameters (values of axes).
+        """
+        ...
+
+    @abc.abstractmethod
+    def write(self, res: Any, param: Dict[str, Any],
+              index: Tuple[int, ...]) -> None:
+        """Write a result.
+
+        Args:
+            res (Any): Result.
+            param (Dict[str, Any]): Parameter.
+            index (Tuple[int, ...]): Combination index (position on each
+                axis).
+        """
+        ...
+
+    def close(self) -> None:  # noqa: B027
+        """Close the sink."""
+        ...
+
+
+TSinks = Union[Sink, Iterable[Sink], None]
+
+
+def as_sinks(sink: TSinks) -> List[Sink]:
+    """Get sinks as list.
+
+    Args:
+        sink (TSinks): A sink, sinks or None.
+
+    Returns:
+        List[Sink]: Sinks.
+    """
+    if sink is None:
+        return []
+    if isinstance(sink, Sink):
+        return [sink]
+    return list(sink)
+
+
+def close_sinks(sinks: Iterable[Sink]) -> None:
+    """Close every sink, even if one of them raises.
+
+    Args:
+        sinks (Iterable[Sink]): Sinks.
+
+    Raises:
+        Exception: First error of closing, after closing the others.
+    """
+    error: Optional[Exception] = None
+    for s in sinks:
+        try:
+            s.close()
+        except Exception as e:  # noqa: B902
+            if error is None:
+                error = e
+    if error is not None:
+        raise error
+
+
+class Tensor(Sink):
+    """N-dimensional result array shaped like the grid.
+
+    Each result is written into its cell, so results arriving out of order
+    (parallel) are placed correctly. Requires numpy.
+    With 'path', the array is a memory-mapped .npy file and the axes are
+    saved to '<path>.axes.pkl'.
+    """
+
+    def __init__(self,
+                 path: str = None,
+                 dtype: Any = 'float64',
+                 item_shape: Sequence[int] = (),
+                 fill_value: Any = None) -> None:
+        """Initialize object.
+
+        Args:
+            path (str, optional): Path of .npy file. Default to in memory.
+            dtype (Any, optional): Data type.
+            item_shape (Sequence[int], optional): Shape of each result.
+            fill_value (Any, optional): Value of cells without result.
+                Default to NaN for float, 0 for others.
+        """
+        self.path = path
+        self.dtype = dtype
+        self.item_shape = tuple(item_shape)
+        self.fill_value = fill_value
+        self.array: Any = None
+        self.order: List[TParamsKey] = []
+        self.labels: List[List[Dict[str, Any]]] = []
+
+    def open(  # noqa: A003
+            self, order: List[TParamsKey],
+            combs_list: List[List[Dict[str, Any]]]) -> None:
+        """Allocate the array.
+
+        Args:
+            order (List[TParamsKey]): Loop order (keys of axes).
+            combs_list (List[List[Dict[str, Any]]]): Standardized
+                parameters (values of axes).
+        """
+        import numpy as np
+
+        shape = tuple(len(combs) for combs in combs_list) + self.item_shape
+        dtype = np.dtype(self.dtype)
+        fill_value = self.fill_value
+        if fill_value is None:
+            fill_value = np.nan if dtype.kind in 'fc' else 0
+
+        self.order = list(order)
+        self.labels = combs_list
+        if self.path is None:
+            self.array = np.full(shape, fill_value, dtype=dtype)
+            return
+
+        self.array = np.lib.format.open_memmap(self.path,
+                                               mode='w+',
+                                               dtype=dtype,
+                                               shape=shape)
+        self.array[...] = fill_value
+        import pickle
+        with open(self.path + '.axes.pkl', 'wb') as f:
+            pickle.dump({'order': self.order, 'labels': self.labels}, f)
+
+    def write(self, res: Any, param: Dict[str, Any],
+              index: Tuple[int, ...]) -> None:
+        """Write a result into its cell.
+
+        Args:
+            res (Any): Result.
+            param (Dict[str, Any]): Parameter.
+            index (Tuple[int, ...]): Combination index.
+        """
+        self.array[index] = res
+
+    def close(self) -> None:
+        """Flush the memory-mapped file."""
+        if self.path is not None and self.array is not None:
+            self.array.flush()
+
+
+def load_tensor(path: str) -> Tuple[Any, List[TParamsKey], list]:
+    """Load a tensor written by Tensor sink.
+
+    Args:
+        path (str): Path of .npy file.
+
+    Returns:
+        Tuple[np.ndarray, List[TParamsKey], list]: Array (memory-mapped,
+            read only), loop order and standardized values of each axis.
+    """
+    import pickle
+
+    import numpy as np
+
+    array = np.load(path, mmap_mode='r')
+    with open(path + '.axes.pkl', 'rb') as f:
+        axes = pickle.load(f)
+    return array, axes['order'], axes['labels']
+
+
+class BufferedSink(Sink):
+    """Buffered record sink.
+
+    Records (parameter and result) are written in batches of 'buffer_size',
+    optionally encoded and written on a background thread.
+    Subclasses implement _write_records() and may override _open_output()
+    and _close_output(), which open a file on 'path' by default.
+    """
+
+    def __init__(self,
+                 path: str,
+                 buffer_size: int = 1024,
+                 background: bool = False,
+                 result_key: str = 'result') -> None:
+        """Initialize object.
+
+        Args:
+            path (str): Path of output.
+            buffer_size (int, optional): Number of records per write.
+            background (bool, optional): Write on a background thread.
+            result_key (str, optional): Key of result that is not a dict.
+
+        Raises:
+            ValueError: buffer_size less than 1.
+        """
+        if buffer_size < 1:
+            raise ValueError('buffer_size must be at least 1.')
+        self.path = path
+        self.buffer_size = buffer_size
+        self.background = background
+        self.result_key = result_key
+        self.keys: List[Any] = []
+        self._buffer: List[Dict[Any, Any]] = []
+        self._opened = False
+        self._file: Any = None
+        self._queue: Any = None
+        self._thread: Any = None
+        self._error: Optional[Exception] = None
+
+    def open(  # noqa: A003
+            self, order: List[TParamsKey],
+            combs_list: List[List[Dict[str, Any]]]) -> None:
+        """Open the output.
+
+        Args:
+            order (List[TParamsKey]): Loop order (keys of axes).
+            combs_list (List[List[Dict[str, Any]]]): Standardized
+                parameters (values of axes).
+        """
+        keys: Dict[Any, None] = {}
+        for combs in combs_list:
+            for comb in combs:
+                keys.update(dict.fromkeys(comb))
+        self.keys = list(keys)
+        self._buffer = []
+        self._error = None
+        self._open_output()
+        self._opened = True
+        if self.background:
+            import queue
+            import threading
+            self._queue = queue.Queue(maxsize=4)
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def write(self, res: Any, param: Dict[str, Any],
+              index: Tuple[int, ...]) -> None:
+        """Buffer a record of parameter and result.
+
+        A dict result is merged into the record.
+
+        Args:
+            res (Any): Result.
+            param (Dict[str, Any]): Parameter.
+            index (Tuple[int, ...]): Combination index.
+        """
+        if isinstance(res, dict):
+            self._buffer.append({**param, **res})
+        else:
+            self._buffer.append({**param, self.result_key: res})
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write buffered records.
+
+        Raises:
+            Exception: Error of writing or on background thread. The
+                records stay buffered.
+        """
+        if self._error is not None:
+            raise self._error
+        if len(self._buffer) == 0:
+            return
+        if self._thread is None:
+            self._write_records(self._buffer)
+            self._buffer = []
+        else:
+            records, self._buffer = self._buffer, []
+            self._queue.put(records)
+
+    def close(self) -> None:
+        """Flush and close the output.
+
+        Raises:
+            Exception: Error on background thread.
+        """
+        if not self._opened:
+            return
+        try:
+            self.flush()
+        finally:
+            if self._thread is not None:
+                self._queue.put(None)
+                self._thread.join()
+                self._thread = None
+            self._opened = False
+            self._close_output()
+        if self._error is not None:
+            raise self._error
+
+    def _run(self) -> None:
+        """Write records on background thread."""
+        while True:
+            records = self._queue.get()
+            if records is None:
+                return
+            if self._error is not None:
+                continue
+            try:
+                self._write_records(records)
+            except Exception as e:  # noqa: B902
+                self._error = e
+
+    def _open_output(self) -> None:
+        """Open the output."""
+        self._file = open(self.path, 'w', newline='')
+
+    def _close_output(self) -> None:
+        """Close the output."""
+        self._file.close()
+        self._file = None
+
+    @abc.abstractmethod
+    def _write_records(self, records: List[Dict[Any, Any]]) -> None:
+        """Encode and write records."""
+        ...
+
+
+class JSONL(BufferedSink):
+    """JSON Lines file. A record per line.
+
+    Values which are not JSON serializable are written as str.
+    """
+
+    def _write_records(self, records: List[Dict[Any, Any]]) -> None:
+        """Encode and write records."""
+        import json
+        encoder = json.JSONEncoder(default=str)
+        lines = []
+        for r in records:
+            lines.append(encoder.encode({str(k): v for k, v in r.items()}))
+        self._file.write(''.join(line + '\n' for line in lines))
+
+
+class CSV(BufferedSink):
+    """CSV file with header.
+
+    Columns are the parameter keys and the result keys of the first record.
+    Missing values are empty.
+    """
+
+    def open(  # noqa: A003
+            self, order: List[TParamsKey],
+            combs_list: List[List[Dict[str, Any]]]) -> None:
+        """Open the file.
+
+        Args:
+            order (List[TParamsKey]): Loop order (keys of axes).
+            combs_list (List[List[Dict[str, Any]]]): Standardized
+                parameters (values of axes).
+        """
+        super().open(order, combs_list)
+        self._writer: Any = None
+
+    def _write_records(self, records: List[Dict[Any, Any]]) -> None:
+        """Encode and write records."""
+        if self._writer is None:
+            import csv
+            columns = dict.fromkeys(self.keys)
+            columns.update(dict.fromkeys(records[0]))
+            self._writer = csv.DictWriter(self._file,
+                                          fieldnames=list(columns),
+                                          extrasaction='ignore')
+            self._writer.writeheader()
+        self._writer.writerows(records)
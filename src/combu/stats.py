@@ -0,0 +1,160 @@
+"""Stats.
+
+Execution statistics, updated while executing.
+"""
+
+import collections
+import time
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from combu.reducers import Mean
+
+
+class ExecutionStats:
+    """Execution statistics.
+
+    Pass to execute(), Combu.execute() or CombuParallel.execute() and read
+    it while iterating or after. Times are in seconds.
+    """
+
+    def __init__(self, window: float = 10.0) -> None:
+        """Initialize object.
+
+        Args:
+            window (float, optional): Seconds of rolling throughput.
+        """
+        self.window = window
+        self.n_workers = 1
+        # Per call.
+        self.wall = Mean()
+        self.cpu = Mean()
+        self.queue_wait = Mean()
+        self.max_wall = 0.0
+        # Pickled payloads (parallel).
+        self.sent_bytes = 0
+        self.received_bytes = 0
+        # Hook kind and key -> time.
+        self.hooks: Dict[Tuple[str, Any], Mean] = {}
+        # Time spent by the consumer between results.
+        self.consumer_time = 0.0
+        self.start_time: Optional[float] = None
+        self.end_time: Optional[float] = None
+        self._done: Deque[float] = collections.deque()
+
+    def start(self, n_workers: int = 1) -> None:
+        """Start measuring.
+
+        Args:
+            n_workers (int, optional): Number of worker processes.
+        """
+        self.n_workers = n_workers
+        self.start_time = time.monotonic()
+        self.end_time = None
+
+    def stop(self) -> None:
+        """Stop measuring."""
+        self.end_time = time.monotonic()
+
+    def add_call(self,
+                 wall: float,
+                 cpu: float,
+                 queue_wait: float = None,
+                 sent: int = 0,
+                 received: int = 0) -> None:
+        """Add a call of the target function.
+
+        Args:
+            wall (float): Wall time.
+            cpu (float): CPU time.
+            queue_wait (float, optional): Time from dispatch to start.
+            sent (int, optional): Bytes of pickled parameter.
+            received (int, optional): Bytes of pickled result.
+        """
+        self.wall.update(wall)
+        self.cpu.update(cpu)
+        self.max_wall = max(self.max_wall, wall)
+        if queue_wait is not None:
+            self.queue_wait.update(queue_wait)
+        self.sent_bytes += sent
+        self.received_bytes += received
+
+        now = time.monotonic()
+        self._done.append(now)
+        while self._done[0] < now - self.window:
+            self._done.popleft()
+
+    def add_hook(self, kind: str, key: Any, seconds: float) -> None:
+        """Add a hook call.
+
+        Args:
+            kind (str): 'before', 'before_each', 'after_each' or 'after'.
+            key (Any): Parameter key of the hook.
+            seconds (float): Wall time.
+        """
+        mean = self.hooks.get((kind, key))
+        if mean is None:
+            mean = self.hooks[(kind, key)] = Mean()
+        mean.update(seconds)
+
+    @property
+    def calls(self) -> int:
+        """Get the number of calls."""
+        return self.wall.count
+
+    @property
+    def elapsed(self) -> float:
+        """Get the elapsed time."""
+        if self.start_time is None:
+            return 0.0
+        end = time.monotonic() if self.end_time is None else self.end_time
+        return end - self.start_time
+
+    @property
+    def utilization(self) -> float:
+        """Get the ratio of time the workers were calling the function."""
+        capacity = self.elapsed * self.n_workers
+        if capacity == 0:
+            return 0.0
+        return self.wall.count * self.wall.mean / capacity
+
+    @property
+    def throughput(self) -> float:
+        """Get calls per second over the last 'window' seconds."""
+        if len(self._done) == 0:
+            return 0.0
+        end = time.monotonic() if self.end_time is None else self.end_time
+        span = min(self.window, self.elapsed)
+        n = sum(1 for t in self._done if t >= end - span)
+        return n / span if span > 0 else 0.0
+
+    def summary(self) -> Dict[str, Any]:
+        """Get the statistics.
+
+        Returns:
+            Dict[str, Any]: Statistics.
+        """
+        return {
+            'calls': self.calls,
+            'elapsed': self.elapsed,
+            'wall_mean': self.wall.result(),
+            'wall_max': self.max_wall,
+            'cpu_mean': self.cpu.result(),
+            'queue_wait_mean': self.queue_wait.result(),
+            'sent_bytes': self.sent_bytes,
+            'received_bytes': self.received_bytes,
+            'utilization': self.utilization,
+            'throughput': self.throughput,
+            'consumer_time': self.consumer_time,
+            'hooks': {
+                k: v.count * v.mean for k, v in self.hooks.items()
+            },
+        }
+
+    def __repr__(self) -> str:
+        """Get representation."""
+        fields = []
+        for k, v in self.summary().items():
+            if isinstance(v, float):
+                v = round(v, 6)
+            fields.append('{}={}'.format(k, v))
+        return 'ExecutionStats({})'.format(', '.join(fields))
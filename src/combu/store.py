@@ -0,0 +1,315 @@
+"""Store.
+
+Result store on SQLite, queryable across runs.
+"""
+
+import numbers
+import pickle
+import sqlite3
+import threading
+from typing import (Any, cast, Dict, Iterable, Iterator, List, Optional, Tuple,
+                    Union)
+
+from combu.definition import TParams
+from combu.generator import create_values
+from combu.sinks import BufferedSink
+
+
+def _quote(name: str) -> str:
+    """Quote an identifier."""
+    return '"{}"'.format(str(name).replace('"', '""'))
+
+
+def _encode(v: Any) -> Any:
+    """Encode a value.
+
+    None is NULL. Integers (bool as 0 / 1), real numbers and str are typed,
+    numpy scalars included, so that they compare and sort in SQL. Others are
+    pickled.
+    """
+    if v is None or type(v) is str:
+        return v
+    if type(v).__module__ == 'numpy' and getattr(v, 'shape', None) == ():
+        # numpy scalar to the Python scalar.
+        v = v.item()
+    if isinstance(v, bool):
+        return int(v)
+    if isinstance(v, numbers.Integral):
+        if -2**63 <= int(v) < 2**63:
+            return int(v)
+    elif isinstance(v, numbers.Real):
+        return float(v)
+    elif isinstance(v, str):
+        return str(v)
+    return pickle.dumps(v)
+
+
+def _decode(v: Any) -> Any:
+    """Decode a value."""
+    if isinstance(v, bytes):
+        return pickle.loads(v)
+    return v
+
+
+class SQLiteStore(BufferedSink):
+    """Result store on SQLite.
+
+    A row per combination. Each parameter key has its own indexed column and
+    each result key (or 'result') its own column. None and missing (Unset)
+    values are NULL. Inserts are batched in transactions of 'buffer_size'
+    rows, on a background thread with 'background'. Runs append to the same
+    table.
+    """
+
+    def __init__(self,
+                 path: str,
+                 table: str = 'results',
+                 buffer_size: int = 1024,
+                 background: bool = False,
+                 result_key: str = 'result') -> None:
+        """Initialize object.
+
+        Args:
+            path (str): Path of database file.
+            table (str, optional): Table name.
+            buffer_size (int, optional): Number of rows per transaction.
+            background (bool, optional): Insert on a background thread.
+            result_key (str, optional): Key of result that is not a dict.
+        """
+        super().__init__(path,
+                         buffer_size=buffer_size,
+                         background=background,
+                         result_key=result_key)
+        self.table = table
+        self._conn: Optional[sqlite3.Connection] = None
+        # Guards _columns, updated by the writer and by queries.
+        self._lock = threading.Lock()
+        self._columns: Dict[str, str] = {}
+
+    def _connect(self) -> sqlite3.Connection:
+        """Connect and create the tables."""
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        with conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS _combu_columns '
+                         '(tbl TEXT, name TEXT, kind TEXT, '
+                         'PRIMARY KEY (tbl, name))')
+            conn.execute('CREATE TABLE IF NOT EXISTS {} (_id INTEGER '
+                         'PRIMARY KEY)'.format(_quote(self.table)))
+        rows = conn.execute(
+            'SELECT name, kind FROM _combu_columns WHERE tbl=?',
+            (self.table,)).fetchall()
+        with self._lock:
+            self._columns.update(rows)
+        return conn
+
+    def _add_columns(self, names: Iterable[str], kind: str) -> None:
+        """Add columns. Parameter columns are indexed."""
+        conn = cast(sqlite3.Connection, self._conn)
+        for name in names:
+            if name in self._columns:
+                continue
+            conn.execute('ALTER TABLE {} ADD COLUMN {}'.format(
+                _quote(self.table), _quote(name)))
+            if kind == 'param':
+                conn.execute('CREATE INDEX {} ON {} ({})'.format(
+                    _quote('ix_{}_{}'.format(self.table, name)),
+                    _quote(self.table), _quote(name)))
+            conn.execute('INSERT INTO _combu_columns VALUES (?, ?, ?)',
+                         (self.table, name, kind))
+            with self._lock:
+                self._columns[name] = kind
+
+    def _open_output(self) -> None:
+        """Connect and add parameter columns."""
+        self._conn = self._connect()
+        with self._conn:
+            self._add_columns(self.keys, 'param')
+
+    def _close_output(self) -> None:
+        """Close the connection."""
+        cast(sqlite3.Connection, self._conn).close()
+        self._conn = None
+
+    def _write_records(self, records: List[Dict[Any, Any]]) -> None:
+        """Insert records in a transaction."""
+        names: Dict[str, None] = {}
+        for r in records:
+            names.update(dict.fromkeys(r))
+        conn = cast(sqlite3.Connection, self._conn)
+        with conn:
+            self._add_columns(names, 'result')
+            sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+                _quote(self.table), ', '.join(_quote(k) for k in names),
+                ', '.join('?' * len(names)))
+            rows = ([None if k not in r else _encode(r[k])
+                     for k in names]
+                    for r in records)
+            conn.executemany(sql, rows)
+
+    def columns(self, kind: str = None) -> List[str]:
+        """Get column names.
+
+        Args:
+            kind (str, optional): 'param' or 'result'. Default to both.
+
+        Returns:
+            List[str]: Column names.
+        """
+        conn = self._connect()
+        conn.close()
+        with self._lock:
+            items = list(self._columns.items())
+        return [k for k, v in items if kind in (None, v)]
+
+    def query(
+        self,
+        where: Dict[str, Any] = None,
+        order_by: str = None,
+        descending: bool = False,
+        limit: int = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Query records.
+
+        Args:
+            where (Dict[str, Any], optional): Values of columns to match.
+            order_by (str, optional): Column to sort by.
+            descending (bool, optional): Sort in descending order.
+            limit (int, optional): Maximum number of records.
+
+        Raises:
+            KeyError: Unknown column.
+
+        Yields:
+            Iterator[Dict[str, Any]]: Records. NULL values are omitted.
+        """
+        conn = self._connect()
+        try:
+            clause, args = self._where(where)
+            sql = 'SELECT * FROM {}{}'.format(_quote(self.table), clause)
+            if order_by is not None:
+                self._check_columns([order_by])
+                sql += ' ORDER BY {}{}'.format(_quote(order_by),
+                                               ' DESC' if descending else '')
+            if limit is not None:
+                sql += ' LIMIT ?'
+                args.append(limit)
+            cursor = conn.execute(sql, args)
+            yield from self._records(cursor)
+        finally:
+            conn.close()
+
+    def best(
+        self,
+        score: str,
+        group_by: Union[str, Iterable[str]] = None,
+        maximize: bool = True,
+        where: Dict[str, Any] = None,
+    ) -> List[Dict[str, Any]]:
+        """Get the best record (per group).
+
+        Args:
+            score (str): Column of score.
+            group_by (Union[str, Iterable[str]], optional): Columns of groups.
+                Default to a single group.
+            maximize (bool, optional): Higher score is better.
+            where (Dict[str, Any], optional): Values of columns to match.
+
+        Raises:
+            KeyError: Unknown column.
+
+        Returns:
+            List[Dict[str, Any]]: Best record of each group.
+        """
+        if group_by is None:
+            return list(
+                self.query(where=where,
+                           order_by=score,
+                           descending=maximize,
+                           limit=1))
+        if isinstance(group_by, str):
+            group_by = [group_by]
+        group_by = list(group_by)
+
+        conn = self._connect()
+        try:
+            self._check_columns([score, *group_by])
+            clause, args = self._where(
+                where, ['{} IS NOT NULL'.format(_quote(score))])
+            # SQLite takes bare columns from the row of MAX() or MIN().
+            sql = 'SELECT *, {}({}) FROM {}{} GROUP BY {}'.format(
+                'MAX' if maximize else 'MIN', _quote(score),
+                _quote(self.table), clause,
+                ', '.join(_quote(k) for k in group_by))
+            cursor = conn.execute(sql, args)
+            return list(self._records(cursor, n_extra=1))
+        finally:
+            conn.close()
+
+    def missing(
+        self,
+        params: dict,
+        order: Iterable = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Create parameter combinations which are not stored yet.
+
+        Args:
+            params (TParams): Parameters.
+            order (Iterable[TParamsKey], optional): Loop order.
+
+        Yields:
+            Iterator[Dict[str, Any]]: Parameter.
+        """
+        params = cast(TParams, params)
+        conn = self._connect()
+        try:
+            keys = self.columns('param')
+            stored = set()
+            if len(keys) > 0:
+                sql = 'SELECT DISTINCT {} FROM {}'.format(
+                    ', '.join(_quote(k) for k in keys), _quote(self.table))
+                stored = set(conn.execute(sql))
+        finally:
+            conn.close()
+
+        for param in create_values(params, order=order):
+            if any(k not in self._columns for k in param):
+                yield param
+                continue
+            row = tuple(
+                None if k not in param else _encode(param[k]) for k in keys)
+            if row not in stored:
+                yield param
+
+    def _check_columns(self, names: Iterable[str]) -> None:
+        """Raise KeyError for unknown column."""
+        for name in names:
+            if name not in self._columns:
+                raise KeyError(name)
+
+    def _where(self,
+               where: Optional[Dict[str, Any]],
+               conditions: List[str] = None) -> Tuple[str, List[Any]]:
+        """Create WHERE clause (empty without conditions) and arguments."""
+        conditions = list(conditions or [])
+        args: List[Any] = []
+        if where is not None and len(where) > 0:
+            self._check_columns(where)
+            conditions += ['{} IS ?'.format(_quote(k)) for k in where]
+            args = [_encode(v) for v in where.values()]
+        if len(conditions) == 0:
+            return '', args
+        return ' WHERE ' + ' AND '.join(conditions), args
+
+    def _records(self,
+                 cursor: sqlite3.Cursor,
+                 n_extra: int = 0) -> Iterator[Dict[str, Any]]:
+        """Decode rows. The first column (_id) and extra ones are dropped."""
+        names = [d[0] for d in cursor.description]
+        stop = len(names) - n_extra
+        for row in cursor:
+            yield {
+                k: _decode(v)
+                for k, v in zip(names[1:stop], row[1:stop])
+                if v is not None
+            }
@@ -0,0 +1,105 @@
+"""Tracing.
+
+Spans of calls, hooks and dispatch, exported as Chrome trace events
+(chrome://tracing, Perfetto).
+"""
+
+import os
+from typing import Any, Dict, List, Tuple
+
+
+def _jsonable(v: Any) -> Any:
+    """Get a JSON value. Others than scalars and lists are repr."""
+    if v is None or isinstance(v, (bool, int, float, str)):
+        return v
+    if isinstance(v, (list, tuple)):
+        return [_jsonable(x) for x in v]
+    return repr(v)
+
+
+class Tracer:
+    """Recorder of spans.
+
+    Spans are buffered per process and thread and merged on export. Workers
+    record nothing: the timing sent with each result makes its span in the
+    main process.
+    """
+
+    def __init__(self) -> None:
+        """Initialize object."""
+        # (pid, tid) -> events.
+        self.buffers: Dict[Tuple[int, int], List[Dict[str, Any]]] = {}
+        # pid -> process name.
+        self.names: Dict[int, str] = {}
+
+    def span(self,
+             name: str,
+             start: float,
+             duration: float,
+             cat: str = 'call',
+             pid: int = None,
+             tid: int = 0,
+             args: Dict[str, Any] = None) -> None:
+        """Add a span.
+
+        Args:
+            name (str): Name.
+            start (float): Start time (time.time()).
+            duration (float): Seconds.
+            cat (str, optional): Category. 'call', 'hook' or 'ipc'.
+            pid (int, optional): Process ID. Default to this process.
+            tid (int, optional): Thread ID.
+            args (Dict[str, Any], optional): Arguments (e.g. parameter).
+        """
+        if pid is None:
+            pid = os.getpid()
+        if pid not in self.names:
+            self.names[pid] = 'main' if pid == os.getpid() else 'worker'
+        event = {
+            'name': name,
+            'cat': cat,
+            'ph': 'X',
+            'ts': start * 1e6,
+            'dur': duration * 1e6,
+            'pid': pid,
+            'tid': tid,
+        }
+        if args is not None:
+            event['args'] = {str(k): _jsonable(v) for k, v in args.items()}
+        buffer = self.buffers.get((pid, tid))
+        if buffer is None:
+            buffer = self.buffers[(pid, tid)] = []
+        buffer.append(event)
+
+    @property
+    def events(self) -> List[Dict[str, Any]]:
+        """Get the events of all buffers, sorted by time."""
+        spans = [e for buffer in self.buffers.values() for e in buffer]
+        spans.sort(key=lambda e: e['ts'])
+        meta = [{
+            'name': 'process_name',
+            'ph': 'M',
+            'pid': pid,
+            'args': {
+                'name': '{} ({})'.format(name, pid),
+            },
+        } for pid, name in sorted(self.names.items())]
+        return meta + spans
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the trace.
+
+        Returns:
+            Dict[str, Any]: Trace in JSON object format.
+        """
+        return {'traceEvents': self.events, 'displayTimeUnit': 'ms'}
+
+    def save(self, path: str) -> None:
+        """Save the trace as JSON.
+
+        Args:
+            path (str): Path of JSON file.
+        """
+        import json
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f)
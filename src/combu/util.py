@@ -1,10 +1,11 @@
 """Utility."""
 
 import random
-from typing import Any, cast, Dict, Iterable, List, Tuple
+from typing import Any, cast, Dict, Hashable, Iterable, List, Tuple
 
 import combu
-from combu.definition import Pack, TParams, TParamsKey, TParamsValue
+from combu.definition import (Constraint, Pack, TParams, TParamsKey,
+                              TParamsValue)
 import combu.generator
 import combu.util
 
@@ -65,11 +66,18 @@ def standardize(
     return results
 
 
-def count(params: dict) -> int:
+def count(params: dict,
+          order: Iterable[TParamsKey] = None,
+          constraints: Iterable[Constraint] = None) -> int:
     """Count combinations.
 
     Args:
         params (TParams): Parameters.
+        order (Iterable[TParamsKey], optional): Key order.
+        constraints (Iterable[Constraint], optional): Constraints.
+
+    Raises:
+        KeyError: Used unknown key on a constraint.
 
     Returns:
         int: Result.
@@ -77,10 +85,9 @@ def count(params: dict) -> int:
     params = cast(TParams, params)
     if params == {}:
         return 0
-    result = 1
-    for v in standardize(params):
-        result *= len(v)
-    return result
+    combs_list = standardize(params, order=order)
+    return combu.generator.count_comb_index(combs_list,
+                                            constraints=constraints)
 
 
 def shuffle_params(params: dict,
@@ -108,3 +115,22 @@ def shuffle_params(params: dict,
         vals = [v for v in params[k]]  # noqa: C416
         rand.shuffle(vals)
         params[k] = vals
+
+
+def group_value(v: Any) -> Hashable:
+    """Get a hashable value to group by.
+
+    Unhashable values (e.g. list) are grouped by repr. Distinct values with
+    the same repr share a group, so do not use it as a cache key.
+
+    Args:
+        v (Any): Value.
+
+    Returns:
+        Hashable: The value if hashable, else its repr.
+    """
+    try:
+        hash(v)
+    except TypeError:
+        return repr(v)
+    return v
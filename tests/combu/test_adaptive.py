@@ -0,0 +1,119 @@
+"""Test adaptive."""
+
+import math
+import os
+from typing import Tuple
+
+import pytest
+
+import combu.adaptive as adaptive
+from combu.definition import Range
+from combu.execution import execute
+
+
+def _peak(x: float, y: float = 0.5, model: str = 'a') -> float:
+    bonus = 1.0 if model == 'b' else 0.0
+    return bonus - (x - 0.37)**2 - (y - 0.61)**2
+
+
+def _identity(res: float) -> float:
+    return res
+
+
+def _peak_pid(x: float) -> Tuple[float, int]:
+    return _peak(x), os.getpid()
+
+
+def test_range() -> None:
+    """Test Range."""
+    assert list(Range(0, 1, num=5)) == [0, 0.25, 0.5, 0.75, 1]
+    assert len(Range(0, 1, num=5)) == 5
+    values = list(Range(1, 1000, num=4, log=True))
+    assert [round(v, 6) for v in values] == [1, 10, 100, 1000]
+    assert Range(1, 1000, num=4, log=True).step == pytest.approx(math.log(10))
+
+    # Usable as values.
+    results = execute(lambda x: x, {'x': Range(0, 1, 3)})
+    assert [res for res, _ in results] == [0, 0.5, 1]
+
+    with pytest.raises(ValueError):
+        Range(1, 0)
+    with pytest.raises(ValueError):
+        Range(0, 1, num=1)
+    with pytest.raises(ValueError):
+        Range(0, 1, log=True)
+
+
+def test_refine() -> None:
+    """Test refine()."""
+    params = {'x': Range(0, 1, num=5), 'y': Range(0, 1, num=5)}
+    results = list(adaptive.refine(_peak, params, _identity, depth=6))
+    best = max(results, key=lambda r: r[0])[1]
+    assert abs(best['x'] - 0.37) < 0.01
+    assert abs(best['y'] - 0.61) < 0.01
+
+    # Far fewer evaluations than a grid with the same resolution.
+    assert len(results) < 257**2 / 100
+    # No duplicated evaluation.
+    points = [(round(p['x'], 9), round(p['y'], 9)) for _, p in results]
+    assert len(points) == len(set(points))
+
+
+def test_refine_fixed_axis() -> None:
+    """Test refine().
+
+    Non range keys are kept from the refined point.
+    """
+    params = {'model': ['a', 'b'], 'x': Range(0, 1, num=3)}
+    results = list(adaptive.refine(_peak, params, _identity, depth=4))
+    assert len([p for _, p in results if p['model'] == 'a']) == 3
+    best = max(results, key=lambda r: r[0])[1]
+    assert best['model'] == 'b'
+    assert abs(best['x'] - 0.37) < 0.05
+
+
+def test_refine_limit() -> None:
+    """Test refine().
+
+    Budget and resolution.
+    """
+    params = {'x': Range(0, 1, num=5)}
+    results = list(adaptive.refine(_peak, params, _identity, budget=7))
+    assert len(results) == 7
+
+    results = list(
+        adaptive.refine(_peak, params, _identity, depth=100, resolution=0.01))
+    steps = sorted({
+        round(abs(p['x'] - q['x']), 9) for _, p in results for _, q in results
+    } - {0})
+    assert steps[0] >= 0.01 / 2
+
+
+def test_refine_log_parallel() -> None:
+    """Test refine().
+
+    Log scale and parallel.
+    """
+    params = {'x': Range(0.001, 1, num=4, log=True)}
+    results = list(adaptive.refine(_peak, params, _identity, depth=5,
+                                   n_jobs=2))
+    best = max(results, key=lambda r: r[0])[1]
+    assert abs(best['x'] - 0.37) < 0.05
+
+    # One pool of workers for every round.
+    results = list(
+        adaptive.refine(_peak_pid,
+                        params,
+                        lambda res: res[0],
+                        depth=5,
+                        n_jobs=2))
+    assert len({pid for (_, pid), _ in results}) <= 2
+
+
+def test_refine_no_range() -> None:
+    """Test refine().
+
+    No range.
+    """
+    with pytest.raises(ValueError):
+        list(adaptive.refine(_peak, {'x': [0, 1]}, _identity))
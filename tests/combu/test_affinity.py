@@ -0,0 +1,120 @@
+"""Test affinity."""
+
+import itertools
+import os
+import time
+from typing import Any, Dict, List
+
+import pytest
+
+from combu import Constraint, Pack
+from combu._combu import CombuParallel
+from combu.affinity import _Router, create_interleaved_index
+from combu.cost import CostModel
+from combu.execution import execute
+from combu.parallel import ParallelExecutor
+import combu.util
+
+# Datasets loaded in this (worker) process.
+_LOADED: Dict[int, int] = {}
+
+
+def _train(dataset: int, model: int) -> Any:
+    """Get the process and whether the dataset was loaded."""
+    loaded = dataset not in _LOADED
+    _LOADED[dataset] = dataset
+    time.sleep(0.005)
+    return os.getpid(), loaded, dataset, model
+
+
+class _Worker:
+
+    def __init__(self) -> None:
+        self.group = None
+
+
+def test_create_interleaved_index() -> None:
+    """Test affinity axes innermost, original axes in the index."""
+    params: dict = {'d': [0, 1], 'm': [0, 1, 2]}
+    combs_list = combu.util.standardize(params)
+    expected = [(0, 0), (1, 0), (0, 1), (1, 1), (0, 2), (1, 2)]
+    assert list(create_interleaved_index(combs_list, ['d'])) == expected
+
+    params = {
+        Pack('d', 'x'): [{
+            'd': [0, 1],
+            'x': [0],
+        }],
+        'm': [0, 1],
+        'n': [0, 1],
+    }
+    combs_list = combu.util.standardize(params)
+    index = list(create_interleaved_index(combs_list, ['x', 'm']))
+    assert index[:2] == [(0, 0, 0), (0, 1, 0)]
+    assert sorted(index) == list(itertools.product(range(2), repeat=3))
+
+    constraints = [Constraint(lambda d, m: d <= m, 'd', 'm')]
+    index = list(
+        create_interleaved_index(combs_list, ['d'], constraints=constraints))
+    assert sorted(index) == [(0, 0, 0), (0, 0, 1), (0, 1, 0), (0, 1, 1),
+                             (1, 1, 0), (1, 1, 1)]
+
+    with pytest.raises(KeyError):
+        create_interleaved_index(combs_list, ['y'])
+
+
+def test_router() -> None:
+    """Test a group per worker, then work stealing."""
+    params = [{'d': d, 'm': m} for m in range(3) for d in range(2)]
+    params += [{'d': 2, 'm': m} for m in range(4)]
+    router = _Router(['d'], iter(params), window=4)
+    workers = [_Worker(), _Worker()]
+    a, b = workers
+    assert router.pop(a, workers) == {'d': 0, 'm': 0}
+    assert router.pop(b, workers) == {'d': 1, 'm': 0}
+    popped = [router.pop(a, workers) for _ in range(2)]
+    assert popped == [{'d': 0, 'm': 1}, {'d': 0, 'm': 2}]
+    # a claims the group of no other worker, reading ahead.
+    assert router.pop(a, workers) == {'d': 2, 'm': 0}
+    assert a.group == (2,)
+    popped = [router.pop(b, workers) for _ in range(2)]
+    assert popped == [{'d': 1, 'm': 1}, {'d': 1, 'm': 2}]
+    # b runs dry and steals.
+    assert router.pop(b, workers) == {'d': 2, 'm': 1}
+    assert router.steals == 1
+    assert router.pop(a, workers) == {'d': 2, 'm': 2}
+    assert router.pop(b, workers) == {'d': 2, 'm': 3}
+    assert router.pop(a, workers) is None
+    assert router.hits == 6
+
+
+def _loads(results: List[Any]) -> int:
+    for (_, _, dataset, model), param in results:
+        assert param == {'dataset': dataset, 'model': model}
+    return sum(r[0][1] for r in results)
+
+
+def test_execute() -> None:
+    """Test fewer loads of datasets in workers."""
+    params = {'dataset': range(4), 'model': range(8)}
+    results = list(execute(_train, params, n_jobs=2))
+    assert len(results) == 32
+    # Each worker loads (nearly) every dataset.
+    assert _loads(results) > 6
+
+    results = list(execute(_train, params, n_jobs=2, affinity=['dataset']))
+    assert len(results) == 32
+    # A group of datasets per worker, a few more loads by stealing.
+    assert _loads(results) <= 6
+
+    comb = CombuParallel(_train, n_jobs=2, affinity=['dataset'])
+    assert _loads(list(comb.execute(params))) <= 6
+
+
+def test_invalid() -> None:
+    """Test exclusive arguments."""
+    with pytest.raises(ValueError):
+        ParallelExecutor(_train, cost=CostModel(), affinity=['dataset'])
+    params = {'dataset': [0], 'model': [0]}
+    with pytest.raises(ValueError):
+        list(execute(_train, params, batch_size=2, affinity=['dataset']))
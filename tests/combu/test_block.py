@@ -0,0 +1,67 @@
+"""Test block."""
+
+import itertools
+
+import pytest
+
+from combu.definition import Unset
+from combu.generator import create_values
+
+np = pytest.importorskip('numpy')
+block = pytest.importorskip('combu.block')
+
+
+def test_create_index_blocks() -> None:
+    """Test create_index_blocks()."""
+    sizes = [3, 1, 4, 2]
+    expected = list(itertools.product(*[range(n) for n in sizes]))
+    blocks = list(block.create_index_blocks(sizes, 5))
+    assert [len(b) for b in blocks] == [5, 5, 5, 5, 4]
+    actual = [tuple(row) for b in blocks for row in b.tolist()]
+    assert actual == expected
+
+    # Shard.
+    blocks = list(block.create_index_blocks(sizes, 4, start=3, stop=9))
+    actual = [tuple(row) for b in blocks for row in b.tolist()]
+    assert actual == expected[3:9]
+
+    assert list(block.create_index_blocks([2, 0], 4)) == []
+    with pytest.raises(ValueError):
+        list(block.create_index_blocks(sizes, 0))
+
+
+def test_create_blocks() -> None:
+    """Test create_blocks()."""
+    params = {
+        'lr': [0.1, 0.01],
+        'name': ['a', 'b', 'c'],
+        ('x', 'y'): [(1, 2), (3, 4)],
+    }
+    expected = list(create_values(params, order=['name']))
+    blocks = list(
+        block.create_blocks(params,
+                            block_size=5,
+                            order=['name'],
+                            values=['lr', 'y']))
+    assert sum(len(indexes) for indexes, _ in blocks) == len(expected)
+
+    rows = []
+    for indexes, values in blocks:
+        assert indexes.shape[1] == 3
+        assert set(values.keys()) == {'lr', 'y'}
+        rows += list(zip(values['lr'].tolist(), values['y'].tolist()))
+    assert rows == [(p['lr'], p['y']) for p in expected]
+
+
+def test_create_blocks_wrong_values() -> None:
+    """Test create_blocks().
+
+    Unknown or not numeric values.
+    """
+    params = {'v1': ['a', 'b'], 'v2': [1, Unset()]}
+    with pytest.raises(KeyError):
+        list(block.create_blocks(params, values=['unknown']))
+    with pytest.raises(TypeError):
+        list(block.create_blocks(params, values=['v1']))
+    with pytest.raises(TypeError):
+        list(block.create_blocks(params, values=['v2']))
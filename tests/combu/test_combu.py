@@ -1,10 +1,12 @@
 """Test combu."""
 
 import time
-from typing import Tuple
+from typing import Any, List, Tuple
+
+import pytest
 
 from combu._combu import Combu, CombuParallel
-from combu.definition import Pack, Unset
+from combu.definition import Constraint, Failure, Pack, Unset
 
 
 class TestCombu:
@@ -605,6 +607,223 @@ class TestCombu:
         ]
         assert result == expected
 
+    def test_execute_constraints(self) -> None:
+        """Test execute().
+
+        Set 'constraints'. Hooks follow the pruned loops.
+        """
+        result = []
+
+        def func(v1: int, v2: int, v3: str) -> None:
+            result.append(['func', v1, v2, v3])
+
+        def hook(name: str):
+
+            def f(v1: int, v2: int, v3: str) -> None:
+                result.append([name, v1, v2, v3])
+
+            return f
+
+        comb = Combu(
+            func,
+            before={'v2': hook('before_v2')},
+            after={'v2': hook('after_v2')},
+            before_each={'v2': hook('before_each_v2')},
+            after_each={'v2': hook('after_each_v2')},
+        )
+        params = {'v1': [1, 2, 3], 'v2': [1, 2, 3], 'v3': ['a', 'b']}
+        constraints = [Constraint(lambda v1, v2: v1 < v2, 'v1', 'v2')]
+        for _ in comb.execute(params, constraints=constraints):
+            pass
+
+        expected = [
+            ['before_v2', 1, 2, 'a'],
+            ['before_each_v2', 1, 2, 'a'],
+            ['func', 1, 2, 'a'],
+            ['func', 1, 2, 'b'],
+            ['after_each_v2', 1, 2, 'b'],
+            ['before_each_v2', 1, 3, 'a'],
+            ['func', 1, 3, 'a'],
+            ['func', 1, 3, 'b'],
+            ['after_each_v2', 1, 3, 'b'],
+            ['after_v2', 1, 3, 'b'],
+            ['before_v2', 2, 3, 'a'],
+            ['before_each_v2', 2, 3, 'a'],
+            ['func', 2, 3, 'a'],
+            ['func', 2, 3, 'b'],
+            ['after_each_v2', 2, 3, 'b'],
+            ['after_v2', 2, 3, 'b'],
+        ]
+        assert result == expected
+
+    def test_execute_loop_hooks_single_value(self) -> None:
+        """Test execute().
+
+        Inner loop with a single value restarts on each outer value.
+        """
+        result = []
+
+        def func(v1: int, v2: int) -> None:
+            result.append(['func', v1, v2])
+
+        def before_v2(v1: int, v2: int) -> None:
+            result.append(['before_v2', v1, v2])
+
+        def after_v2(v1: int, v2: int) -> None:
+            result.append(['after_v2', v1, v2])
+
+        comb = Combu(func, before={'v2': before_v2}, after={'v2': after_v2})
+        for _ in comb.execute({'v1': [1, 2], 'v2': [3]}):
+            pass
+
+        assert result == [
+            ['before_v2', 1, 3],
+            ['func', 1, 3],
+            ['after_v2', 1, 3],
+            ['before_v2', 2, 3],
+            ['func', 2, 3],
+            ['after_v2', 2, 3],
+        ]
+
+    def test_execute_gray(self) -> None:
+        """Test execute().
+
+        Set sequence='gray'. Each hooks are called when the value changes.
+        """
+        result = []
+
+        def func(v1: int, v2: int) -> None:
+            result.append(['func', v1, v2])
+
+        def before_v2(v1: int, v2: int) -> None:
+            result.append(['before_v2', v1, v2])
+
+        def before_each_v1(v1: int, v2: int) -> None:
+            result.append(['before_each_v1', v1, v2])
+
+        def before_each_v2(v1: int, v2: int) -> None:
+            result.append(['before_each_v2', v1, v2])
+
+        def after_each_v2(v1: int, v2: int) -> None:
+            result.append(['after_each_v2', v1, v2])
+
+        comb = Combu(func,
+                     before={'v2': before_v2},
+                     before_each={
+                         'v1': before_each_v1,
+                         'v2': before_each_v2,
+                     },
+                     after_each={'v2': after_each_v2},
+                     sequence='gray')
+        params = [p for _, p in comb.execute({'v1': [1, 2], 'v2': [3, 4]})]
+        assert params == [
+            {
+                'v1': 1,
+                'v2': 3,
+            },
+            {
+                'v1': 1,
+                'v2': 4,
+            },
+            {
+                'v1': 2,
+                'v2': 4,
+            },
+            {
+                'v1': 2,
+                'v2': 3,
+            },
+        ]
+        assert result == [
+            ['before_v2', 1, 3],
+            ['before_each_v1', 1, 3],
+            ['before_each_v2', 1, 3],
+            ['func', 1, 3],
+            ['after_each_v2', 1, 3],
+            ['before_each_v2', 1, 4],
+            ['func', 1, 4],
+            ['before_v2', 2, 4],
+            ['before_each_v1', 2, 4],
+            ['func', 2, 4],
+            ['after_each_v2', 2, 4],
+            ['before_each_v2', 2, 3],
+            ['func', 2, 3],
+            ['after_each_v2', 2, 3],
+        ]
+
+        with pytest.raises(ValueError):
+            Combu(func, sequence='halton')
+
+        # Keys changed from the previous call.
+        def changed(v1: int, v2: int, changes: List[str]) -> List[str]:
+            return changes
+
+        comb = Combu(changed, sequence='gray', changes='changes')
+        results = [r for r, _ in comb.execute({'v1': [1, 2], 'v2': [3, 4]})]
+        assert results == [['v1', 'v2'], ['v2'], ['v1'], ['v2']]
+        with pytest.raises(ValueError):
+            Combu(changed, batch_size=2, changes='changes')
+
+    def test_execute_batch_size(self) -> None:
+        """Test execute().
+
+        Set 'batch_size'. Blocks end where hooks are called.
+        """
+        result: List[Any] = []
+
+        def func(v1: List[int], v2: List[int]) -> List[int]:
+            result.append(['func', v1, v2])
+            return [a * b for a, b in zip(v1, v2)]
+
+        def before_each_v1(v1: int, v2: int) -> None:
+            result.append(['before_each_v1', v1, v2])
+
+        def after_each_v1(v1: int, v2: int) -> None:
+            result.append(['after_each_v1', v1, v2])
+
+        comb = Combu(func, batch_size=2)
+        params = {'v1': [1, 2], 'v2': [3, 4, 5]}
+        actual = list(comb.execute(params))
+        expected = list(Combu(lambda v1, v2: v1 * v2).execute(params))
+        assert actual == expected
+        assert [r[1:] for r in result] == [
+            [[1, 1], [3, 4]],
+            [[1, 2], [5, 3]],
+            [[2, 2], [4, 5]],
+        ]
+
+        result.clear()
+        comb.set_before_each('v1', before_each_v1)
+        comb.set_after_each('v1', after_each_v1)
+        assert list(comb.execute(params)) == expected
+        assert result == [
+            ['before_each_v1', 1, 3],
+            ['func', [1, 1], [3, 4]],
+            ['func', [1], [5]],
+            ['after_each_v1', 1, 5],
+            ['before_each_v1', 2, 3],
+            ['func', [2, 2], [3, 4]],
+            ['func', [2], [5]],
+            ['after_each_v1', 2, 5],
+        ]
+
+    def test_execute_sink(self) -> None:
+        """Test execute().
+
+        Set 'sink'.
+        """
+        pytest.importorskip('numpy')
+        from combu.sinks import Tensor
+
+        params = {'v1': [1, 2], 'v2': [3, 4, 5]}
+        tensor = Tensor(dtype='int64')
+        list(Combu(lambda v1, v2: v1 * v2).execute(params, sink=tensor))
+        assert tensor.array.tolist() == [[3, 4, 5], [6, 8, 10]]
+
+        tensor = Tensor(dtype='int64')
+        list(Combu(_sum, batch_size=2).execute(params, sink=tensor))
+        assert tensor.array.tolist() == [[4, 5, 6], [5, 6, 7]]
+
     def test_execute_progress(self) -> None:
         """Test execute().
 
@@ -624,6 +843,16 @@ def _wait(v):
     return v
 
 
+def _sum(v1: List[int], v2: List[int]) -> List[int]:
+    return [a + b for a, b in zip(v1, v2)]
+
+
+def _fail(v: int) -> int:
+    if v == 1:
+        raise ValueError(v)
+    return v
+
+
 class TestCombuParallel:
     """Test CombuParallel."""
 
@@ -651,3 +880,44 @@ class TestCombuParallel:
 
         assert results == [t] * n_combs
         assert total_time < t * n_combs
+
+    def test_execute_batch_size(self) -> None:
+        """Test execute().
+
+        Set 'batch_size'.
+        """
+        comb = CombuParallel(_sum, n_jobs=2, batch_size=3)
+        params = {'v1': [1, 2], 'v2': [3, 4, 5]}
+        results = sorted(res for res, _ in comb.execute(params))
+        assert results == [4, 5, 5, 6, 6, 7]
+
+    def test_execute_errors(self) -> None:
+        """Test execute().
+
+        Set 'errors'.
+        """
+        comb = CombuParallel(_fail, n_jobs=2, errors='retry', retries=1)
+        assert comb.errors == 'retry'
+        results = {p['v']: r for r, p in comb.execute({'v': range(3)})}
+        assert results[0] == 0 and results[2] == 2
+        assert isinstance(results[1], Failure)
+        assert results[1].attempts == 2
+
+    def test_execute_timeout(self) -> None:
+        """Test execute().
+
+        Set 'timeout' and 'speculative'.
+        """
+        comb = CombuParallel(_wait,
+                             n_jobs=2,
+                             errors='collect',
+                             timeout=0.5,
+                             speculative=2)
+        assert comb.timeout == 0.5
+        assert comb.speculative == 2
+        start_time = time.monotonic()
+        results = {p['v']: r for r, p in comb.execute({'v': [0.01, 10]})}
+        assert time.monotonic() - start_time < 5
+        assert results[0.01] == 0.01
+        assert isinstance(results[10], Failure)
+        assert isinstance(results[10].error, TimeoutError)
@@ -0,0 +1,127 @@
+"""Test cost."""
+
+import os
+import time
+from typing import Any
+
+import pytest
+
+from combu._combu import CombuParallel
+from combu.cost import _Pending, CostModel
+from combu.execution import execute
+from combu.parallel import ParallelExecutor
+
+
+def _f(v: int) -> int:
+    return v
+
+
+def _wait(v: int, w: int = 0) -> int:
+    time.sleep(0.01 * v)
+    return v
+
+
+def test_init() -> None:
+    """Test CostModel arguments."""
+    with pytest.raises(ValueError):
+        CostModel(window=0)
+    with pytest.raises(ValueError):
+        CostModel().save()
+
+
+def test_estimate() -> None:
+    """Test learned estimate: mean times relative mean of each value."""
+    model = CostModel()
+    assert model.estimate({'v': 1}) == 0
+    model.add({'v': 1, 'w': 0}, 1.0)
+    model.add({'v': 2, 'w': 0}, 3.0)
+    model.add({'v': 2, 'w': [1]}, 3.0)
+    assert model.count == 3
+    mean = 7 / 3
+    expected = mean * (3 / mean) * (3 / mean)
+    assert model.estimate({'v': 2, 'w': [1]}) == pytest.approx(expected)
+    # Unobserved values have factor 1.
+    assert model.estimate({'v': 3, 'w': 0}) == pytest.approx(2.0)
+
+    model = CostModel(lambda v: v * 10)
+    assert model.estimate({'v': 2}) == 20
+
+
+def test_save(tmpdir: Any) -> None:
+    """Test save and load of timings."""
+    path = os.path.join(str(tmpdir), 'cost.pkl')
+    model = CostModel(path=path)
+    model.add({'v': 1}, 2.0)
+    model.save()
+    loaded = CostModel(path=path)
+    assert loaded.count == 1
+    assert loaded.estimate({'v': 1}) == 2.0
+
+
+def test_pending() -> None:
+    """Test costliest first within the window, ties in order."""
+    model = CostModel(lambda v: v % 10, window=2)
+    pending = _Pending(model, iter([{'v': v} for v in [1, 2, 3, 4]]))
+    popped = [pending.pop() for _ in range(5)]
+    assert popped == [{'v': 2}, {'v': 3}, {'v': 4}, {'v': 1}, None]
+
+    model = CostModel(lambda v: 0)
+    pending = _Pending(model, iter([{'v': v} for v in [1, 2, 3]]))
+    assert [pending.pop() for _ in range(3)] == [{'v': 1}, {'v': 2}, {'v': 3}]
+
+
+def test_pending_window() -> None:
+    """Test a grid larger than the window: ranked within the window only."""
+    params = [{'v': v} for v in range(3000)]
+    pending = _Pending(CostModel(lambda v: v), iter(params))
+    # The costliest of the first 1024, not of the grid.
+    assert pending.pop() == {'v': 1023}
+    assert pending.pop() == {'v': 1024}
+
+    pending = _Pending(CostModel(lambda v: v, window=3000), iter(params))
+    assert [pending.pop() for _ in range(2)] == [{'v': 2999}, {'v': 2998}]
+
+
+def test_pending_rebalance() -> None:
+    """Test re-estimate of pending parameters as timings arrive."""
+    model = CostModel()
+    pending = _Pending(model, iter([{'v': v} for v in range(4)]))
+    assert pending.pop() == {'v': 0}
+    model.add({'v': 0}, 1.0)
+    model.add({'v': 3}, 5.0)
+    assert pending.pop() == {'v': 3}
+
+
+def test_parallel() -> None:
+    """Test ParallelExecutor with cost: one worker runs costliest first."""
+    model = CostModel(lambda v: v)
+    parallel = ParallelExecutor(_f, n=1, cost=model)
+    results = list(parallel.execute([{'v': v} for v in [1, 3, 2]]))
+    assert results == [(3, {'v': 3}), (2, {'v': 2}), (1, {'v': 1})]
+    assert model.count == 3
+
+
+def test_execute() -> None:
+    """Test timings learned serially, then used in parallel."""
+    model = CostModel()
+    params = {'v': [0, 2, 1], 'w': [0]}
+    assert [r for r, _ in execute(_wait, params, cost=model)] == [0, 2, 1]
+    assert model.count == 3
+
+    results = list(execute(_wait, params, n_jobs=1, cost=model))
+    assert [r for r, _ in results] == [0, 2, 1]
+    comb = CombuParallel(_wait, n_jobs=2)
+    results = list(comb.execute(params, cost=model))
+    assert sorted(r for r, _ in results) == [0, 1, 2]
+    assert all(p['v'] == r for r, p in results)
+
+    # One worker: dispatch order is the learned cost order.
+    parallel = ParallelExecutor(_wait, n=1, cost=model)
+    results = list(parallel.execute([{'v': v} for v in [0, 2, 1]]))
+    assert [r for r, _ in results] == [2, 1, 0]
+
+
+def test_batch() -> None:
+    """Test cost is not supported with batch_size."""
+    with pytest.raises(ValueError):
+        list(execute(_f, {'v': [1]}, batch_size=2, cost=CostModel()))
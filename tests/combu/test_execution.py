@@ -1,12 +1,14 @@
 """Test execution."""
 
 import time
-from typing import Tuple
+from typing import Any, List, Tuple
 
 import pytest
 
-from combu.definition import Pack, Unset
+from combu.definition import Constraint, Failure, Pack, Unset
 import combu.execution as execution
+from combu.generator import create_values
+from combu.sinks import Sink
 
 
 def test_execute() -> None:
@@ -355,3 +357,211 @@ def test_execute_parallel() -> None:
 
     assert results == [t] * n_combs
     assert total_time < t * n_combs
+
+
+def test_execute_constraints() -> None:
+    """Test execute().
+
+    Set 'constraints'.
+    """
+
+    def func(v1: int, v2: int) -> int:
+        return v1 + v2
+
+    params = {'v1': [1, 2, 3], 'v2': [1, 2, 3]}
+    constraints = [Constraint(lambda v1, v2: v1 < v2, 'v1', 'v2')]
+    actual = list(execution.execute(func, params, constraints=constraints))
+    assert actual == [
+        (3, {
+            'v1': 1,
+            'v2': 2,
+        }),
+        (4, {
+            'v1': 1,
+            'v2': 3,
+        }),
+        (5, {
+            'v1': 2,
+            'v2': 3,
+        }),
+    ]
+
+    actual = list(
+        execution.execute(func, params, constraints=constraints,
+                          progress=True))
+    assert len(actual) == 3
+
+
+def test_execute_changes() -> None:
+    """Test execute().
+
+    Set 'changes'.
+    """
+
+    def func(v1: int, v2: int, changes: List[str]) -> List[str]:
+        return changes
+
+    params = {'v1': [1, 2], 'v2': [3, 4]}
+    actual = list(
+        execution.execute(func, params, sequence='gray', changes='changes'))
+    assert [r for r, _ in actual] == [['v1', 'v2'], ['v2'], ['v1'], ['v2']]
+    expected = create_values(params, sequence='gray')
+    assert [p for _, p in actual] == list(expected)
+
+    with pytest.raises(ValueError):
+        list(execution.execute(func, params, n_jobs=2, changes='changes'))
+    with pytest.raises(ValueError):
+        list(execution.execute(func, params, batch_size=2, changes='changes'))
+
+
+def _add_columns(v1: List[int], v2: List[int]) -> List[int]:
+    return [a + b for a, b in zip(v1, v2)]
+
+
+def test_execute_batch_size() -> None:
+    """Test execute().
+
+    Set 'batch_size'.
+    """
+    calls = []
+
+    def func(v1: List[int], v2: List[int]) -> List[int]:
+        calls.append((v1, v2))
+        return _add_columns(v1, v2)
+
+    params = {'v1': [1, 2, 3], 'v2': [10, 20]}
+    actual = list(execution.execute(func, params, batch_size=4))
+    expected = list(execution.execute(lambda v1, v2: v1 + v2, params))
+    assert actual == expected
+    assert calls == [([1, 1, 2, 2], [10, 20, 10, 20]), ([3, 3], [10, 20])]
+
+    actual = list(
+        execution.execute(_add_columns,
+                          params,
+                          batch_size=2,
+                          n_jobs=2,
+                          progress=True))
+    assert sorted(actual, key=repr) == sorted(expected, key=repr)
+
+
+def test_execute_batch_size_unset() -> None:
+    """Test execute().
+
+    Set 'batch_size' with Unset.
+    """
+
+    def func(v1: List[int], v2: List[Any]) -> List[int]:
+        return [a if isinstance(b, Unset) else a + b for a, b in zip(v1, v2)]
+
+    params = {'v1': [1, 2], 'v2': [10, Unset()]}
+    actual = list(execution.execute(func, params, batch_size=3))
+    assert actual == [
+        (11, {
+            'v1': 1,
+            'v2': 10,
+        }),
+        (1, {
+            'v1': 1,
+        }),
+        (12, {
+            'v1': 2,
+            'v2': 10,
+        }),
+        (2, {
+            'v1': 2,
+        }),
+    ]
+
+
+def test_execute_batch_size_wrong() -> None:
+    """Test execute().
+
+    Wrong 'batch_size' or number of results.
+    """
+    params = {'v1': [1, 2, 3], 'v2': [10, 20]}
+    with pytest.raises(ValueError):
+        list(execution.execute(_add_columns, params, batch_size=0))
+    with pytest.raises(ValueError):
+        list(execution.execute(lambda v1, v2: [0], params, batch_size=2))
+
+
+def _fail_odd(v: int) -> int:
+    if v % 2 == 1:
+        raise ValueError(v)
+    return v
+
+
+def test_execute_errors() -> None:
+    """Test execute().
+
+    Set 'errors'.
+    """
+    params = {'v': range(5)}
+    with pytest.raises(ValueError):
+        list(execution.execute(_fail_odd, params))
+    with pytest.raises(ValueError):
+        list(execution.execute(_fail_odd, params, errors='ignore'))
+
+    for n_jobs in [1, 2]:
+        actual = list(
+            execution.execute(_fail_odd,
+                              params,
+                              n_jobs=n_jobs,
+                              errors='collect'))
+        failures = {p['v']: r for r, p in actual if isinstance(r, Failure)}
+        assert sorted(failures) == [1, 3]
+        assert failures[1].attempts == 1
+        assert 'ValueError: 1' in failures[1].traceback
+
+    # Retry. Failures are not written to sinks.
+    calls = []
+
+    class _Sink(Sink):
+
+        def write(self, res: Any, param: Any, index: Any) -> None:
+            calls.append(('write', res))
+
+    def func(v: int) -> int:
+        calls.append(('call', v))
+        return _fail_odd(v)
+
+    actual = list(
+        execution.execute(func, {'v': [0, 1]},
+                          errors='retry',
+                          retries=2,
+                          sink=_Sink()))
+    assert calls == [('call', 0), ('write', 0), ('call', 1), ('call', 1),
+                     ('call', 1)]
+    assert actual[1][0].attempts == 3
+
+    # A failed block fails each combination.
+    def batch(v: List[int]) -> List[int]:
+        if 3 in v:
+            raise ValueError
+        return v
+
+    actual = list(
+        execution.execute(batch, params, batch_size=2, errors='collect'))
+    failed = [isinstance(r, Failure) for r, _ in actual]
+    assert failed == [False, False, True, True, False]
+
+
+def test_execute_timeout() -> None:
+    """Test execute().
+
+    Set 'timeout' with n_jobs > 1, with and without combination indexes.
+    """
+    params = {'v': [0.01, 10, 0.01]}
+    for progress in [False, True]:
+        start_time = time.monotonic()
+        actual = list(
+            execution.execute(_wait,
+                              params,
+                              n_jobs=2,
+                              progress=progress,
+                              errors='collect',
+                              timeout=0.5))
+        assert time.monotonic() - start_time < 5
+        failures = [r for r, p in actual if isinstance(r, Failure)]
+        assert len(failures) == 1
+        assert isinstance(failures[0].error, TimeoutError)
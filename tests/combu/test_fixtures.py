@@ -0,0 +1,111 @@
+"""Test fixtures."""
+
+import os
+import pickle
+from typing import Any, List
+
+import pytest
+
+from combu._combu import Combu, CombuParallel
+from combu.execution import execute
+from combu.fixtures import _Injector, Fixture, inject
+from combu.parallel import ParallelExecutor
+
+_CALLS: List[Any] = []
+
+
+def _load(dataset: int) -> Any:
+    _CALLS.append(dataset)
+    return 'data{}'.format(dataset), os.getpid()
+
+
+def _train(dataset: int, model: int, data: Any) -> Any:
+    # Process of the call and of the fixture value.
+    return data[0], os.getpid(), data[1]
+
+
+def test_fixture() -> None:
+    """Test Fixture arguments."""
+    assert Fixture(_load).keys == ['dataset']
+    assert Fixture(_load, keys=['d']).keys == ['d']
+    with pytest.raises(ValueError):
+        Fixture(_load, maxsize=0)
+
+
+def test_inject() -> None:
+    """Test values computed once and evicted least recently used."""
+    assert inject(_train) is _train
+    assert inject(_train, {}) is _train
+
+    _CALLS.clear()
+    target = inject(_train, {'data': Fixture(_load, maxsize=2)})
+    assert isinstance(target, _Injector)
+    assert target.__name__ == '_train'
+    for d in [0, 0, 1, 0, 2, 1, 0]:
+        assert target(dataset=d, model=0)[0] == 'data{}'.format(d)
+    # 2 evicts 1 (0 used after 1), 0 evicted by 1.
+    assert _CALLS == [0, 1, 2, 1, 0]
+    assert (target.hits, target.misses) == (2, 5)
+
+    # Pickled (sent to a worker) with its caches.
+    copy = pickle.loads(pickle.dumps(inject(_train, {'data': _load})))
+    assert copy(dataset=3, model=1)[0] == 'data3'
+
+
+def test_key() -> None:
+    """Test cache keys of unhashable values."""
+    rows = [[0] * 5000, [0] * 4999 + [1]]
+    params = {'x': rows}
+    with pytest.raises(TypeError):
+        list(execute(lambda x, s: s, params, fixtures={'s': lambda x: sum(x)}))
+
+    fixtures = {'s': Fixture(lambda x: sum(x), key=lambda x: tuple(x))}
+    results = list(execute(lambda x, s: s, params, fixtures=fixtures))
+    assert [r for r, _ in results] == [0, 1]
+
+    # Equal values share the cached value.
+    _CALLS.clear()
+    target = inject(_train, {'data': Fixture(_load, key=lambda dataset: 0)})
+    assert target(dataset=1, model=0)[0] == target(dataset=2, model=0)[0]
+    assert _CALLS == [1]
+
+
+def test_execute() -> None:
+    """Test execute() and Combu.execute() in this process."""
+    params = {'dataset': [0, 1], 'model': [0, 1, 2]}
+    _CALLS.clear()
+    results = list(execute(_train, params, fixtures={'data': _load}))
+    assert [r[0] for r, _ in results] == ['data0'] * 3 + ['data1'] * 3
+    assert _CALLS == [0, 1]
+
+    _CALLS.clear()
+    comb = Combu(_train)
+    results = list(comb.execute(params, fixtures={'data': _load}))
+    assert [r[0] for r, _ in results] == ['data0'] * 3 + ['data1'] * 3
+    assert _CALLS == [0, 1]
+
+    with pytest.raises(ValueError):
+        list(execute(_train, params, batch_size=2, fixtures={'data': _load}))
+    with pytest.raises(ValueError):
+        list(
+            Combu(_train, batch_size=2).execute(params,
+                                                fixtures={'data': _load}))
+
+
+def test_parallel() -> None:
+    """Test values computed in each worker."""
+    params = {'dataset': [0, 1], 'model': list(range(6))}
+    fixtures = {'data': Fixture(_load, maxsize=1)}
+    comb = CombuParallel(_train, n_jobs=2, affinity=['dataset'])
+    for results in [
+            list(execute(_train, params, n_jobs=2, fixtures=fixtures)),
+            list(comb.execute(params, fixtures=fixtures)),
+    ]:
+        assert len(results) == 12
+        for (data, pid, data_pid), param in results:
+            assert data == 'data{}'.format(param['dataset'])
+            assert data_pid == pid != os.getpid()
+
+    parallel = ParallelExecutor(_train, n=2, fixtures={'data': _load})
+    results = list(parallel.execute([{'dataset': 1, 'model': 0}]))
+    assert results[0][0][0] == 'data1'
@@ -1,10 +1,12 @@
 """Test generator."""
 
-from typing import Any, List, Tuple
+from typing import Any, Dict, List, Tuple
 
 import pytest
 
+from combu.definition import Constraint, Pack, Unset
 import combu.generator as generator
+import combu.util as util
 
 
 def test_get_order_order() -> None:
@@ -41,3 +43,178 @@ def test_get_order_order_set_order() -> None:
 def test_create_value():
     """Test create_value()."""
     _ = generator.create_values
+
+
+def test_create_values_sequence() -> None:
+    """Test create_values().
+
+    Set 'sequence'.
+    """
+    params = {'v1': [1, 2, 3, 4], ('v2', 'v3'): [(0, 0), (1, 1)]}
+    expected = list(generator.create_values(params))
+    actual = list(generator.create_values(params, sequence='halton'))
+    assert actual != expected
+    assert sorted(actual, key=repr) == sorted(expected, key=repr)
+    # Both values of the inner axis appear in the first three.
+    assert {p['v2'] for p in actual[:3]} == {0, 1}
+
+    with pytest.raises(ValueError):
+        list(generator.create_values(params, sequence='unknown'))
+
+
+def test_create_values_gray() -> None:
+    """Test create_values().
+
+    Set sequence='gray'.
+    """
+    params = {'v1': [1, 2], 'v2': [3, 4, 5]}
+    assert list(generator.create_values(params, sequence='gray')) == [
+        {
+            'v1': 1,
+            'v2': 3,
+        },
+        {
+            'v1': 1,
+            'v2': 4,
+        },
+        {
+            'v1': 1,
+            'v2': 5,
+        },
+        {
+            'v1': 2,
+            'v2': 5,
+        },
+        {
+            'v1': 2,
+            'v2': 4,
+        },
+        {
+            'v1': 2,
+            'v2': 3,
+        },
+    ]
+
+
+def test_create_changes() -> None:
+    """Test create_changes()."""
+    params: dict = {'v1': [1, 2], 'v2': [3, Unset()]}
+    assert list(generator.create_changes(params)) == [
+        ({
+            'v1': 1,
+            'v2': 3,
+        }, ['v1', 'v2']),
+        ({
+            'v1': 1,
+        }, ['v2']),
+        ({
+            'v1': 2,
+        }, ['v1']),
+        ({
+            'v1': 2,
+            'v2': 3,
+        }, ['v2']),
+    ]
+
+    # Keys of the changed axis.
+    params = {Pack('a', 'b'): [{'a': [1], 'b': [1, 2]}], 'c': [0, 1]}
+    changes = list(generator.create_changes(params))
+    assert [c for _, c in changes] == [['a', 'b', 'c'], ['c'], ['a', 'b'],
+                                       ['c']]
+
+    params = {'v1': [1, 2], 'v2': [3, 4]}
+    changes = list(generator.create_changes(params, sequence='product'))
+    assert [c for _, c in changes] == [['v1', 'v2'], ['v2'], ['v1', 'v2'],
+                                       ['v2']]
+
+
+def test_create_values_constraints() -> None:
+    """Test create_values().
+
+    Set 'constraints'. Failed subtrees are not enumerated.
+    """
+    calls = []
+
+    def check(batch_size: int, dataset_size: int) -> bool:
+        calls.append((batch_size, dataset_size))
+        return batch_size <= dataset_size
+
+    params = {
+        'dataset_size': [1, 10],
+        'batch_size': [2, 5, 20],
+        'lr': [0.1, 0.01, 0.001],
+    }
+    constraints = [Constraint(check, 'batch_size', 'dataset_size')]
+    actual = list(generator.create_values(params, constraints=constraints))
+    expected = [
+        p for p in generator.create_values(params)
+        if p['batch_size'] <= p['dataset_size']
+    ]
+    assert actual == expected
+    # Evaluated once per (dataset_size, batch_size), not per 'lr'.
+    assert len(calls) == 6
+
+    # Quasi-random order filters the same combinations.
+    actual = list(
+        generator.create_values(params,
+                                sequence='halton',
+                                constraints=constraints))
+    assert sorted(actual, key=repr) == sorted(expected, key=repr)
+
+
+def test_create_values_constraints_unknown_key() -> None:
+    """Test create_values().
+
+    Used unknown key on a constraint.
+    """
+    params = {'v1': [1, 2]}
+    constraints = [Constraint(lambda v2: True, 'v2')]
+    with pytest.raises(KeyError):
+        list(generator.create_values(params, constraints=constraints))
+
+
+def test_count_comb_index() -> None:
+    """Test count_comb_index()."""
+    params: dict = {'v1': [1, 2, 3], 'v2': [1, 2, 3], 'v3': ['a', 'b']}
+    combs_list = util.standardize(params)
+    assert generator.count_comb_index(combs_list) == 18
+    constraints = [Constraint(lambda v1, v2: v1 < v2, 'v1', 'v2')]
+    assert generator.count_comb_index(combs_list, constraints) == 6
+
+
+def test_create_columns() -> None:
+    """Test create_columns()."""
+    combs_list = util.standardize({
+        'v1': ['a', 'b'],
+        ('v2', 'v3'): [(0, 1), (2, 3)],
+    })
+    table = generator.create_column_table(combs_list)
+    assert table == [{'v1': ['a', 'b']}, {'v2': [0, 2], 'v3': [1, 3]}]
+    columns = generator.create_columns(table, [(0, 1), (1, 0), (1, 1)])
+    assert columns == {'v1': ['a', 'b', 'b'], 'v2': [2, 0, 2], 'v3': [3, 1, 3]}
+
+    batches = list(
+        generator.create_batches(combs_list, [(0, 0), (0, 1), (1, 0)], 2))
+    assert batches == [
+        ({
+            'v1': ['a', 'a'],
+            'v2': [0, 2],
+            'v3': [1, 3],
+        }, [(0, 0), (0, 1)]),
+        ({
+            'v1': ['b'],
+            'v2': [0],
+            'v3': [1],
+        }, [(1, 0)]),
+    ]
+
+    # Missing on an axis: the value of an earlier axis, as create_param().
+    first = [{'v1': 'a'}, {'v1': 'b'}]
+    second: List[Dict[str, Any]] = [{'v1': 'c', 'v2': 0}, {'v2': 1}]
+    combs_list = [first, second]
+    table = generator.create_column_table(combs_list)
+    indexes = [(0, 0), (0, 1), (1, 1)]
+    columns = generator.create_columns(table, indexes)
+    assert columns == {'v1': ['c', 'a', 'b'], 'v2': [0, 1, 1]}
+    params = [generator.create_param(combs_list, idx) for idx in indexes]
+    assert columns['v1'] == [p['v1'] for p in params]
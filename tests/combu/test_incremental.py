@@ -0,0 +1,124 @@
+"""Test incremental."""
+
+import itertools
+from typing import Any, List
+
+import pytest
+
+from combu.execution import execute
+from combu.incremental import execute_incremental, Record
+
+
+class _Counter:
+
+    def __init__(self) -> None:
+        self.calls: List[Any] = []
+
+    def __call__(self, v1: int, v2: str) -> str:
+        self.calls.append((v1, v2))
+        return v2 * v1
+
+
+def test_execute_incremental() -> None:
+    """Test execute_incremental()."""
+    record = Record()
+    func = _Counter()
+    params = {'v1': [1, 2], 'v2': ['a', 'b']}
+    first = list(execute_incremental(func, params, record))
+    assert first == list(execute(func, params))
+    assert len(record.results) == 4
+
+    # New values on both axes. Only new combinations are executed.
+    func = _Counter()
+    params = {'v1': [1, 2, 3], 'v2': ['c', 'a', 'b']}
+    actual = list(execute_incremental(func, params, record))
+    assert sorted(func.calls) == [
+        (1, 'c'),
+        (2, 'c'),
+        (3, 'a'),
+        (3, 'b'),
+        (3, 'c'),
+    ]
+    # Recorded results first, then new results. The whole grid.
+    assert actual[:4] == [
+        ('a', {
+            'v1': 1,
+            'v2': 'a',
+        }),
+        ('b', {
+            'v1': 1,
+            'v2': 'b',
+        }),
+        ('aa', {
+            'v1': 2,
+            'v2': 'a',
+        }),
+        ('bb', {
+            'v1': 2,
+            'v2': 'b',
+        }),
+    ]
+    assert sorted(actual, key=repr) == sorted(execute(func, params), key=repr)
+
+    # Removed values and other loop order.
+    func = _Counter()
+    params = {'v1': [3, 1], 'v2': ['b', 'd']}
+    actual = list(execute_incremental(func, params, record, order=['v2']))
+    assert func.calls == [(3, 'd'), (1, 'd')]
+    assert actual[:2] == [
+        ('bbb', {
+            'v2': 'b',
+            'v1': 3,
+        }),
+        ('b', {
+            'v2': 'b',
+            'v1': 1,
+        }),
+    ]
+
+    # Without merge.
+    func = _Counter()
+    params = {'v1': [1, 3, 4], 'v2': ['b', 'd']}
+    actual = list(execute_incremental(func, params, record, merge=False))
+    assert [param for _, param in actual] == [
+        {
+            'v1': 4,
+            'v2': 'b',
+        },
+        {
+            'v1': 4,
+            'v2': 'd',
+        },
+    ]
+    assert len(record.results) == 6
+
+
+def test_execute_incremental_index() -> None:
+    """Test execute_incremental() enumerates each new combination once."""
+    record = Record()
+    params = {'v1': [0, 1], 'v2': [0], 'v3': [0, 1, 2]}
+    list(execute_incremental(lambda **kw: 0, params, record))
+    params = {'v1': [0, 1, 2, 3], 'v2': [1, 0], 'v3': [0, 3, 1, 2]}
+    calls = []
+    list(execute_incremental(lambda **kw: calls.append(kw), params, record))
+    assert len(calls) == 4 * 2 * 4 - 2 * 1 * 3
+    old = set(itertools.product([0, 1], [0], [0, 1, 2]))
+    expected = set(itertools.product(range(4), range(2), range(4))) - old
+    assert {(c['v1'], c['v2'], c['v3']) for c in calls} == expected
+
+
+def test_record_file(tmp_path: Any) -> None:
+    """Test Record with file and as sink of execute()."""
+    path = str(tmp_path / 'record.pkl')
+    params = {('v1', 'v2'): [(1, 'a'), (2, 'b')]}
+    list(execute(_Counter(), params, sink=Record(path)))
+
+    func = _Counter()
+    params = {('v1', 'v2'): [(1, 'a'), (2, 'b'), (3, 'c')]}
+    actual = list(execute_incremental(func, params, Record(path)))
+    assert func.calls == [(3, 'c')]
+    assert [res for res, _ in actual] == ['a', 'bb', 'ccc']
+    assert len(Record(path).results) == 3
+
+    with pytest.raises(ValueError):
+        list(execute_incremental(func, {'v1': [1]}, Record(path)))
@@ -1,13 +1,22 @@
 """Test __init__.py."""
 
+import os
+import subprocess
+import sys
+
 import toml
 
 import combu
 from combu._combu import Combu, CombuParallel
-from combu.definition import Pack, Unset
+from combu.adaptive import refine
+from combu.block import create_blocks
+from combu.definition import Constraint, Failure, Pack, Range, Unset
 from combu.execution import execute
 from combu.generator import create_values
+from combu.incremental import execute_incremental
 from combu.parallel import ParallelExecutor
+from combu.scheduler import hyperband, successive_halving
+from combu.sinks import Tensor
 
 
 def test_version() -> None:
@@ -23,15 +32,51 @@ def test_import_classes():
     assert combu.ParallelExecutor == ParallelExecutor
     assert combu.Unset == Unset
     assert combu.Pack == Pack
+    assert combu.Constraint == Constraint
+    assert combu.Failure == Failure
+    assert combu.Range == Range
+    assert combu.Tensor == Tensor
 
 
 def test_import_methods():
     """Test import methods."""
     assert combu.create_values == create_values
+    assert combu.create_blocks == create_blocks
     assert combu.execute == execute
+    assert combu.successive_halving == successive_halving
+    assert combu.hyperband == hyperband
+    assert combu.refine == refine
+    assert combu.execute_incremental == execute_incremental
 
 
 def test_import_aliases():
     """Test import aliases."""
     assert combu.values == create_values
     assert combu.exec == execute
+
+
+def test_import_lazy() -> None:
+    """Test parallel, progress and output machinery is not imported."""
+    lazy = [
+        'multiprocessing',
+        'tqdm',
+        'statistics',
+        'cProfile',
+        'pstats',
+        'tracemalloc',
+        'csv',
+        'json',
+        'pickle',
+        'queue',
+        'sqlite3',
+        'numpy',
+    ]
+    code = 'import sys; import combu; print(" ".join(sorted(sys.modules)))'
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    out = subprocess.run([sys.executable, '-c', code],
+                         stdout=subprocess.PIPE,
+                         env=env,
+                         check=True).stdout.decode()
+    modules = set(out.split())
+    assert 'combu' in modules
+    assert [m for m in lazy if m in modules] == []
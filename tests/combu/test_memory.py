@@ -0,0 +1,125 @@
+"""Test memory scaling.
+
+Entry points that stream combinations must keep peak memory (traced in the
+main process) bounded while the grid grows 64 times. Quasi-random sequences
+('halton', 'sobol', 'lhs') are not tested: they keep a bit per combination.
+"""
+
+import tracemalloc
+from typing import Any, Callable, Dict, Iterable
+
+import pytest
+
+from combu import Constraint, Pack, Unset
+from combu._combu import Combu, CombuParallel
+from combu.execution import execute
+from combu.generator import create_values
+from combu.util import count
+
+# Allowed growth of peak memory while the grid grows 64 times.
+MAX_GROWTH = 4
+
+
+def _noop(**kwargs: Any) -> None:
+    pass
+
+
+def _batch_noop(**kwargs: Any) -> list:
+    return [None] * len(next(iter(kwargs.values())))
+
+
+def _consume(it: Iterable) -> None:
+    for _ in it:
+        pass
+
+
+def _grid(n_axes: int) -> Dict[Any, Any]:
+    """Create a grid of 4**n_axes combinations."""
+    return {'v{}'.format(i): list(range(4)) for i in range(n_axes)}
+
+
+def _pack_grid(n_axes: int) -> Dict[Any, Any]:
+    params = _grid(n_axes - 1)
+    params[Pack('a', 'b')] = [{'a': [1, 2], 'b': [3, 4]}] * 2
+    return params
+
+
+def _tuple_grid(n_axes: int) -> Dict[Any, Any]:
+    params = _grid(n_axes - 1)
+    params[('a', 'b')] = [(1, 2), (3, 4), (5, 6), (7, 8)]
+    return params
+
+
+def _unset_grid(n_axes: int) -> Dict[Any, Any]:
+    return {'v{}'.format(i): [0, Unset(), 2, Unset()] for i in range(n_axes)}
+
+
+def _peak(func: Callable[[], Any]) -> int:
+    """Get the peak of traced memory while calling the function.
+
+    No gc.collect() before: it clears free lists, which then refill (up to
+    thousands of objects) within the traced call.
+    """
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _assert_bounded(run: Callable[[Dict[Any, Any]], Any],
+                    grid: Callable[[int], Dict[Any, Any]] = _grid,
+                    n_axes: int = 4) -> None:
+    """Assert peak memory is bounded from 4**n_axes to 64 times more."""
+    # Warm up caches, free lists (e.g. of tuples) and lazy imports.
+    run(grid(n_axes + 3))
+    small = _peak(lambda: run(grid(n_axes)))
+    large = _peak(lambda: run(grid(n_axes + 3)))
+    assert large < small * MAX_GROWTH, (small, large)
+
+
+_CONSTRAINTS = [Constraint(lambda v0, v1: v0 <= v1, 'v0', 'v1')]
+
+
+@pytest.mark.parametrize('run', [
+    lambda p: _consume(create_values(p)),
+    lambda p: count(p),
+    lambda p: count(p, constraints=_CONSTRAINTS),
+    lambda p: _consume(execute(_noop, p)),
+    lambda p: _consume(execute(_noop, p, constraints=_CONSTRAINTS)),
+    lambda p: _consume(execute(_batch_noop, p, batch_size=64)),
+    lambda p: _consume(Combu(_noop).execute(p)),
+])
+def test_serial(run: Callable[[Dict[Any, Any]], Any]) -> None:
+    """Test streaming entry points."""
+    _assert_bounded(run)
+
+
+@pytest.mark.parametrize('grid', [_pack_grid, _tuple_grid, _unset_grid])
+def test_packed(grid: Callable[[int], Dict[Any, Any]]) -> None:
+    """Test Pack, tuple keys and Unset values."""
+    _assert_bounded(lambda p: _consume(create_values(p)), grid=grid)
+    _assert_bounded(lambda p: _consume(execute(_noop, p)), grid=grid)
+
+
+def test_combu_hooks() -> None:
+    """Test Combu with hooks."""
+
+    def _run(params: Dict[Any, Any]) -> None:
+        comb = Combu(_noop)
+        for k in params:
+            comb.set_before(k, _noop)
+            comb.set_after_each(k, _noop)
+        _consume(comb.execute(params))
+
+    _assert_bounded(_run)
+
+
+@pytest.mark.parametrize('run', [
+    lambda p: _consume(execute(_noop, p, n_jobs=2)),
+    lambda p: _consume(CombuParallel(_noop, n_jobs=2).execute(p)),
+])
+def test_parallel(run: Callable[[Dict[Any, Any]], Any]) -> None:
+    """Test parallel entry points (main process)."""
+    _assert_bounded(run, n_axes=3)
@@ -0,0 +1,121 @@
+"""Test ordering."""
+
+import collections
+import itertools
+import random
+import time
+from typing import Any, cast, Dict
+
+import pytest
+
+from combu._combu import Combu
+from combu.ordering import count_hook_calls, optimize_order, OrderPlan
+from combu.stats import ExecutionStats
+
+
+def _noop(**kwargs: Any) -> None:
+    pass
+
+
+def _total(order, sizes, costs, sequence='product') -> float:
+    calls = count_hook_calls(order, sizes, list(costs), sequence)
+    return sum(costs[h] * n for h, n in calls.items())
+
+
+@pytest.mark.parametrize('sequence', ['product', 'gray'])
+def test_count_hook_calls(sequence: str) -> None:
+    """Test counts against the calls of Combu."""
+    params = {'a': [1, 2], 'b': [1, 2, 3], 'c': [1, 2, 3, 4]}
+    sizes: Dict[Any, int] = {k: len(v) for k, v in params.items()}
+    counter: Dict[Any, int] = collections.Counter()
+    comb = Combu(_noop, sequence=sequence)
+    for kind in ['before', 'before_each', 'after_each', 'after']:
+        for k in params:
+
+            def _hook(kind=kind, k=k, **kwargs):
+                counter[(kind, k)] += 1
+
+            getattr(comb, 'set_' + kind)(k, _hook)
+    for order in itertools.permutations(params):
+        counter.clear()
+        list(comb.execute(params, order=order))
+        assert count_hook_calls(order, sizes, list(counter),
+                                sequence) == counter
+
+
+@pytest.mark.parametrize('sequence', ['product', 'gray'])
+def test_optimize_order(sequence: str) -> None:
+    """Test the order is optimal against all permutations."""
+    rand = random.Random(0)
+    kinds = ['before', 'before_each', 'after_each', 'after']
+    for _ in range(200):
+        keys = ['k{}'.format(i) for i in range(4)]
+        sizes: Dict[Any, int] = {k: rand.randint(1, 5) for k in keys}
+        costs: Dict[Any, float] = {
+            (rand.choice(kinds), k): rand.choice([0.0, 0.5, 1.0, 10.0])
+            for k in rand.sample(keys, 3)
+        }
+        order = optimize_order(keys, sizes, costs, sequence)
+        best = min(
+            _total(o, sizes, costs, sequence)
+            for o in itertools.permutations(keys))
+        assert _total(order, sizes, costs, sequence) == pytest.approx(best)
+
+    # Keys without hooks keep their order, last.
+    sizes = {'a': 2, 'b': 3, 'c': 4}
+    assert optimize_order(['a', 'b', 'c'], sizes,
+                          {('before_each', 'c'): 1.0}) == ['c', 'a', 'b']
+    with pytest.raises(KeyError):
+        optimize_order(['a'], sizes, {('before', 'x'): 1.0})
+
+
+def test_plan() -> None:
+    """Test Combu.plan() and order='auto'."""
+    params = {'model': list(range(20)), 'dataset': [0, 1, 2]}
+    comb = Combu(_noop, order='auto')
+    comb.set_before_each('dataset', _noop, cost=10)
+    comb.set_before_each('model', _noop, cost=0.1)
+    plan = comb.plan(params)
+    assert isinstance(plan, OrderPlan)
+    assert plan.order == ['dataset', 'model']
+    assert plan.calls == {
+        ('before_each', 'dataset'): 3,
+        ('before_each', 'model'): 60,
+    }
+    assert plan.cost == pytest.approx(36)
+    assert str(plan) == ('order: dataset, model | hook calls: '
+                         'before_each:dataset 3, before_each:model 60 | '
+                         'cost: 36')
+    assert comb.plan(params, order=['model']).cost == pytest.approx(602)
+
+    results = list(comb.execute(params))
+    assert comb.last_plan is not None
+    assert comb.last_plan.order == ['dataset', 'model']
+    assert results[1][1] == {'dataset': 0, 'model': 1}
+
+    comb.set_before_each('dataset', _noop, cost=0.01)
+    assert comb.plan(params).order == ['model', 'dataset']
+    # Undeclared: fewest calls, with the smaller axis outer.
+    comb.set_before_each('dataset', _noop)
+    comb.set_before_each('model', _noop)
+    assert comb.hook_costs == {}
+    assert comb.plan(params).order == ['dataset', 'model']
+
+
+def test_plan_measured() -> None:
+    """Test hook times measured in stats of a previous run."""
+
+    def _load(**kwargs: Any) -> None:
+        time.sleep(0.005)
+
+    params = {'model': [0, 1], 'dataset': list(range(10))}
+    comb = Combu(_noop, order=['model', 'dataset'])
+    comb.set_before_each('dataset', _load)
+    comb.set_before_each('model', _noop)
+    stats = ExecutionStats()
+    list(comb.execute(params, stats=stats))
+    assert comb.plan(params).order == ['model', 'dataset']
+    assert comb.plan(params, stats=stats).order == ['dataset', 'model']
+    list(comb.execute(params, order='auto', stats=stats))
+    plan = cast(OrderPlan, comb.last_plan)
+    assert plan.calls[('before_each', 'dataset')] == 10
@@ -1,8 +1,13 @@
 """Test parallel."""
 
+import os
 import time
+from typing import Any, cast, Dict, Generator, Iterator, List
 
-from combu.parallel import ParallelExecutor
+import pytest
+
+from combu.definition import Failure
+from combu.parallel import ParallelExecutor, retry_delay
 
 
 def _f(v):
@@ -14,6 +19,22 @@ def _wait(v):
     return v
 
 
+def _raise(v):
+    if v == 2:
+        raise ValueError(v)
+    return v
+
+
+def _exit(v):
+    if v == 2:
+        os._exit(1)
+    return v
+
+
+def _pid(v):
+    return os.getpid()
+
+
 class TestParallelExecutor:
     """Test ParallelExecutor class."""
 
@@ -77,10 +98,146 @@ class TestParallelExecutor:
         assert t * len(params) < total_time + 0.5
         assert t * len(params) > total_time - 0.5
 
-    def test_pass_f(self) -> None:
-        """Pass _f().
+    def test_execute_lazy(self) -> None:
+        """Test execute().
 
-        This is a not text case.
+        Parameters are consumed as workers become free.
         """
-        parallel = ParallelExecutor(_f)
-        parallel._f({'v': 1})
+        consumed = []
+
+        def params() -> Iterator[Dict[str, float]]:
+            for i in range(100):
+                consumed.append(i)
+                yield {'v': 0.0}
+
+        parallel = ParallelExecutor(_wait, n=2)
+        results = cast(Generator, parallel.execute(params()))
+        next(results)
+        assert len(consumed) < 10
+        results.close()
+
+    def test_start(self) -> None:
+        """Test start() and close().
+
+        Workers are kept across execute() calls.
+        """
+        parallel = ParallelExecutor(_pid, n=2)
+        parallel.start()
+        params = [{'v': v} for v in range(10)]
+        first = {pid for pid, _ in parallel.execute(params)}
+        second = {pid for pid, _ in parallel.execute(params)}
+        assert first == second
+        assert len(first) <= 2
+        parallel.close()
+        assert parallel._workers is None
+        third = {pid for pid, _ in parallel.execute(params)}
+        assert third.isdisjoint(first)
+
+    def test_execute_error(self) -> None:
+        """Test execute().
+
+        Errors of the function and of worker processes.
+        """
+        params = [{'v': v} for v in range(5)]
+        with pytest.raises(ValueError):
+            list(ParallelExecutor(_raise, n=2).execute(params))
+        with pytest.raises(RuntimeError):
+            list(ParallelExecutor(_exit, n=2).execute(params))
+
+    def test_execute_timeout(self) -> None:
+        """Test execute().
+
+        Set 'timeout'.
+        """
+        params: List[Dict[str, Any]] = [{'v': 0.01}, {'v': 10}, {'v': 0.01}]
+        parallel = ParallelExecutor(_wait, n=2, timeout=0.5)
+        start_time = time.monotonic()
+        with pytest.raises(TimeoutError):
+            list(parallel.execute(params))
+        assert time.monotonic() - start_time < 5
+
+    def test_execute_speculative(self, tmp_path: Any) -> None:
+        """Test execute().
+
+        Set 'speculative'. A straggler is sent again to an idle worker.
+        """
+        path = str(tmp_path / 'called')
+
+        def func(v: int) -> int:
+            # The first call with 1 hangs.
+            hang = v == 1 and not os.path.exists(path)
+            if v == 1:
+                open(path, 'a').close()
+            time.sleep(30 if hang else 0.05)
+            return v
+
+        parallel = ParallelExecutor(func, n=2, speculative=2)
+        params = [{'v': 1}] + [{'v': 2} for _ in range(5)]
+        start_time = time.monotonic()
+        results = [res for res, _ in parallel.execute(params)]
+        assert sorted(results) == [1, 2, 2, 2, 2, 2]
+        assert time.monotonic() - start_time < 10
+
+    def test_execute_collect(self) -> None:
+        """Test execute().
+
+        Set errors='collect'. Failed calls (exception, crash, timeout) are
+        yielded as Failure and crashed workers are replaced.
+        """
+        params: List[Dict[str, Any]] = [{'v': v} for v in range(6)]
+        for func in [_raise, _exit]:
+            parallel = ParallelExecutor(func, n=2, errors='collect')
+            by_value = {p['v']: res for res, p in parallel.execute(params)}
+            assert isinstance(by_value.pop(2), Failure)
+            assert by_value == {0: 0, 1: 1, 3: 3, 4: 4, 5: 5}
+
+        parallel = ParallelExecutor(_raise, n=2, errors='collect')
+        failure = [
+            r for r, _ in parallel.execute(params) if isinstance(r, Failure)
+        ][0]
+        assert isinstance(failure.error, ValueError)
+        assert failure.attempts == 1
+        assert 'ValueError' in failure.traceback
+
+        params = [{'v': 0.01}, {'v': 10}, {'v': 0.02}]
+        parallel = ParallelExecutor(_wait, n=2, timeout=0.5, errors='collect')
+        results = [res for res, _ in parallel.execute(params)]
+        assert len(results) == 3
+        assert isinstance(results[-1].error, TimeoutError)
+
+        with pytest.raises(ValueError):
+            ParallelExecutor(_f, errors='ignore')
+
+    def test_execute_retry(self, tmp_path: Any) -> None:
+        """Test execute().
+
+        Set errors='retry'.
+        """
+        path = str(tmp_path / 'count')
+
+        def func(v: int) -> int:
+            # v fails v times.
+            with open(path + str(v), 'a') as f:
+                f.write('x')
+            with open(path + str(v)) as f:
+                n_calls = len(f.read())
+            if n_calls <= v:
+                if v == 1:
+                    os._exit(1)
+                raise ValueError(v)
+            return v
+
+        parallel = ParallelExecutor(func,
+                                    n=2,
+                                    errors='retry',
+                                    retries=2,
+                                    backoff=0.01)
+        params = [{'v': v} for v in range(5)]
+        results = {p['v']: r for r, p in parallel.execute(params)}
+        assert [results[v] for v in range(3)] == [0, 1, 2]
+        assert [results[v].attempts for v in [3, 4]] == [3, 3]
+
+    def test_retry_delay(self) -> None:
+        """Test retry_delay()."""
+        assert [retry_delay(0.5, i) for i in range(1, 5)] == [0.5, 1, 2, 4]
+        assert retry_delay(1, 100) == 60
@@ -0,0 +1,125 @@
+"""Test profiling."""
+
+import csv
+import pstats
+import time
+from typing import Any, cast
+
+import pytest
+
+from combu._combu import Combu, CombuParallel
+from combu.execution import execute
+from combu.profiling import Profiler
+
+
+def _work(n: int, size: int = 0) -> int:
+    data = bytearray(size)
+    time.sleep(0.002 * n)
+    return len(data) + n
+
+
+def test_profiler_init() -> None:
+    """Test Profiler arguments."""
+    with pytest.raises(ValueError):
+        Profiler(every=0)
+    with pytest.raises(ValueError):
+        Profiler(rate=0)
+    with pytest.raises(ValueError):
+        Profiler(rate=1.5)
+
+
+def test_sampler() -> None:
+    """Test sampling of calls."""
+    sampler = Profiler(every=3).sampler()
+    sampled = [sampler.sampled() for _ in range(7)]
+    assert sampled == [True, False, False, True, False, False, True]
+    sampler = Profiler(rate=0.5).sampler()
+    n = sum(sampler.sampled() for _ in range(1000))
+    assert 300 < n < 700
+
+    sampler = Profiler().sampler()
+    assert sampler.profiled(_work)(n=1, size=10**6) == 10**6 + 1
+    sample = sampler.take()
+    assert sample is not None
+    wall, cpu, peak, stats = sample
+    assert wall >= 0.002
+    assert cpu >= 0
+    assert peak >= 10**6
+    assert stats is not None
+    assert any(func[2] == '_work' for func in stats)
+    assert sampler.take() is None
+
+
+def test_profiler_execute(tmpdir: Any) -> None:
+    """Test Profiler with execute()."""
+    profile = Profiler()
+    params = {'n': [1, 10], 'size': [0, 10**6]}
+    list(execute(_work, params, profile=profile))
+    assert profile.samples == 4
+
+    table = profile.table()
+    # By key, then descending wall time.
+    assert [r['key'] for r in table] == ['n', 'n', 'size', 'size']
+    assert [r['value'] for r in table[:2]] == [10, 1]
+    rows = {(r['key'], r['value']): r for r in table}
+    assert rows[('n', 10)]['samples'] == 2
+    assert rows[('n', 10)]['relative'] > 2
+    assert rows[('n', 1)]['relative'] == 1
+    assert rows[('size', 10**6)]['peak_max'] >= 10**6
+    assert rows[('size', 0)]['peak_max'] < 10**6
+    assert profile.table('size')[0]['key'] == 'size'
+
+    path = str(tmpdir.join('costs.csv'))
+    profile.save_table(path)
+    with open(path) as f:
+        assert len(list(csv.DictReader(f))) == 4
+
+    path = str(tmpdir.join('all.pstats'))
+    profile.dump_stats(path)
+    assert cast(Any, pstats.Stats(path)).total_calls > 0
+    assert cast(Any, profile.stats('n', 10)).total_calls > 0
+    with pytest.raises(KeyError):
+        profile.stats('n', 2)
+
+    profile = Profiler(every=2, cprofile=False, memory=False)
+    list(execute(_work, {'n': [0] * 5}, profile=profile))
+    assert profile.samples == 3
+    assert profile.table()[0]['peak_max'] == 0
+    with pytest.raises(KeyError):
+        profile.stats()
+
+    with pytest.raises(ValueError):
+        list(execute(_work, {'n': [1]}, batch_size=2, profile=Profiler()))
+
+
+def test_profiler_parallel() -> None:
+    """Test Profiler across worker processes."""
+    profile = Profiler()
+    list(execute(_work, {'n': [1, 10] * 3}, n_jobs=2, profile=profile))
+    assert profile.samples == 6
+    rows = {r['value']: r for r in profile.table('n')}
+    assert rows[10]['samples'] == 3
+    assert rows[10]['wall_mean'] > rows[1]['wall_mean']
+    assert cast(Any, profile.stats('n', 10)).total_calls > 0
+
+    profile = Profiler(every=2)
+    list(
+        CombuParallel(_work, n_jobs=2).execute({'n': [0] * 8},
+                                               profile=profile))
+    # Each worker samples its own calls.
+    assert 4 <= profile.samples <= 5
+
+
+def test_profiler_combu() -> None:
+    """Test Profiler with Combu."""
+    comb = Combu(_work)
+    comb.set_before('n', lambda n: time.sleep(0.05))
+    profile = Profiler()
+    list(comb.execute({'n': [1, 2]}, profile=profile))
+    assert profile.samples == 2
+    # Hooks are not profiled.
+    assert profile.table()[0]['wall_mean'] < 0.05
+
+    with pytest.raises(ValueError):
+        list(
+            Combu(_work, batch_size=2).execute({'n': [1]}, profile=Profiler()))
@@ -0,0 +1,101 @@
+"""Test progress."""
+
+import io
+from typing import Any, List
+
+import pytest
+
+from combu import Pack
+from combu._combu import Combu
+from combu.execution import execute
+from combu.progress import _format_time, Progress
+
+
+def _noop(**kwargs) -> None:
+    pass
+
+
+def test_format_time() -> None:
+    """Test _format_time()."""
+    assert _format_time(0) == '00:00'
+    assert _format_time(75.5) == '01:15'
+    assert _format_time(3725) == '1:02:05'
+
+
+def test_position() -> None:
+    """Test position()."""
+    order: List[Any] = ['v1', Pack('a', 'b'), ('c', 'd')]
+    bar = Progress(200, order, [5, 4, 10])
+    assert bar.position() == ''
+    bar.update((1, 2, 9))
+    assert bar.position() == 'v1 2/5, a,b 3/4, c,d 10/10'
+    assert bar.render().startswith('1/200   0% | v1 2/5')
+
+
+def test_eta() -> None:
+    """Test eta() weighted by the cost of each value."""
+    bar = Progress(4, ['v1', 'v2'], [2, 2], interval=1e9)
+    assert bar.eta() is None
+    bar.update((0, 1), n=2)
+    # v1=1 was 3 times as slow as v1=0, v2 values were equal.
+    bar.costs = [[1.0, 3.0], [2.0, 2.0]]
+    bar.counts = [[2, 2], [2, 2]]
+    # Remaining combinations have v1=1.
+    assert bar._remaining_weight() == pytest.approx(3.0)
+    bar.start_time -= 10
+    assert bar.eta() == pytest.approx(30.0, rel=0.01)
+
+    unordered = Progress(4, ['v1', 'v2'], [2, 2], ordered=False)
+    unordered.update((0, 1), n=2)
+    assert unordered._remaining_weight() == 1.0
+
+
+def test_throttle() -> None:
+    """Test few time checks and writes for many updates."""
+    file = io.StringIO()
+    bar = Progress(10**6, ['v'], [10**6], interval=1e9, file=file)
+    for i in range(10**6):
+        bar.update((i,))
+    assert file.getvalue() == ''
+    assert sum(bar.counts[0]) == bar._check_n
+    assert bar.counts[0].count(0) > 10**6 * 0.9
+    bar.close()
+    assert file.getvalue().startswith('\r1000000/1000000 100% | v')
+    assert file.getvalue().endswith('\n')
+
+
+def test_iterate() -> None:
+    """Test iterate()."""
+    file = io.StringIO()
+    bar = Progress(3, file=file)
+    assert list(bar.iterate(range(3))) == [0, 1, 2]
+    assert bar.n == 3
+    assert file.getvalue().startswith('\r3/3 100% | ')
+
+
+@pytest.mark.parametrize('n_jobs', [1, 2])
+def test_execute(capsys, n_jobs: int) -> None:
+    """Test execute(progress=True)."""
+    params = {'v1': range(3), 'v2': range(4)}
+    assert len(list(execute(_noop, params, n_jobs=n_jobs,
+                            progress=True))) == 12
+    # Parallel results may complete out of order.
+    assert '\r12/12 100% | v1 ' in capsys.readouterr().err
+
+
+def test_execute_batch(capsys: Any) -> None:
+    """Test execute(progress=True) with batch_size."""
+
+    def _batch(v1, v2):
+        return [None] * len(v1)
+
+    params = {'v1': range(3), 'v2': range(4)}
+    list(execute(_batch, params, batch_size=5, progress=True))
+    assert '12/12 100% | v1 3/3, v2 4/4' in capsys.readouterr().err
+
+
+def test_combu(capsys: Any) -> None:
+    """Test Combu(progress=True)."""
+    comb = Combu(_noop, progress=True)
+    list(comb.execute({'v1': range(3), 'v2': range(4)}))
+    assert '12/12 100% | v1 3/3, v2 4/4' in capsys.readouterr().err
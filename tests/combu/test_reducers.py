@@ -0,0 +1,124 @@
+"""Test reducers."""
+
+import math
+import pickle
+import statistics
+from typing import Any, Callable, cast, Dict, List
+
+import pytest
+
+from combu._combu import Combu, CombuParallel
+from combu.execution import execute
+from combu.reducers import (ArgMax, ArgMin, Count, GroupBy, Histogram, Max,
+                            Mean, Min, Reducer, Sum, TopK)
+
+
+def _score(model: str, lr: float, seed: int) -> Dict[str, Any]:
+    return {'score': len(model) * 10 + lr * seed}
+
+
+_PARAMS: Dict[str, list] = {
+    'model': ['a', 'bb'],
+    'lr': [1, 2, 3],
+    'seed': [0, 1, 2, 3],
+}
+
+
+def test_reducers() -> None:
+    """Test reducers."""
+    values = [3.0, -1.5, 7.25, 7.25, 0.0, 2.5]
+    params = [{'i': i} for i in range(len(values))]
+    reducers: List[Any] = [
+        Count(),
+        Sum(),
+        Mean(),
+        Max(),
+        Min(),
+        ArgMax(),
+        ArgMin(),
+        TopK(3),
+        TopK(2, largest=False),
+        Histogram([-2, 0, 2, 7.25]),
+    ]
+    for r in reducers:
+        for v, param in zip(values, params):
+            r.update(v, param)
+
+    actual = [r.result() for r in reducers]
+    assert actual[:2] == [6, sum(values)]
+    assert actual[2] == pytest.approx(statistics.mean(values))
+    assert reducers[2].variance == pytest.approx(statistics.variance(values))
+    assert reducers[2].std == pytest.approx(statistics.stdev(values))
+    assert len(actual) == 10
+    assert actual[3:7] == [7.25, -1.5, {'i': 2}, {'i': 1}]
+    assert actual[7] == [(7.25, {'i': 2}), (7.25, {'i': 3}), (3.0, {'i': 0})]
+    assert actual[8] == [(-1.5, {'i': 1}), (0.0, {'i': 4})]
+    assert actual[9] == [1, 1, 4]
+
+    assert math.isnan(Mean().result())
+    assert Max().result() is None
+    with pytest.raises(ValueError):
+        Histogram([1])
+    with pytest.raises(ValueError):
+        Histogram([1, 1])
+
+
+def test_reducers_merge() -> None:
+    """Test merge() equals reducing all values at once."""
+    values = [5.0, 1.0, 8.0, -3.0, 2.0, 9.5, 4.0]
+    makes: List[Callable[[], Reducer]] = [Count, Sum, Max, Min, ArgMax]
+    makes += [lambda: TopK(3), lambda: Histogram([-5, 0, 5, 10])]
+    for make in [Mean, *makes]:
+        whole, left, right = make(), make(), make()
+        for i, v in enumerate(values):
+            whole.update(v, {'i': i})
+            (left if i < 3 else right).update(v, {'i': i})
+        left.merge(right)
+        if isinstance(whole, Mean):
+            assert left.result() == pytest.approx(whole.result())
+            assert cast(Mean, left).variance == pytest.approx(whole.variance)
+        else:
+            assert left.result() == whole.result()
+
+
+def test_group_by() -> None:
+    """Test GroupBy with execute()."""
+    mean = GroupBy('model', Mean('score'))
+    best = GroupBy(['model', 'lr'], ArgMax(lambda res: res['score']))
+    list(execute(_score, _PARAMS, sink=[mean, best]))
+    assert mean.result() == {'a': 13.0, 'bb': 23.0}
+    assert best.result()[('bb', 3)] == {'model': 'bb', 'lr': 3, 'seed': 3}
+    assert len(best.result()) == 6
+
+    # Merge shards.
+    shards = [GroupBy('lr', Sum('score')) for _ in range(2)]
+    for shard, model in zip(shards, _PARAMS['model']):
+        list(execute(_score, {**_PARAMS, 'model': [model]}, sink=shard))
+    shards[0].merge(shards[1])
+    assert shards[0].result() == {1: 132, 2: 144, 3: 156}
+
+    # A used prototype: groups start empty, with its arguments.
+    used = TopK(1, value='score')
+    used.update(100.0)
+    top = GroupBy('model', used)
+    list(execute(_score, _PARAMS, sink=top))
+    assert [v for v, _ in top.result()['a']] == [19]
+    restored = pickle.loads(pickle.dumps(used))
+    assert restored.empty().k == 1
+    assert restored.empty().result() == []
+    with pytest.raises(TypeError):
+        Reducer()  # type: ignore
+
+
+def test_group_by_combu() -> None:
+    """Test GroupBy with Combu and CombuParallel."""
+    count = GroupBy('seed', Count())
+    list(Combu(_score).execute(_PARAMS, sink=count))
+    assert count.result() == {0: 6, 1: 6, 2: 6, 3: 6}
+
+    top = GroupBy('model', TopK(2, value='score'))
+    list(CombuParallel(_score, n_jobs=2).execute(_PARAMS, sink=top))
+    assert [[v for v, _ in r] for r in top.result().values()] == [
+        [19, 16],
+        [29, 26],
+    ]
@@ -0,0 +1,135 @@
+"""Test scheduler."""
+
+import os
+from typing import Dict
+
+import pytest
+
+import combu.scheduler as scheduler
+
+
+def _train(lr: float, depth: int, epochs: int) -> Dict[str, float]:
+    # Best on lr=0.1, depth=3. Longer training is better.
+    return {'score': epochs - abs(lr - 0.1) * 10 - abs(depth - 3)}
+
+
+def _score(res: Dict[str, float]) -> float:
+    return res['score']
+
+
+def _train_pid(lr: float, depth: int, epochs: int) -> Dict[str, float]:
+    return {**_train(lr, depth, epochs), 'pid': os.getpid()}
+
+
+def test_successive_halving() -> None:
+    """Test successive_halving()."""
+    params = {
+        'lr': [0.001, 0.01, 0.1, 1.0],
+        'depth': [1, 2, 3],
+        'epochs': [1, 3, 9],
+    }
+    results = list(
+        scheduler.successive_halving(_train,
+                                     params,
+                                     resource='epochs',
+                                     score=_score,
+                                     eta=3))
+    epochs = [param['epochs'] for _, param in results]
+    # 12 -> 4 -> 1 configurations.
+    assert epochs == [1] * 12 + [3] * 4 + [9]
+    assert results[-1][1] == {'lr': 0.1, 'depth': 3, 'epochs': 9}
+
+
+def test_successive_halving_parallel() -> None:
+    """Test successive_halving().
+
+    Parallel.
+    """
+    params = {
+        'lr': [0.001, 0.01, 0.1, 1.0],
+        'depth': [1, 2, 3],
+        'epochs': [1, 3, 9],
+    }
+    results = list(
+        scheduler.successive_halving(_train,
+                                     params,
+                                     resource='epochs',
+                                     score=_score,
+                                     n_jobs=2))
+    assert len(results) == 17
+    final = [param for _, param in results if param['epochs'] == 9]
+    assert final == [{'lr': 0.1, 'depth': 3, 'epochs': 9}]
+
+    # One pool of workers for every rung and bracket.
+    for schedule in [scheduler.successive_halving, scheduler.hyperband]:
+        results = list(
+            schedule(_train_pid,
+                     params,
+                     resource='epochs',
+                     score=_score,
+                     n_jobs=2))
+        assert len({res['pid'] for res, _ in results}) <= 2
+
+
+def test_successive_halving_wrong_args() -> None:
+    """Test successive_halving().
+
+    Wrong arguments.
+    """
+    params: Dict[str, list] = {'lr': [0.1], 'depth': [1], 'epochs': [1]}
+    with pytest.raises(KeyError):
+        list(scheduler.successive_halving(_train, params, 'unknown', _score))
+    with pytest.raises(ValueError):
+        list(
+            scheduler.successive_halving(_train,
+                                         params,
+                                         'epochs',
+                                         _score,
+                                         eta=1))
+    params['epochs'] = []
+    with pytest.raises(ValueError):
+        list(scheduler.successive_halving(_train, params, 'epochs', _score))
+
+
+def test_hyperband() -> None:
+    """Test hyperband()."""
+    params = {
+        'lr': [0.001, 0.01, 0.1, 1.0],
+        'depth': [1, 2, 3],
+        'epochs': [1, 3, 9],
+    }
+    results = list(
+        scheduler.hyperband(_train,
+                            params,
+                            resource='epochs',
+                            score=_score,
+                            eta=3))
+    # Brackets: 9 -> 3 -> 1, 5 -> 1 (from epochs=3), 3 (from epochs=9).
+    epochs = [param['epochs'] for _, param in results]
+    assert epochs == [1] * 9 + [3] * 3 + [9] + [3] * 5 + [9] + [9] * 3
+    full_grid = 4 * 3 * 9
+    assert sum(epochs) < full_grid
+    assert max(results, key=lambda r: _score(r[0]))[1] == {
+        'lr': 0.1,
+        'depth': 3,
+        'epochs': 9,
+    }
+
+    params = {'lr': [], 'epochs': [1]}
+    assert list(scheduler.hyperband(_train, params, 'epochs', _score)) == []
+
+    # More axes than Sobol supports: 'lhs' by default.
+    def by_epochs(epochs: int, **kwargs: int) -> Dict[str, float]:
+        return {'score': epochs}
+
+    params = {'k{}'.format(i): [0] for i in range(30)}
+    params['epochs'] = [1, 3]
+    assert len(list(scheduler.hyperband(by_epochs, params, 'epochs',
+                                        _score))) > 0
+    with pytest.raises(ValueError):
+        list(
+            scheduler.hyperband(by_epochs,
+                                params,
+                                'epochs',
+                                _score,
+                                sequence='sobol'))
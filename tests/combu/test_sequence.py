@@ -0,0 +1,116 @@
+"""Test sequence."""
+
+import itertools
+
+import pytest
+
+import combu.sequence as sequence
+
+
+@pytest.mark.parametrize('name', ['product', 'gray', 'halton', 'sobol', 'lhs'])
+def test_create_index_permutation(name: str) -> None:
+    """Test create_index().
+
+    Every index is yielded exactly once.
+    """
+    for sizes in [[3], [2, 5], [4, 1, 3], [7, 6]]:
+        actual = list(sequence.create_index(sizes, sequence=name))
+        expected = list(itertools.product(*[range(n) for n in sizes]))
+        assert len(actual) == len(expected)
+        assert sorted(actual) == expected
+
+
+@pytest.mark.parametrize('name', ['product', 'gray', 'halton', 'sobol', 'lhs'])
+def test_create_index_empty(name: str) -> None:
+    """Test create_index().
+
+    Empty axis and no axis.
+    """
+    assert list(sequence.create_index([3, 0], sequence=name)) == []
+    assert list(sequence.create_index([], sequence=name)) == [()]
+
+
+@pytest.mark.parametrize('name', ['halton', 'sobol', 'lhs'])
+def test_create_index_prefix(name: str) -> None:
+    """Test create_index().
+
+    A prefix covers every value of every axis.
+    """
+    sizes = [4, 8, 2]
+    prefix = list(sequence.create_index(sizes, sequence=name))[:16]
+    for axis, n in enumerate(sizes):
+        assert {idx[axis] for idx in prefix} == set(range(n))
+
+    # Product order leaves the outer axis untouched.
+    prefix = list(sequence.create_index(sizes))[:16]
+    assert {idx[0] for idx in prefix} == {0}
+
+
+@pytest.mark.parametrize('name', ['halton', 'sobol'])
+def test_create_index_tail(name: str) -> None:
+    """Test create_index().
+
+    The cells not reached by the points also spread over the grid.
+    """
+    indexes = list(sequence.create_index([3] * 6, sequence=name))
+    # Both sequences leave more than 40 cells to the sweep.
+    tail = indexes[-40:-20]
+    assert {idx[0] for idx in tail} == {0, 1, 2}
+
+
+@pytest.mark.parametrize('name', ['halton', 'sobol', 'lhs'])
+def test_create_index_deterministic(name: str) -> None:
+    """Test create_index().
+
+    Same order every time.
+    """
+    sizes = [5, 6, 7]
+    first = list(sequence.create_index(sizes, sequence=name))
+    second = list(sequence.create_index(sizes, sequence=name))
+    assert first == second
+
+
+def test_sobol_points_stratified() -> None:
+    """Test Sobol points.
+
+    First 2^k points have one point in each 1/2^k interval of every axis.
+    """
+    dim = len(sequence._SOBOL_DIRECTIONS) + 1
+    k = 6
+    points = list(itertools.islice(sequence._sobol_points(dim), 2**k))
+    for axis in range(dim):
+        cells = sorted(int(p[axis] * 2**k) for p in points)
+        assert cells == list(range(2**k))
+
+
+def test_create_index_too_many_axes() -> None:
+    """Test create_index().
+
+    Too many axes.
+    """
+    with pytest.raises(ValueError):
+        list(sequence.create_index([2] * 30, sequence='halton'))
+    with pytest.raises(ValueError):
+        list(sequence.create_index([2] * 30, sequence='sobol'))
+
+
+def test_create_index_unknown() -> None:
+    """Test create_index().
+
+    Unknown sequence.
+    """
+    with pytest.raises(ValueError):
+        sequence.create_index([2, 2], sequence='unknown')
+
+
+def test_gray() -> None:
+    """Test gray().
+
+    One axis changes by one per step, the last axis fastest.
+    """
+    expected = [(0, 0), (0, 1), (0, 2), (1, 2), (1, 1), (1, 0)]
+    assert list(sequence.gray([2, 3])) == expected
+    for sizes in [[3], [2, 5], [4, 1, 3], [3, 2, 4, 2]]:
+        indexes = list(sequence.gray(sizes))
+        for a, b in zip(indexes, indexes[1:]):
+            assert sum(abs(i - j) for i, j in zip(a, b)) == 1
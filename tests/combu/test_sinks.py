@@ -0,0 +1,277 @@
+"""Test sinks."""
+
+import csv
+import json
+import time
+from typing import Any, cast, Dict, Generator, List, Tuple
+
+import pytest
+
+from combu.definition import Constraint, TParamsKey, Unset
+from combu.execution import execute
+from combu.sinks import (as_sinks, BufferedSink, close_sinks, CSV, JSONL,
+                         load_tensor, Sink, Tensor)
+
+
+class _Recorder(Sink):
+
+    def __init__(self) -> None:
+        self.events: List[Any] = []
+
+    def open(  # noqa: A003
+            self, order: List[TParamsKey],
+            combs_list: List[List[Dict[str, Any]]]) -> None:
+        self.events.append(['open', order])
+
+    def write(self, res: Any, param: Dict[str, Any],
+              index: Tuple[int, ...]) -> None:
+        self.events.append(['write', res, index])
+
+    def close(self) -> None:
+        self.events.append(['close'])
+
+
+def _mul(v1: int, v2: int) -> int:
+    return v1 * v2
+
+
+def test_as_sinks() -> None:
+    """Test as_sinks()."""
+    s = _Recorder()
+    assert as_sinks(None) == []
+    assert as_sinks(s) == [s]
+    assert as_sinks((s, s)) == [s, s]
+    # write() is abstract.
+    with pytest.raises(TypeError):
+        Sink()  # type: ignore
+
+
+def test_sink_close_on_error() -> None:
+    """Test a sink is closed when the function raises."""
+
+    def func(v: int) -> int:
+        if v == 2:
+            raise RuntimeError
+        return v
+
+    s = _Recorder()
+    with pytest.raises(RuntimeError):
+        list(execute(func, {'v': [1, 2, 3]}, sink=s))
+    assert s.events == [['open', ['v']], ['write', 1, (0,)], ['close']]
+
+
+def _read_jsonl(path: str) -> List[Dict[str, Any]]:
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+@pytest.mark.parametrize('background', [False, True])
+def test_jsonl(tmp_path: Any, background: bool) -> None:
+    """Test JSONL."""
+    path = str(tmp_path / 'result.jsonl')
+    params: Dict[str, Any] = {'v1': range(10), 'v2': [3, 4, 5]}
+    sink = JSONL(path, buffer_size=4, background=background)
+    results = list(execute(_mul, params, sink=sink))
+    assert _read_jsonl(path) == [{**p, 'result': r} for r, p in results]
+
+    # Dict result is merged. Not serializable values are str.
+    sink = JSONL(path, background=background)
+    params = {'v1': [1, 2], 'v2': [(1, 2)]}
+    list(execute(lambda v1, v2: {'set': {v1}}, params, sink=sink))
+    assert _read_jsonl(path) == [
+        {
+            'v1': 1,
+            'v2': [1, 2],
+            'set': '{1}',
+        },
+        {
+            'v1': 2,
+            'v2': [1, 2],
+            'set': '{2}',
+        },
+    ]
+
+    with pytest.raises(ValueError):
+        JSONL(path, buffer_size=0)
+
+
+@pytest.mark.parametrize('background', [False, True])
+def test_jsonl_flush_on_error(tmp_path: Any, background: bool) -> None:
+    """Test JSONL.
+
+    Buffered records are written when the function raises or the
+    generator is closed.
+    """
+    path = str(tmp_path / 'result.jsonl')
+
+    def func(v: int) -> int:
+        if v == 5:
+            raise RuntimeError
+        return v
+
+    sink = JSONL(path, buffer_size=100, background=background)
+    with pytest.raises(RuntimeError):
+        list(execute(func, {'v': range(10)}, sink=sink))
+    assert [r['v'] for r in _read_jsonl(path)] == [0, 1, 2, 3, 4]
+
+    sink = JSONL(path, buffer_size=100, background=background)
+    gen = cast(Generator, execute(func, {'v': range(10)}, sink=sink))
+    next(gen)
+    next(gen)
+    gen.close()
+    assert [r['v'] for r in _read_jsonl(path)] == [0, 1]
+
+
+class _Failing(BufferedSink):
+
+    def _open_output(self) -> None:
+        self.written: List[Any] = []
+
+    def _close_output(self) -> None:
+        pass
+
+    def _write_records(self, records: List[Dict[Any, Any]]) -> None:
+        self.written += records
+        raise OSError('write')
+
+
+def test_buffered_error() -> None:
+    """Test errors of a background writer and of closing sinks."""
+    sink = _Failing('unused', buffer_size=2, background=True)
+    sink.open(['v'], [[{'v': 0}]])
+    for v in range(2):
+        sink.write(v, {'v': v}, (v,))
+    # Wait for the background thread to fail.
+    for _ in range(100):
+        if sink._error is not None:
+            break
+        time.sleep(0.01)
+    sink.write(2, {'v': 2}, (2,))
+    # The error is raised before the buffer is taken.
+    with pytest.raises(OSError):
+        sink.write(3, {'v': 3}, (3,))
+    assert [r['v'] for r in sink._buffer] == [2, 3]
+
+    # Every sink is closed, then the first error is raised.
+    recorder = _Recorder()
+    with pytest.raises(OSError, match='write'):
+        close_sinks([sink, recorder])
+    assert recorder.events == [['close']]
+    with pytest.raises(TypeError):
+        BufferedSink('unused')  # type: ignore
+
+    # Records stay buffered on a foreground error.
+    sink = _Failing('unused', buffer_size=2)
+    sink.open(['v'], [[{'v': 0}]])
+    sink.write(0, {'v': 0}, (0,))
+    with pytest.raises(OSError):
+        sink.write(1, {'v': 1}, (1,))
+    assert [r['v'] for r in sink._buffer] == [0, 1]
+    with pytest.raises(OSError):
+        sink.close()
+    assert [r['v'] for r in sink.written] == [0, 1, 0, 1]
+
+
+def test_jsonl_parallel(tmp_path: Any) -> None:
+    """Test JSONL with parallel execution."""
+    path = str(tmp_path / 'result.jsonl')
+    params = {'v1': range(10), 'v2': range(10)}
+    sink = JSONL(path, buffer_size=7, background=True)
+    list(execute(_mul, params, n_jobs=2, sink=sink))
+    records = _read_jsonl(path)
+    assert len(records) == 100
+    assert all(r['result'] == r['v1'] * r['v2'] for r in records)
+
+
+def test_csv(tmp_path: Any) -> None:
+    """Test CSV."""
+    path = str(tmp_path / 'result.csv')
+    params = {'v1': [1, 2], 'v2': [Unset(), 'a'], 'v3': [True]}
+    sink = CSV(path, buffer_size=3)
+    list(execute(lambda v1, v3, v2='-': v2 * v1, params, sink=sink))
+    with open(path, newline='') as f:
+        rows = list(csv.reader(f))
+    assert rows == [
+        ['v1', 'v2', 'v3', 'result'],
+        ['1', '', 'True', '-'],
+        ['1', 'a', 'True', 'a'],
+        ['2', '', 'True', '--'],
+        ['2', 'a', 'True', 'aa'],
+    ]
+
+    # Dict result.
+    sink = CSV(path, background=True)
+    list(execute(lambda v: {'a': v, 'b': -v}, {'v': [1, 2]}, sink=sink))
+    with open(path, newline='') as f:
+        rows = list(csv.reader(f))
+    assert rows == [['v', 'a', 'b'], ['1', '1', '-1'], ['2', '2', '-2']]
+
+
+def test_tensor() -> None:
+    """Test Tensor."""
+    pytest.importorskip('numpy')
+    params = {'v1': [1, 2], 'v2': [3, 4, 5]}
+    tensor = Tensor(dtype='int64')
+    list(execute(_mul, params, sink=tensor))
+    assert tensor.array.tolist() == [[3, 4, 5], [6, 8, 10]]
+    assert tensor.order == ['v1', 'v2']
+
+    # Loop order decides the axes.
+    tensor = Tensor(dtype='int64')
+    list(execute(_mul, params, order=['v2', 'v1'], sink=tensor))
+    assert tensor.array.tolist() == [[3, 6], [4, 8], [5, 10]]
+
+    # Shape of each result.
+    tensor = Tensor(item_shape=(2,))
+    list(execute(lambda v1, v2: [v1, v2], params, sink=tensor))
+    assert tensor.array.shape == (2, 3, 2)
+    assert tensor.array[1, 2].tolist() == [2, 5]
+
+
+def test_tensor_constraints() -> None:
+    """Test Tensor.
+
+    Skipped combinations keep the fill value.
+    """
+    np = pytest.importorskip('numpy')
+    params = {'v1': [1, 2], 'v2': [3, 4, 5]}
+    constraints = [Constraint(lambda v1, v2: v1 + v2 < 6, 'v1', 'v2')]
+    tensor = Tensor()
+    list(execute(_mul, params, constraints=constraints, sink=tensor))
+    assert np.isnan(tensor.array).tolist() == [
+        [False, False, True],
+        [False, True, True],
+    ]
+    assert tensor.array[1, 0] == 6
+
+
+def test_tensor_parallel() -> None:
+    """Test Tensor with out of order results."""
+    np = pytest.importorskip('numpy')
+    params = {'v1': range(5), 'v2': range(7)}
+    tensor = Tensor(dtype='int64')
+    list(execute(_mul, params, n_jobs=2, sink=tensor))
+    assert tensor.array.tolist() == np.outer(range(5), range(7)).tolist()
+
+    tensor = Tensor(dtype='int64')
+    list(
+        execute(lambda v1, v2: [a * b for a, b in zip(v1, v2)],
+                params,
+                batch_size=4,
+                sink=tensor))
+    assert tensor.array.tolist() == np.outer(range(5), range(7)).tolist()
+
+
+def test_tensor_memmap(tmp_path: Any) -> None:
+    """Test Tensor and load_tensor() with file."""
+    np = pytest.importorskip('numpy')
+    path = str(tmp_path / 'result.npy')
+    params = {'v1': [1, 2], 'v2': ['a', 'b', 'c']}
+    tensor = Tensor(path, dtype='int32')
+    list(execute(lambda v1, v2: v1 * 10 + len(v2), params, sink=tensor))
+
+    array, order, labels = load_tensor(path)
+    assert array.dtype == np.int32
+    assert array.tolist() == [[11, 11, 11], [21, 21, 21]]
+    assert order == ['v1', 'v2']
+    assert labels[1] == [{'v2': 'a'}, {'v2': 'b'}, {'v2': 'c'}]
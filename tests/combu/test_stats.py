@@ -0,0 +1,82 @@
+"""Test stats."""
+
+import time
+
+import pytest
+
+from combu._combu import Combu, CombuParallel
+from combu.execution import execute
+from combu.stats import ExecutionStats
+
+
+def _wait(v: float) -> float:
+    time.sleep(v)
+    return v
+
+
+def test_stats() -> None:
+    """Test ExecutionStats."""
+    stats = ExecutionStats(window=60)
+    assert stats.calls == 0
+    assert stats.elapsed == 0
+    assert stats.throughput == 0
+    stats.start(n_workers=2)
+    stats.add_call(0.5, 0.25, queue_wait=0.01, sent=10, received=20)
+    stats.add_call(1.5, 0.75, sent=10, received=30)
+    stats.add_hook('before', 'v', 0.5)
+    stats.add_hook('before', 'v', 0.25)
+    time.sleep(0.01)
+    stats.stop()
+
+    summary = stats.summary()
+    assert summary['calls'] == 2
+    assert summary['wall_mean'] == 1.0
+    assert summary['wall_max'] == 1.5
+    assert summary['cpu_mean'] == 0.5
+    assert summary['queue_wait_mean'] == 0.01
+    assert summary['sent_bytes'] == 20
+    assert summary['received_bytes'] == 50
+    assert summary['hooks'] == {('before', 'v'): 0.75}
+    assert stats.utilization == pytest.approx(2 / (stats.elapsed * 2))
+    assert stats.throughput == pytest.approx(2 / stats.elapsed)
+    assert repr(stats).startswith('ExecutionStats(calls=2, ')
+
+
+def test_stats_execute() -> None:
+    """Test ExecutionStats with execute()."""
+    stats = ExecutionStats()
+    for _ in execute(_wait, {'v': [0.01, 0.02]}, stats=stats):
+        # Readable while iterating.
+        assert stats.calls >= 1
+        time.sleep(0.05)
+    assert stats.calls == 2
+    assert stats.wall.mean == pytest.approx(0.015, abs=0.01)
+    assert stats.max_wall >= 0.02
+    assert stats.consumer_time >= 0.1
+    assert stats.sent_bytes == 0
+    assert 0 < stats.utilization < 1
+
+    stats = ExecutionStats()
+    list(execute(_wait, {'v': [0.05] * 6}, n_jobs=2, stats=stats))
+    assert stats.calls == 6
+    assert stats.n_workers == 2
+    assert stats.queue_wait.count == 6
+    assert stats.sent_bytes > 0 and stats.received_bytes > 0
+    assert 0.5 < stats.utilization <= 1
+
+
+def test_stats_combu() -> None:
+    """Test ExecutionStats with Combu and CombuParallel."""
+    comb = Combu(lambda v1, v2: None)
+    comb.set_before('v2', lambda v1, v2: time.sleep(0.01))
+    comb.set_after_each('v1', lambda v1, v2: None)
+    stats = ExecutionStats()
+    list(comb.execute({'v1': [1, 2], 'v2': [1, 2, 3]}, stats=stats))
+    assert stats.calls == 6
+    assert stats.hooks[('before', 'v2')].count == 2
+    assert stats.hooks[('before', 'v2')].mean >= 0.01
+    assert stats.hooks[('after_each', 'v1')].count == 2
+
+    stats = ExecutionStats()
+    list(CombuParallel(_wait, n_jobs=2).execute({'v': [0.0] * 4}, stats=stats))
+    assert stats.calls == 4
@@ -0,0 +1,134 @@
+"""Test store."""
+
+from typing import Any, Dict
+
+import pytest
+
+from combu.definition import Unset
+from combu.execution import execute
+from combu.store import SQLiteStore
+
+
+def _train(lr: float, model: str, opt: str = None) -> Dict[str, Any]:
+    return {'loss': lr * len(model), 'tags': {model}}
+
+
+_PARAMS = {
+    'lr': [0.1, 0.2, 0.3],
+    'model': ['a', 'bb'],
+    'opt': [Unset(), 'adam'],
+}
+
+
+@pytest.mark.parametrize('background', [False, True])
+def test_store(tmp_path: Any, background: bool) -> None:
+    """Test SQLiteStore."""
+    path = str(tmp_path / 'results.db')
+    store = SQLiteStore(path, buffer_size=5, background=background)
+    results = list(execute(_train, _PARAMS, sink=store))
+    assert store.columns('param') == ['lr', 'model', 'opt']
+    assert store.columns('result') == ['loss', 'tags']
+
+    records = list(store.query())
+    assert records == [{**p, **r} for r, p in results]
+
+    records = list(store.query(where={'model': 'bb', 'opt': None}))
+    assert records == [{**p, **r} for r, p in results[2::4]]
+    records = list(store.query(order_by='loss', descending=True, limit=2))
+    assert records == [{**p, **r} for r, p in results[10:]]
+
+    with pytest.raises(KeyError):
+        list(store.query(where={'unknown': 1}))
+
+
+def test_store_best(tmp_path: Any) -> None:
+    """Test SQLiteStore.best()."""
+    store = SQLiteStore(str(tmp_path / 'results.db'))
+    list(execute(_train, _PARAMS, sink=store))
+
+    best = store.best('loss', group_by='lr', maximize=False)
+    assert [(r['lr'], r['model']) for r in best] == [
+        (0.1, 'a'),
+        (0.2, 'a'),
+        (0.3, 'a'),
+    ]
+    best = store.best('loss', group_by=['model', 'opt'])
+    assert [(r['model'], r.get('opt'), r['lr']) for r in best] == [
+        ('a', None, 0.3),
+        ('a', 'adam', 0.3),
+        ('bb', None, 0.3),
+        ('bb', 'adam', 0.3),
+    ]
+    best = store.best('loss', maximize=False, where={'model': 'bb'})
+    assert [(r['lr'], r['model']) for r in best] == [(0.1, 'bb')]
+
+    with pytest.raises(KeyError):
+        store.best('unknown', group_by='lr')
+
+    # Names are quoted, not parsed.
+    store = SQLiteStore(str(tmp_path / 'quoted.db'), table='SELECT * WHERE')
+    list(execute(_train, _PARAMS, sink=store))
+    best = store.best('loss', group_by='lr', maximize=False)
+    assert [(r['lr'], r['model']) for r in best] == [
+        (0.1, 'a'),
+        (0.2, 'a'),
+        (0.3, 'a'),
+    ]
+    best = store.best('loss', group_by='lr', where={'model': 'bb'})
+    assert [r['model'] for r in best] == ['bb'] * 3
+
+
+def test_store_numbers(tmp_path: Any) -> None:
+    """Test SQLiteStore with bool and numpy values, typed in SQL."""
+    np = pytest.importorskip('numpy')
+
+    def train(lr: float, flag: bool) -> Dict[str, Any]:
+        return {'acc': np.float64(lr) + np.float32(flag), 'n': np.int64(lr)}
+
+    store = SQLiteStore(str(tmp_path / 'results.db'))
+    params = {'lr': [0.1, 0.2, 0.3], 'flag': [np.bool_(False), True]}
+    list(execute(train, params, sink=store))
+    best = store.best('acc', group_by='flag')
+    assert [(r['flag'], r['lr']) for r in best] == [(0, 0.3), (1, 0.3)]
+    best = store.best('acc', group_by='lr', maximize=False)
+    assert [(r['lr'], r['flag']) for r in best] == [(0.1, 0), (0.2, 0),
+                                                    (0.3, 0)]
+    records = list(store.query(where={'flag': True}, order_by='acc'))
+    assert [r['acc'] for r in records] == pytest.approx([1.1, 1.2, 1.3])
+    assert all(type(r['n']) is int for r in records)
+
+
+def test_store_runs(tmp_path: Any) -> None:
+    """Test SQLiteStore across runs.
+
+    Runs append rows. missing() creates combinations not stored yet.
+    """
+    path = str(tmp_path / 'results.db')
+    store = SQLiteStore(path)
+    assert list(store.missing({'v': [1, 2]})) == [{'v': 1}, {'v': 2}]
+
+    list(execute(lambda v: v * 2, {'v': [1, 2]}, sink=store))
+    params = {'v': [1, 2, 3], 'w': [Unset(), (1, 2)]}
+    assert list(store.missing(params)) == [
+        {
+            'v': 1,
+            'w': (1, 2),
+        },
+        {
+            'v': 2,
+            'w': (1, 2),
+        },
+        {
+            'v': 3,
+        },
+        {
+            'v': 3,
+            'w': (1, 2),
+        },
+    ]
+
+    store = SQLiteStore(path)
+    list(execute(lambda v, w=None: v, params, sink=store))
+    assert list(store.missing(params)) == []
+    assert len(list(store.query())) == 8
+    assert len(list(SQLiteStore(path).query(where={'v': 1}))) == 3
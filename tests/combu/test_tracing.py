@@ -0,0 +1,94 @@
+"""Test tracing."""
+
+import json
+import os
+import time
+from typing import Any
+
+from combu._combu import Combu, CombuParallel
+from combu.execution import execute
+from combu.tracing import Tracer
+
+
+def _wait(v: float) -> float:
+    time.sleep(v)
+    return v
+
+
+def _spans(tracer: Tracer, cat: str):
+    return [e for e in tracer.events if e.get('cat') == cat]
+
+
+def test_tracer(tmpdir: Any) -> None:
+    """Test Tracer."""
+    tracer = Tracer()
+    tracer.span('b', 2.0, 0.5, args={'v': 1, 'x': object(), 'l': (1, 2)})
+    tracer.span('a', 1.0, 0.25, pid=1, tid=3)
+    events = tracer.events
+    assert [e['ph'] for e in events] == ['M', 'M', 'X', 'X']
+    a, b = events[2:]
+    assert a == {
+        'name': 'a',
+        'cat': 'call',
+        'ph': 'X',
+        'ts': 1e6,
+        'dur': 0.25e6,
+        'pid': 1,
+        'tid': 3,
+    }
+    assert b['pid'] == os.getpid()
+    assert b['args']['v'] == 1
+    assert b['args']['x'].startswith('<object')
+    assert b['args']['l'] == [1, 2]
+
+    path = str(tmpdir.join('trace.json'))
+    tracer.save(path)
+    with open(path) as f:
+        data = json.load(f)
+    assert data['traceEvents'] == events
+
+
+def test_tracer_execute() -> None:
+    """Test Tracer with execute()."""
+    tracer = Tracer()
+    list(execute(_wait, {'v': [0.01, 0.02]}, trace=tracer))
+    calls = _spans(tracer, 'call')
+    assert [e['args'] for e in calls] == [{'v': 0.01}, {'v': 0.02}]
+    assert all(e['name'] == '_wait' for e in calls)
+    assert calls[1]['dur'] >= 0.02e6
+    assert calls[1]['ts'] >= calls[0]['ts'] + calls[0]['dur']
+
+    tracer = Tracer()
+    list(execute(_wait, {'v': [0.05] * 6}, n_jobs=2, trace=tracer))
+    calls = _spans(tracer, 'call')
+    assert len(calls) == 6
+    pids = {e['pid'] for e in calls}
+    assert len(pids) == 2 and os.getpid() not in pids
+    assert all(e['args'] == {'v': 0.05} for e in calls)
+    ipc = _spans(tracer, 'ipc')
+    assert [e['name'] for e in ipc].count('dispatch') == 6
+    assert [e['name'] for e in ipc].count('collect') == 6
+    assert all(e['pid'] == os.getpid() for e in ipc)
+    names = {
+        e['pid']: e['args']['name'] for e in tracer.events if e['ph'] == 'M'
+    }
+    assert names[os.getpid()].startswith('main')
+    assert all(names[pid].startswith('worker') for pid in pids)
+
+
+def test_tracer_combu() -> None:
+    """Test Tracer with Combu and CombuParallel."""
+    comb = Combu(lambda v1, v2: None)
+    comb.set_before('v2', lambda v1, v2: None)
+    comb.set_after_each('v1', lambda v1, v2: None)
+    tracer = Tracer()
+    list(comb.execute({'v1': [1, 2], 'v2': [1, 2, 3]}, trace=tracer))
+    assert len(_spans(tracer, 'call')) == 6
+    hooks = _spans(tracer, 'hook')
+    assert [e['name'] for e in hooks] == ['before:v2', 'after_each:v1'] * 2
+    assert hooks[0]['args'] == {'v1': 1, 'v2': 1}
+
+    tracer = Tracer()
+    list(
+        CombuParallel(_wait, n_jobs=2).execute({'v': [0.0] * 4}, trace=tracer))
+    assert len(_spans(tracer, 'call')) == 4
@@ -2,6 +2,7 @@
 
 import random
 
+from combu.definition import Constraint
 import combu.util as util
 
 
@@ -91,3 +92,22 @@ def test_count() -> None:
 
     params = {'v1': [1, 2, 3], 'v2': [1, 2]}
     assert util.count(params) == 6
+
+
+def test_count_constraints() -> None:
+    """Test count().
+
+    Set 'constraints'.
+    """
+    params = {'v1': [1, 2, 3], 'v2': [1, 2, 3], 'v3': ['a', 'b']}
+    constraints = [Constraint(lambda v1, v2: v1 <= v2, 'v1', 'v2')]
+    assert util.count(params, constraints=constraints) == 12
+    assert util.count(params, order=['v3'], constraints=constraints) == 12
+
+
+def test_group_value() -> None:
+    """Test group_value()."""
+    assert util.group_value(1) == 1
+    assert util.group_value(('a', 1)) == ('a', 1)
+    assert util.group_value([1, 2]) == '[1, 2]'
+    assert util.group_value({'a': 1}) == "{'a': 1}"